@@ -0,0 +1,269 @@
+import time
+import asyncio
+import logging
+from backend.database import store_analyses
+from backend.repository import get_repository
+from backend.config import settings
+from backend.metrics import predict_stage_duration
+
+logger = logging.getLogger(__name__)
+
+# Flush once this many records are waiting...
+MAX_BATCH_SIZE = settings.get_int("ANALYSIS_WRITE_BATCH_SIZE", 200)
+# ...or once the oldest record has waited this long
+FLUSH_INTERVAL_MS = settings.get_float("ANALYSIS_FLUSH_INTERVAL_MS", 250)
+# Records beyond this are dropped rather than letting memory grow without bound
+MAX_QUEUE_SIZE = settings.get_int("ANALYSIS_QUEUE_MAX_SIZE", 10_000)
+MAX_RETRIES = settings.get_int("ANALYSIS_WRITE_MAX_RETRIES", 5)
+RETRY_BACKOFF_MS = settings.get_float("ANALYSIS_WRITE_RETRY_BACKOFF_MS", 200)
+store_analysis_stage = predict_stage_duration.labels("store_analysis")
+
+async def store_with_active_repository(records: list[dict]) -> dict:
+    # Idempotent, so a row written ahead of its batch (see ensure_written) is skipped when the batch lands
+    return await store_analyses(get_repository(), records, on_conflict="analysis_id")
+
+class _Entry:
+    """A queued record, with done set once it was stored or dropped."""
+    __slots__ = ("record", "on_stored", "done", "stored")
+
+    def __init__(self, record: dict, on_stored):
+        self.record = record
+        self.on_stored = on_stored
+        self.done = asyncio.Event()
+        self.stored = False
+
+class AnalysisWriter:
+    """Write-behind buffer for analysis rows.
+
+    submit() queues a record and returns immediately, so /predict can answer
+    with its predictionId without waiting on the database. A worker task on
+    the event loop inserts queued records with store_batch in bulk whenever
+    max_batch_size records are waiting or flush_interval_ms has passed,
+    retries failed inserts with exponential backoff and, once max_retries
+    attempts failed, writes the batch row by row so one bad record only
+    drops itself. ensure_written() lets a request wait for one record (e.g.
+    the analysis a rating refers to). close() drains the queue before returning.
+
+    store_batch is a coroutine function taking a list of records and
+    returning a dict with an "error" key on failure (the contract of
+    database.store_analyses), so tests can pass an in-memory stand-in.
+    """
+
+    def __init__(self, store_batch=store_with_active_repository, max_batch_size: int = MAX_BATCH_SIZE,
+                 flush_interval_ms: float = FLUSH_INTERVAL_MS, max_queue_size: int = MAX_QUEUE_SIZE,
+                 max_retries: int = MAX_RETRIES, retry_backoff_ms: float = RETRY_BACKOFF_MS):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1")
+        self.store_batch = store_batch
+        self.max_batch_size = max_batch_size
+        self.flush_interval_ms = flush_interval_ms
+        self.max_queue_size = max_queue_size
+        self.max_retries = max_retries
+        self.retry_backoff_ms = retry_backoff_ms
+        self._loop = None
+        self._queue = None
+        self._worker = None
+        self._idle = None
+        self._pending = 0  # queued or being written
+        self._entries = {}  # analysis_id -> _Entry, until the record is stored or dropped
+        self.submitted = 0
+        self.written = 0
+        self.flushes = 0
+        self.retried = 0
+        self.dropped = 0
+        self.flush_ms_total = 0.0
+        self.flush_ms_max = 0.0
+
+    def start(self):
+        """Start the worker task on the running loop (submit() also starts it on first use)."""
+        loop = asyncio.get_running_loop()
+        if self._loop is loop and self._worker and not self._worker.done():
+            return
+        self._loop = loop
+        self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._pending = 0
+        self._entries = {}
+        self._worker = loop.create_task(self._run())
+
+    def submit(self, record: dict, on_stored=None) -> bool:
+        """Queue an analysis record; on_stored(record) runs once it has been inserted.
+
+        Must be called on the event loop. Returns False when the queue is full
+        and the record was dropped.
+        """
+        self.start()
+        entry = _Entry(record, on_stored)
+        try:
+            self._queue.put_nowait(entry)
+        except asyncio.QueueFull:
+            self.dropped += 1
+            logger.warning(f"Analysis queue full, dropping analysis {record.get('analysis_id')}")
+            return False
+        self._pending += 1
+        self.submitted += 1
+        self._idle.clear()
+        if record.get("analysis_id") is not None:
+            self._entries[record["analysis_id"]] = entry
+        return True
+
+    def is_pending(self, analysis_id: str) -> bool:
+        """Whether this writer still holds the record of analysis_id (queued or being written)."""
+        return analysis_id in self._entries and self._loop is asyncio.get_running_loop()
+
+    async def ensure_written(self, analysis_id: str, timeout: float = None) -> bool:
+        """Wait until the record of analysis_id is stored, writing it on its own if that takes longer than timeout.
+
+        Waits for that record only, not for the whole queue, and by default
+        for two flush intervals. Returns False when the record could not be
+        stored; True also when this writer does not hold it (it was stored
+        before, or was submitted in another worker process).
+        """
+        entry = self._entries.get(analysis_id) if self._loop is asyncio.get_running_loop() else None
+        if entry is None:
+            return True
+        timeout = 2 * self.flush_interval_ms / 1000 if timeout is None else timeout
+        try:
+            await asyncio.wait_for(entry.done.wait(), timeout)
+            return entry.stored
+        except asyncio.TimeoutError:
+            pass
+        if entry.done.is_set():  # written by the batch while this write was being set up
+            return entry.stored
+        result = await self._store([entry.record])
+        if "error" in result:
+            logger.error(f"Writing analysis {analysis_id} ahead of its batch failed: {result['error']}")
+            return False
+        if not entry.done.is_set():
+            self._settle(entry, stored=True)
+        return entry.stored
+
+    async def flush(self, timeout: float = 5.0) -> bool:
+        """Wait until every record submitted so far was written or dropped."""
+        if self._idle is None or self._loop is not asyncio.get_running_loop():
+            return True
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+    async def close(self, timeout: float = 10.0):
+        """Write everything still queued, then stop the worker task."""
+        if not self._worker or self._loop is not asyncio.get_running_loop():
+            return
+        if not await self.flush(timeout):
+            logger.error(f"Analysis writer did not drain within {timeout}s, {self._pending} records pending")
+        self._worker.cancel()
+        try:
+            await self._worker
+        except asyncio.CancelledError:
+            pass
+        self._worker = None
+
+    async def _collect(self) -> list:
+        batch = [await self._queue.get()]
+        deadline = self._loop.time() + self.flush_interval_ms / 1000
+        while len(batch) < self.max_batch_size:
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            timeout = deadline - self._loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        while True:
+            await self._write(await self._collect())
+
+    async def _store(self, records: list[dict]) -> dict:
+        start = time.perf_counter()
+        try:
+            result = await self.store_batch(records)
+        except Exception as e:
+            result = {"error": str(e)}
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        store_analysis_stage.observe(elapsed_ms / 1000)
+        self.flushes += 1
+        self.flush_ms_total += elapsed_ms
+        self.flush_ms_max = max(self.flush_ms_max, elapsed_ms)
+        return result
+
+    async def _write(self, batch: list):
+        # Records already written on their own (ensure_written) are not sent again
+        entries = [entry for entry in batch if not entry.done.is_set()]
+        for attempt in range(self.max_retries + 1):
+            if not entries:
+                break
+            result = await self._store([entry.record for entry in entries])
+            if "error" not in result:
+                for entry in entries:
+                    if not entry.done.is_set():
+                        self._settle(entry, stored=True)
+                break
+            if attempt == self.max_retries:
+                if len(entries) > 1:
+                    logger.error(f"Storing {len(entries)} analyses failed {attempt + 1} times ({result['error']}), "
+                                 f"writing them one by one")
+                    await self._write_one_by_one(entries)
+                else:
+                    logger.error(f"Dropping analysis {entries[0].record.get('analysis_id')} "
+                                 f"after {attempt + 1} attempts: {result['error']}")
+                    self._settle(entries[0], stored=False)
+                break
+            self.retried += 1
+            logger.warning(f"Storing {len(entries)} analyses failed ({result['error']}), retrying")
+            await asyncio.sleep(self.retry_backoff_ms * 2 ** attempt / 1000)
+
+        self._pending -= len(batch)
+        if self._pending == 0:
+            self._idle.set()
+
+    async def _write_one_by_one(self, entries: list):
+        for entry in entries:
+            if entry.done.is_set():
+                continue
+            result = await self._store([entry.record])
+            if "error" in result:
+                logger.error(f"Dropping analysis {entry.record.get('analysis_id')}: {result['error']}")
+            if not entry.done.is_set():
+                self._settle(entry, stored="error" not in result)
+
+    def _settle(self, entry: _Entry, stored: bool):
+        """Mark entry as stored (running its callback) or dropped, and wake whoever waits for it."""
+        entry.stored = stored
+        entry.done.set()
+        self._entries.pop(entry.record.get("analysis_id"), None)
+        if not stored:
+            self.dropped += 1
+            return
+        self.written += 1
+        if entry.on_stored is not None:
+            try:
+                entry.on_stored(entry.record)
+            except Exception as e:
+                logger.error(f"on_stored callback failed for {entry.record.get('analysis_id')}: {e}")
+
+    def stats(self) -> dict:
+        """Return queue depth, throughput, flush latency and retry/drop counts."""
+        return {
+            "queue_depth": self._queue.qsize() if self._queue else 0,
+            "pending": self._pending,
+            "submitted": self.submitted,
+            "written": self.written,
+            "flushes": self.flushes,
+            "retried": self.retried,
+            "dropped": self.dropped,
+            "mean_flush_ms": round(self.flush_ms_total / self.flushes, 2) if self.flushes else 0.0,
+            "max_flush_ms": round(self.flush_ms_max, 2),
+            "max_batch_size": self.max_batch_size,
+            "flush_interval_ms": self.flush_interval_ms,
+        }
+
+analysis_writer = AnalysisWriter()
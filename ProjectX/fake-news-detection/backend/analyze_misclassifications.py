@@ -1,7 +1,6 @@
 import os, sys
 import numpy as np
 import pandas as pd
-import joblib
 import matplotlib.pyplot as plt
 
 from sklearn.model_selection import train_test_split
@@ -12,9 +11,9 @@ from sklearn.metrics import (
 
 # make backend.utils importable
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
-from backend.utils import clean_text
-
-MODEL_PATH = "backend/fake_news_model.pkl"
+from backend.text_normalization import clean_texts
+from backend.model_registry import registry
+from backend.feature_cache import feature_cache
 
 def load_and_prepare_data():
     """Loads and combines ISOT and LIAR datasets."""
@@ -46,7 +45,7 @@ def load_and_prepare_data():
 
     # Combine and clean
     df = pd.concat([df_isot, df_liar], ignore_index=True)
-    df["text"] = df["text"].astype(str).apply(clean_text)
+    df["text"] = clean_texts(df["text"].astype(str), workers=-1)
     df = df[df["text"].str.strip().str.len() > 0].drop_duplicates(subset=["text","label"]).reset_index(drop=True)
     return df
 
@@ -55,15 +54,13 @@ def short(s, n=160):
     s = " ".join(s.split())
     return (s[:n] + "…") if len(s) > n else s
 
-def main():
-    if not os.path.exists(MODEL_PATH):
-        raise FileNotFoundError(f"Missing model at {MODEL_PATH}. Train first.")
-
+def main(version=None):
     print("Loading model...")
-    model = joblib.load(MODEL_PATH)
+    model = registry.load(version)  # raises FileNotFoundError if nothing was trained yet
+    print(f"Model version: {model.version}")
 
     print("Loading & preparing full dataset...")
-    df = load_and_prepare_data()
+    df = feature_cache.corpus("misclassification", load_and_prepare_data).frame
 
     # --- This is the key change: splitting the data for proper evaluation ---
     print("\nSplitting data into training and test sets (20% test)...")
@@ -74,11 +71,7 @@ def main():
     src_test = test_df["source"].values
 
     print("\nScoring on held-out test set...")
-    if hasattr(model, "predict_proba"):
-        proba_fake = model.predict_proba(X_test)[:, 1]
-    else:
-        scores = model.decision_function(X_test)
-        proba_fake = 1/(1+np.exp(-scores))
+    proba_fake = model.predict_fake_proba(list(X_test))
 
     # Default threshold 0.5 for analysis
     y_pred = (proba_fake >= 0.5).astype(int)
@@ -158,4 +151,5 @@ def main():
     print(f"Suggested threshold for FAKE (max F1): {best_thr:.3f} | F1={np.nanmax(f1):.3f}, P={precision[best_idx]:.3f}, R={recall[best_idx]:.3f}")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    # Optionally pass a registry version to evaluate instead of the current one
+    main(sys.argv[1] if len(sys.argv) > 1 else None)
\ No newline at end of file
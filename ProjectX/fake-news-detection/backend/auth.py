@@ -0,0 +1,127 @@
+import time
+import logging
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import NamedTuple
+
+from fastapi import Depends, HTTPException
+from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from jose import jwt, JWTError, ExpiredSignatureError
+
+from backend.database import find_user
+from backend.repository import get_repository, RepositoryError
+from backend.config import settings
+
+logger = logging.getLogger(__name__)
+
+SECRET_KEY = "supersecretkey"
+ALGORITHM = "HS256"
+# Lifetime of the access tokens issued at login and registration
+ACCESS_TOKEN_EXPIRE_MINUTES = settings.get_int("ACCESS_TOKEN_EXPIRE_MINUTES", 30)
+# Verified tokens remembered per worker; entries also expire with their token
+TOKEN_CACHE_SIZE = settings.get_int("TOKEN_CACHE_SIZE", 1024)
+
+def create_access_token(data: dict, expires_delta: timedelta = None):
+    to_encode = data.copy()
+    expire = datetime.now(timezone.utc) + (expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
+    to_encode.update({"exp": expire})
+    return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+
+class Principal(NamedTuple):
+    """The authenticated user behind a request."""
+    user_id: str
+    email: str
+
+class TokenCache:
+    """LRU map of verified access token -> Principal, valid until the token's exp."""
+
+    def __init__(self, max_size: int = TOKEN_CACHE_SIZE):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, token: str):
+        entry = self._entries.get(token)
+        if entry is not None:
+            principal, expires_at = entry
+            if expires_at > time.time():
+                self._entries.move_to_end(token)
+                self.hits += 1
+                return principal
+            del self._entries[token]
+        self.misses += 1
+        return None
+
+    def put(self, token: str, principal: Principal, expires_at: float):
+        self._entries[token] = (principal, expires_at)
+        self._entries.move_to_end(token)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+token_cache = TokenCache()
+bearer_scheme = HTTPBearer(auto_error=False)
+
+def unauthorized(detail: str) -> HTTPException:
+    return HTTPException(status_code=401, detail=detail, headers={"WWW-Authenticate": "Bearer"})
+
+async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(bearer_scheme),
+                           repo=Depends(get_repository)) -> Principal:
+    """FastAPI dependency for authenticated routes.
+
+    A token seen before is answered from token_cache, skipping signature
+    verification and the user lookup. Otherwise the JWT is verified and the
+    user id is taken from its uid claim; tokens issued before that claim
+    existed are resolved by email once and then cached like the rest.
+    """
+    if credentials is None or credentials.scheme.lower() != "bearer" or not credentials.credentials:
+        raise unauthorized("Unauthorized")
+    token = credentials.credentials
+
+    principal = token_cache.get(token)
+    if principal is not None:
+        return principal
+
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except ExpiredSignatureError:
+        raise unauthorized("Token expired")
+    except JWTError as e:
+        logger.warning(f"Rejected access token: {e}")
+        raise unauthorized("Invalid token")
+
+    email = payload.get("sub")
+    # Password reset tokens are signed with the same key but grant nothing else
+    if not email or payload.get("scope") is not None:
+        raise unauthorized("Invalid token payload")
+
+    user_id = payload.get("uid")
+    if user_id is None:
+        try:
+            user = await find_user(repo, email, columns="id")
+        except RepositoryError as e:
+            logger.error(f"User lookup failed: {e}")
+            raise HTTPException(status_code=503, detail="Authentication temporarily unavailable")
+        if not user:
+            raise unauthorized("User not found")
+        user_id = str(user["id"])
+
+    principal = Principal(user_id=user_id, email=email)
+    token_cache.put(token, principal, float(payload.get("exp", 0)))
+    return principal
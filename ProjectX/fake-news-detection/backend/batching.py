@@ -0,0 +1,129 @@
+import asyncio
+import logging
+import functools
+from collections import Counter
+from backend.models import predict_fake_news_batch
+from backend.profiling import current_profile
+from backend.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Flush a batch once it holds this many texts...
+MAX_BATCH_SIZE = settings.get_int("PREDICT_BATCH_MAX_SIZE", 32)
+# ...or once the oldest text has waited this long
+MAX_WAIT_MS = settings.get_float("PREDICT_BATCH_MAX_WAIT_MS", 5)
+
+class PredictionBatcher:
+    """Collect concurrent single-text predictions and score them as one batch.
+
+    Callers await predict(text); a single worker task drains the queue into
+    batches of up to max_batch_size texts (waiting at most max_wait_ms for
+    the batch to fill), runs predict_batch in a worker thread and resolves
+    each caller's future with its own result. close() scores what is
+    still queued before stopping the worker.
+    """
+
+    def __init__(self, predict_batch=predict_fake_news_batch,
+                 max_batch_size: int = MAX_BATCH_SIZE, max_wait_ms: float = MAX_WAIT_MS):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1")
+        self.predict_batch = predict_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self._loop = None
+        self._queue = None
+        self._worker = None
+        self.batch_sizes = Counter()
+
+    def _ensure_started(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is loop and self._worker and not self._worker.done():
+            return
+        self._loop = loop
+        self._queue = asyncio.Queue()
+        self._worker = loop.create_task(self._run())
+
+    async def predict(self, text: str) -> dict:
+        """Queue a text for the next batch and wait for its prediction."""
+        self._ensure_started()
+        future = self._loop.create_future()
+        self._queue.put_nowait((text, future, current_profile()))
+        return await future
+
+    async def _collect(self):
+        batch = [await self._queue.get()]
+        deadline = self._loop.time() + self.max_wait_ms / 1000
+        while len(batch) < self.max_batch_size:
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            timeout = deadline - self._loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        while True:
+            batch = await self._collect()
+            texts = [text for text, _, _ in batch]
+            # A profiled request in the batch gets the batch's scoring in its profile
+            profile = next((profile for _, _, profile in batch if profile is not None), None)
+            call = self.predict_batch if profile is None else functools.partial(profile.run, self.predict_batch)
+            try:
+                results = await self._loop.run_in_executor(None, call, texts)
+            except asyncio.CancelledError:
+                for _, future, _ in batch:
+                    if not future.done():
+                        future.set_exception(RuntimeError("Prediction batcher stopped"))
+                raise
+            except Exception as e:
+                logger.error(f"Batch prediction failed for {len(texts)} texts: {e}")
+                for _, future, _ in batch:
+                    if not future.done():
+                        future.set_exception(e)
+            else:
+                for (_, future, _), result in zip(batch, results):
+                    if not future.done():
+                        future.set_result(result)
+            self.batch_sizes[len(batch)] += 1
+            for _ in batch:
+                self._queue.task_done()
+
+    async def close(self, timeout: float = 5.0):
+        """Score the predictions still queued, then stop the worker; whatever is left after timeout fails."""
+        if self._worker and self._loop is asyncio.get_running_loop():
+            try:
+                await asyncio.wait_for(self._queue.join(), timeout)
+            except asyncio.TimeoutError:
+                logger.error(f"Prediction batcher did not drain within {timeout}s, "
+                             f"{self._queue.qsize()} predictions still queued")
+        if self._worker:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+        while self._queue and not self._queue.empty():
+            _, future, _ = self._queue.get_nowait()
+            if not future.done():
+                future.set_exception(RuntimeError("Prediction batcher stopped"))
+
+    def stats(self) -> dict:
+        """Return the batching knobs and the observed batch-size distribution."""
+        batches = sum(self.batch_sizes.values())
+        items = sum(size * count for size, count in self.batch_sizes.items())
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait_ms,
+            "batches": batches,
+            "items": items,
+            "mean_batch_size": round(items / batches, 2) if batches else 0.0,
+            "batch_size_distribution": dict(sorted(self.batch_sizes.items())),
+        }
+
+prediction_batcher = PredictionBatcher()
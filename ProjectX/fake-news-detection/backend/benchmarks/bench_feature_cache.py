@@ -0,0 +1,71 @@
+"""Grid search over the text pipeline vs over the cached feature matrix.
+
+Runs the same small GridSearchCV three ways on the LIAR statements: the
+TfidfVectorizer pipeline, the cached pipeline with an empty cache (first
+run), and the cached pipeline again (re-run with the cache on disk).
+
+Run from the fake-news-detection directory:
+    python -m backend.benchmarks.bench_feature_cache
+"""
+import argparse
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.linear_model import LogisticRegression
+from sklearn.model_selection import GridSearchCV
+from sklearn.pipeline import Pipeline
+
+from backend.benchmarks.common import LIAR_PATH, load_liar_texts
+from backend.feature_cache import FeatureCache, CachedTfidfVectorizer
+from backend.text_normalization import clean_texts
+
+PARAM_GRID = {
+    "tfidfvectorizer__ngram_range": [(1, 2), (1, 3)],
+    "tfidfvectorizer__max_features": [5000, 20000],
+    "logisticregression__C": [1, 10],
+}
+
+def search(vectorizer, X, y, cv: int) -> tuple[float, float]:
+    pipeline = Pipeline([
+        ("tfidfvectorizer", vectorizer),
+        ("logisticregression", LogisticRegression(max_iter=1000, solver="liblinear")),
+    ])
+    start = time.perf_counter()
+    grid = GridSearchCV(pipeline, PARAM_GRID, cv=cv, scoring="accuracy", refit=False).fit(X, y)
+    return time.perf_counter() - start, grid.best_score_
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--cv", type=int, default=3)
+    args = parser.parse_args()
+
+    texts = load_liar_texts()
+    # Only timing and score parity matter here, so random labels are enough
+    y = np.random.default_rng(42).integers(0, 2, len(texts))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        def build():
+            return pd.DataFrame({"text": clean_texts(texts)})
+
+        rows = {}
+        start = time.perf_counter()
+        frame = build()
+        clean_time = time.perf_counter() - start
+        elapsed, score = search(TfidfVectorizer(analyzer="char_wb"), frame["text"], y, args.cv)
+        rows["text pipeline"] = (clean_time + elapsed, score)
+
+        for label in ("cached, cold", "cached, warm"):
+            start = time.perf_counter()
+            corpus = FeatureCache(tmp).corpus("bench", build, [LIAR_PATH])
+            elapsed, score = search(CachedTfidfVectorizer(corpus), np.arange(len(texts)), y, args.cv)
+            rows[label] = (time.perf_counter() - start, score)
+
+    print(f"{'case':<20}{'seconds':>10}{'best cv score':>16}")
+    for name, (seconds, score) in rows.items():
+        print(f"{name:<20}{seconds:>10.2f}{score:>16.4f}")
+
+if __name__ == "__main__":
+    main()
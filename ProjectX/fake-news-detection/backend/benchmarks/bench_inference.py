@@ -0,0 +1,62 @@
+"""Micro-benchmark: two-pass vs single-pass inference.
+
+Both sides score with the same sklearn pipeline, so the difference is the
+single predict_proba pass alone. When the current model version also has
+an exported linear scorer, single-pass is timed with it too, which shows
+what the scorer adds on top. The prediction cache is not involved.
+
+Run from the fake-news-detection directory:
+    python -m backend.benchmarks.bench_inference
+"""
+import argparse
+import os
+
+import joblib
+
+from backend.benchmarks.common import load_liar_texts, load_article_texts, time_calls, summarize, print_table
+from backend.linear_model import LinearTextScorer
+from backend.model_registry import registry, LoadedModel
+from backend.utils import clean_text
+
+def predict_two_pass(model, text: str):
+    """The previous implementation: predict() and predict_proba() on the same text."""
+    text = clean_text(text)
+    prediction = model.predict([text])[0]
+    confidence = model.predict_proba([text])[0][prediction]
+    return {"prediction": "FAKE" if prediction == 1 else "REAL", "confidence": round(confidence, 4)}
+
+def predict_single_pass(loaded: LoadedModel, text: str):
+    """The current implementation: one P(FAKE) per text, labelled with the tuned threshold."""
+    proba_fake = loaded.predict_fake_proba([clean_text(text)])[0]
+    is_fake = proba_fake >= loaded.threshold
+    confidence = proba_fake if is_fake else 1 - proba_fake
+    return {"prediction": "FAKE" if is_fake else "REAL", "confidence": round(float(confidence), 4)}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--samples", type=int, default=300, help="texts per dataset")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    artifacts = registry.artifacts()
+    model = joblib.load(artifacts.pipeline_path)
+    backends = {"pipeline": LoadedModel(artifacts.version, artifacts.threshold, pipeline=model)}
+    if os.path.isdir(artifacts.linear_path):
+        backends["linear scorer"] = LoadedModel(artifacts.version, artifacts.threshold,
+                                                scorer=LinearTextScorer.load(artifacts.linear_path))
+
+    datasets = {
+        "liar statements": load_liar_texts(["test.tsv"])[:args.samples],
+        "full articles": load_article_texts(limit=args.samples),
+    }
+
+    rows = {}
+    for name, texts in datasets.items():
+        rows[f"{name} / two-pass, pipeline"] = summarize(
+            time_calls(lambda t: predict_two_pass(model, t), texts, args.repeat))
+        for backend, loaded in backends.items():
+            rows[f"{name} / single-pass, {backend}"] = summarize(
+                time_calls(lambda t: predict_single_pass(loaded, t), texts, args.repeat))
+    print_table(rows)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""Micro-benchmark: sklearn pipeline vs exported LinearTextScorer.
+
+Run from the fake-news-detection directory:
+    python -m backend.benchmarks.bench_linear_scorer
+"""
+import argparse
+import os
+import tempfile
+
+import joblib
+import numpy as np
+
+from backend.benchmarks.common import load_liar_texts, load_article_texts, time_calls, summarize, print_table
+from backend.linear_model import LinearTextScorer, export_linear_model
+from backend.model_registry import registry
+from backend.utils import clean_text
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--samples", type=int, default=300, help="texts per dataset")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    model = joblib.load(registry.artifacts().pipeline_path)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "linear")
+        export_linear_model(model, path)
+        scorer = LinearTextScorer.load(path, mmap=False)
+
+    fake_index = list(model.classes_).index(1)
+    datasets = {
+        "liar statements": [clean_text(t) for t in load_liar_texts(["test.tsv"])[:args.samples]],
+        "full articles": [clean_text(t) for t in load_article_texts(limit=args.samples)],
+    }
+
+    rows = {}
+    for name, texts in datasets.items():
+        expected = model.predict_proba(texts)[:, fake_index]
+        max_diff = np.abs(scorer.predict_fake_proba(texts) - expected).max()
+        print(f"{name}: max |P(FAKE) difference| = {max_diff:.2e}")
+
+        rows[f"{name} / pipeline"] = summarize(time_calls(lambda t: model.predict_proba([t]), texts, args.repeat))
+        rows[f"{name} / linear scorer"] = summarize(time_calls(lambda t: scorer.predict_fake_proba([t]), texts, args.repeat))
+        rows[f"{name} / pipeline batch"] = summarize(time_calls(model.predict_proba, [texts], args.repeat))
+        rows[f"{name} / linear scorer batch"] = summarize(time_calls(scorer.predict_fake_proba, [texts], args.repeat))
+    print_table(rows)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""Load test: /predict latency with and without a concurrent login storm.
+
+Drives the app in-process over ASGI against an in-memory database. Every
+predict text is unique, so the prediction cache cannot hide the work.
+Phase one measures /predict alone; phase two measures it again while
+--logins clients keep logging in. With --shared-pool, bcrypt runs on the
+event loop's default executor (the one the micro-batcher scores on), as it
+did before the dedicated hashing pool.
+
+Run from the fake-news-detection directory:
+    python -m backend.benchmarks.bench_login_storm --logins 32
+"""
+import argparse
+import asyncio
+import time
+
+import httpx
+
+import backend.database
+from backend.benchmarks.common import load_liar_texts, summarize, print_table
+from backend.main import app
+from backend.password_hashing import PasswordHasher, BCRYPT_ROUNDS
+from backend.repository import InMemoryRepository, use_repository
+
+EMAIL, PASSWORD = "storm@example.com", "Correct-Horse-9"
+
+class SharedPoolHasher(PasswordHasher):
+    """The previous behaviour: bcrypt on the default executor, no admission control."""
+
+    def _get_executor(self):
+        return None
+
+async def predict_latencies(client, texts, concurrency: int) -> list[float]:
+    latencies, queue = [], list(texts)
+
+    async def worker():
+        while queue:
+            text = queue.pop()
+            start = time.perf_counter()
+            response = await client.post("/predict", json={"text": text})
+            response.raise_for_status()
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies
+
+async def login_storm(client, stop: asyncio.Event, counts: dict):
+    while not stop.is_set():
+        response = await client.post("/auth/login", data={"username": EMAIL, "password": PASSWORD})
+        counts[response.status_code] = counts.get(response.status_code, 0) + 1
+
+async def run(args) -> dict:
+    hasher_class = SharedPoolHasher if args.shared_pool else PasswordHasher
+    backend.database.password_hasher = hasher_class(max_pending=10_000 if args.shared_pool else 32)
+    repo = InMemoryRepository()
+    use_repository(repo)
+    await repo.insert("users", {"name": "Storm", "email": EMAIL,
+                                "password": await PasswordHasher(rounds=BCRYPT_ROUNDS).hash(PASSWORD)})
+
+    texts = [f"{text} ({i})" for i, text in enumerate(load_liar_texts(["test.tsv"])[:2 * args.requests])]
+    transport = httpx.ASGITransport(app=app)
+    rows = {}
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        await predict_latencies(client, texts[:20], args.concurrency)  # warm-up
+        rows["predict alone"] = summarize(await predict_latencies(client, texts[20:args.requests], args.concurrency))
+
+        stop, counts = asyncio.Event(), {}
+        storm = [asyncio.create_task(login_storm(client, stop, counts)) for _ in range(args.logins)]
+        await asyncio.sleep(0.5)  # let the storm saturate the hashing pool
+        rows[f"predict + {args.logins} logins"] = summarize(
+            await predict_latencies(client, texts[args.requests:], args.concurrency))
+        stop.set()
+        await asyncio.gather(*storm)
+    print(f"login responses by status: {dict(sorted(counts.items()))}")
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=300, help="/predict calls per phase")
+    parser.add_argument("--concurrency", type=int, default=4, help="concurrent /predict clients")
+    parser.add_argument("--logins", type=int, default=32, help="concurrent login clients in the storm")
+    parser.add_argument("--shared-pool", action="store_true", help="hash on the default executor (old behaviour)")
+    args = parser.parse_args()
+    print_table(asyncio.run(run(args)))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""Cost of the always-on metrics against the request they instrument.
+
+Times the primitive updates (a histogram observation, a counter increment),
+one request through MetricsMiddleware around a no-op ASGI app, and
+predict_fake_news on LIAR statements with cache misses, which records three
+stage timings per call. The overhead per /predict is roughly one middleware
+pass plus four observations (three stages and the analysis write).
+
+Run from the fake-news-detection directory:
+    python -m backend.benchmarks.bench_metrics
+"""
+import argparse
+import asyncio
+import time
+
+from backend.benchmarks.common import load_liar_texts, time_calls, summarize, print_table
+from backend.metrics import MetricsRegistry, MetricsMiddleware
+from backend.models import predict_fake_news, prediction_cache
+
+def per_call_us(fn, calls: int) -> float:
+    start = time.perf_counter()
+    for _ in range(calls):
+        fn()
+    return (time.perf_counter() - start) / calls * 1e6
+
+def asgi_request_us(app, calls: int) -> float:
+    scope = {"type": "http", "method": "POST", "path": "/predict"}
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        pass
+
+    async def drive():
+        start = time.perf_counter()
+        for _ in range(calls):
+            await app(scope, receive, send)
+        return (time.perf_counter() - start) / calls * 1e6
+    return asyncio.run(drive())
+
+async def noop_app(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"{}"})
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--calls", type=int, default=200_000, help="calls per primitive")
+    parser.add_argument("--samples", type=int, default=1000, help="statements to predict")
+    args = parser.parse_args()
+
+    registry = MetricsRegistry()
+    stage = registry.histogram("bench_stage_seconds", "Bench.", ("stage",)).labels("score")
+    counter = registry.counter("bench_total", "Bench.", ("route",))
+    costs = {
+        "histogram observe": per_call_us(lambda: stage.observe(0.003), args.calls),
+        "counter labels().inc": per_call_us(lambda: counter.labels("/predict").inc(), args.calls),
+        "ASGI request, no middleware": asgi_request_us(noop_app, args.calls // 10),
+        "ASGI request, MetricsMiddleware": asgi_request_us(MetricsMiddleware(noop_app), args.calls // 10),
+    }
+    for name, us in costs.items():
+        print(f"{name:<34}{us:>8.2f} us")
+    middleware_us = costs["ASGI request, MetricsMiddleware"] - costs["ASGI request, no middleware"]
+
+    texts = load_liar_texts(["test.tsv"])[:args.samples]
+    predict_fake_news(texts[0])  # load the model
+    prediction_cache.max_bytes = 0  # every call is scored, as on a cache miss
+    latencies = time_calls(predict_fake_news, texts)
+    print_table({"predict_fake_news": summarize(latencies)})
+
+    overhead_us = middleware_us + 4 * costs["histogram observe"]
+    p50_us = summarize(latencies)["p50_ms"] * 1000
+    print(f"\nmetrics per /predict ~{overhead_us:.1f} us = {overhead_us / p50_us:.2%} of the p50 prediction")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Insert and query latency of the near-duplicate index as it grows.
+
+Fills a fresh on-disk NearDuplicateIndex with synthetic articles (pairs of
+LIAR statements) through assign_many, the path ingestion uses, and after
+each checkpoint times single-article inserts of new stories and queries
+for lightly edited copies of stored ones.
+
+Run from the fake-news-detection directory:
+    python -m backend.benchmarks.bench_near_duplicates --articles 1000000
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from backend.benchmarks.common import load_liar_texts, time_calls, summarize, print_table
+from backend.near_duplicates import NearDuplicateIndex, NEAR_DUP_THRESHOLD
+
+def synthetic_articles(statements: list[str], count: int, rng) -> list[str]:
+    pairs = rng.integers(len(statements), size=(count, 2))
+    return [f"{statements[a]} {statements[b]}" for a, b in pairs]
+
+def edit(text: str) -> str:
+    """A syndicated copy: same story with a couple of words changed."""
+    words = text.split()
+    words[len(words) // 2] = "reportedly"
+    return " ".join(words) + " (updated)"
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--articles", type=int, default=1_000_000)
+    parser.add_argument("--checkpoints", type=int, nargs="*", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--samples", type=int, default=500)
+    parser.add_argument("--chunk", type=int, default=10_000, help="articles per assign_many transaction")
+    parser.add_argument("--threshold", type=float, default=NEAR_DUP_THRESHOLD)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    statements = load_liar_texts()
+    checkpoints = sorted(c for c in args.checkpoints if c <= args.articles)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "index.sqlite")
+        index = NearDuplicateIndex(path, threshold=args.threshold)
+        print(f"bands={index.bands} rows={index.rows} threshold={index.threshold}")
+        stored, rows, fill_seconds = [], {}, 0.0
+        for checkpoint in checkpoints:
+            while len(index) < checkpoint:
+                count = min(args.chunk, checkpoint - len(index))
+                texts = synthetic_articles(statements, count, rng)
+                start = time.perf_counter()
+                index.assign_many([(f"bench/{len(index) + i}", text) for i, text in enumerate(texts)])
+                fill_seconds += time.perf_counter() - start
+                stored.extend(texts[:5])  # a sample of stored stories to query copies of
+
+            size_mb = os.path.getsize(path) / 2**20
+            print(f"{checkpoint:>9} articles  fill {checkpoint / fill_seconds:,.0f} articles/s  file {size_mb:,.0f} MB")
+
+            new = synthetic_articles(statements, args.samples, rng)
+            links = iter(range(len(new)))
+            inserts = time_calls(lambda text: index.assign(f"new/{checkpoint}/{next(links)}", text), new)
+            copies = [edit(stored[i]) for i in rng.integers(len(stored), size=args.samples)]
+            found = []
+            queries = time_calls(lambda text: found.append(index.query(text) is not None), copies)
+            rows[f"insert @ {checkpoint:,}"] = summarize(inserts)
+            rows[f"query @ {checkpoint:,}"] = summarize(queries)
+            print(f"{'':>9} edited copies found: {np.mean(found):.1%}")
+        index.close()
+
+    print_table(rows)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""/news page latency: OFFSET pagination vs keyset (published_at, id) at depth.
+
+Builds a SQLite news table with an index on (published_at DESC, id DESC),
+the shape migration 005 creates in Postgres, and times fetching a page
+at increasing depths the old way (ORDER BY ... LIMIT n OFFSET k) and by
+keyset (WHERE (published_at, id) < cursor), plus a page served from the
+in-process NewsPageCache.
+
+Run from the fake-news-detection directory:
+    python -m backend.benchmarks.bench_news_pagination --rows 1000000
+"""
+import argparse
+import os
+import sqlite3
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+from backend.benchmarks.common import time_calls, summarize, print_table
+from backend.news_cache import NewsPageCache
+
+COLUMNS = "id, title, link, description, published_at, canonical_link"
+
+def build(path: str, rows: int):
+    db = sqlite3.connect(path)
+    db.executescript("""
+        CREATE TABLE news (
+            id INTEGER PRIMARY KEY, title TEXT NOT NULL, link TEXT NOT NULL UNIQUE,
+            description TEXT, published_at TEXT NOT NULL, canonical_link TEXT
+        );
+    """)
+    start = datetime(2020, 1, 1, tzinfo=timezone.utc)
+    # Several items share a publication second, so the id tie-breaker matters
+    db.executemany("INSERT INTO news VALUES (?, ?, ?, ?, ?, NULL)", (
+        (i, f"Story {i}", f"https://news.example/{i}", "Lorem ipsum dolor sit amet " * 8,
+         (start + timedelta(seconds=i // 3)).isoformat()) for i in range(1, rows + 1)))
+    db.execute("CREATE INDEX news_published_at_id_idx ON news (published_at DESC, id DESC)")
+    db.commit()
+    return db
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--page-size", type=int, default=10)
+    parser.add_argument("--samples", type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        start = time.perf_counter()
+        db = build(os.path.join(tmp, "news.sqlite"), args.rows)
+        print(f"built {args.rows:,} rows in {time.perf_counter() - start:.1f}s")
+        limit = args.page_size
+
+        def offset_page(offset):
+            return db.execute(f"SELECT {COLUMNS} FROM news ORDER BY published_at DESC, id DESC LIMIT ? OFFSET ?",
+                              (limit, offset)).fetchall()
+
+        def keyset_page(cursor):
+            return db.execute(f"SELECT {COLUMNS} FROM news WHERE (published_at, id) < (?, ?) "
+                              f"ORDER BY published_at DESC, id DESC LIMIT ?", (*cursor, limit)).fetchall()
+
+        results = {}
+        for depth in (0, 1_000, 10_000, 50_000, args.rows // limit - 1):
+            offset = depth * limit
+            if offset >= args.rows:
+                continue
+            # The cursor a client holds after reading page depth - 1: the last row before the page
+            before = offset_page(offset - 1)[0] if offset else None
+            cursor = (before[4], before[0]) if before else ("9999", 0)
+            assert offset_page(offset) == keyset_page(cursor)
+            results[f"offset, page {depth:,}"] = summarize(time_calls(offset_page, [offset] * args.samples))
+            results[f"keyset, page {depth:,}"] = summarize(time_calls(keyset_page, [cursor] * args.samples))
+
+        cache = NewsPageCache(ttl=60)
+        cache.set((limit, None), {"news": offset_page(0), "next_cursor": None})
+        results["cached page"] = summarize(time_calls(cache.get, [(limit, None)] * args.samples * 20))
+        db.close()
+
+    print_table(results)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""Per-worker memory: unpickled sklearn pipeline vs memory-mapped linear model.
+
+Starts N worker processes that each load the model the way a uvicorn worker
+would, score a few texts, and report their RSS and PSS (Linux only). PSS
+splits shared pages between the processes mapping them, so it shows what
+each worker really costs once the arrays are shared through the page cache.
+
+Run from the fake-news-detection directory:
+    python -m backend.benchmarks.bench_worker_memory --workers 4
+"""
+import argparse
+import multiprocessing as mp
+import os
+import tempfile
+
+def read_memory_kb() -> dict:
+    """Return RSS and PSS of the current process in kB."""
+    memory = {}
+    with open("/proc/self/smaps_rollup") as f:
+        for line in f:
+            key, _, value = line.partition(":")
+            if key in ("Rss", "Pss"):
+                memory[key.lower()] = int(value.split()[0])
+    return memory
+
+def worker(mode: str, path: str, texts: list[str], barrier, results):
+    start = read_memory_kb()
+    # Libraries the loader needs: unpickling the pipeline pulls in sklearn and scipy
+    import joblib
+    from backend.linear_model import LinearTextScorer
+    if mode == "pipeline":
+        import sklearn.pipeline, sklearn.feature_extraction.text, sklearn.linear_model  # noqa: F401, E401
+
+    imported = read_memory_kb()
+    model = joblib.load(path) if mode == "pipeline" else LinearTextScorer.load(path)
+    # Measure while every worker is alive so shared pages are split between them
+    barrier.wait()
+    loaded = read_memory_kb()
+    if mode == "pipeline":
+        model.predict_proba(texts)
+    else:
+        model.predict_fake_proba(texts)
+    barrier.wait()
+    scored = read_memory_kb()
+    barrier.wait()
+    results.put({
+        "mode": mode,
+        "rss_kb": scored["rss"] - start["rss"],
+        "pss_kb": scored["pss"] - start["pss"],
+        "model_pss_kb": loaded["pss"] - imported["pss"],
+    })
+
+def measure(mode: str, path: str, workers: int, texts: list[str]) -> list[dict]:
+    ctx = mp.get_context("spawn")
+    barrier = ctx.Barrier(workers)
+    results = ctx.Queue()
+    procs = [ctx.Process(target=worker, args=(mode, path, texts, barrier, results)) for _ in range(workers)]
+    for p in procs:
+        p.start()
+    samples = [results.get() for _ in procs]
+    for p in procs:
+        p.join()
+    return samples
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    import joblib
+    from backend.benchmarks.common import load_liar_texts
+    from backend.linear_model import export_linear_model
+    from backend.model_registry import registry
+    from backend.utils import clean_text
+
+    texts = [clean_text(t) for t in load_liar_texts(["test.tsv"])[:200]]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        artifacts = registry.artifacts()
+        linear_path = artifacts.linear_path
+        if not os.path.isdir(linear_path):
+            linear_path = os.path.join(tmp, "linear")
+            export_linear_model(joblib.load(artifacts.pipeline_path), linear_path)
+
+        print("Memory per worker in MiB: RSS/PSS after loading and scoring, including the")
+        print("libraries the loader imports; 'PSS model' is the loaded model alone")
+        print(f"{'mode':<12}{'worker':>8}{'RSS':>10}{'PSS':>10}{'PSS model':>12}")
+        for mode, path in (("pipeline", artifacts.pipeline_path), ("mmap", linear_path)):
+            samples = measure(mode, path, args.workers, texts)
+            for i, s in enumerate(samples):
+                print(f"{mode:<12}{i:>8}{s['rss_kb'] / 1024:>10.1f}{s['pss_kb'] / 1024:>10.1f}{s['model_pss_kb'] / 1024:>12.1f}")
+            total_pss = sum(s["pss_kb"] for s in samples) / 1024
+            total_model = sum(s["model_pss_kb"] for s in samples) / 1024
+            print(f"{mode:<12}{'total':>8}{'':>10}{total_pss:>10.1f}{total_model:>12.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+import os
+import sys
+import json
+import time
+import platform
+import subprocess
+from datetime import datetime, timezone
+import numpy as np
+import pandas as pd
+
+LIAR_PATH = "dataset/liar"
+LIAR_COLUMNS = [
+    'id', 'label', 'statement', 'subjects', 'speaker', 'speaker_job_title',
+    'state_info', 'party_affiliation', 'barely_true_counts', 'false_counts',
+    'half_true_counts', 'mostly_true_counts', 'pants_on_fire_counts', 'context'
+]
+
+def load_liar_texts(splits=("train.tsv", "test.tsv", "valid.tsv")) -> list[str]:
+    """Load the raw LIAR statements from the given splits."""
+    frames = [
+        pd.read_csv(os.path.join(LIAR_PATH, name), sep="\t", header=None, names=LIAR_COLUMNS)
+        for name in splits
+    ]
+    df = pd.concat(frames, ignore_index=True).dropna(subset=["statement"])
+    return df["statement"].astype(str).tolist()
+
+def load_article_texts(limit: int = 500, seed: int = 42) -> list[str]:
+    """Load full-length articles from the ISOT CSVs when they are available.
+
+    ISOT is not checked into the repo, so fall back to stitching LIAR
+    statements together into texts with ISOT-like lengths (~2,500 chars).
+    """
+    isot_files = ["dataset/fake.csv", "dataset/true.csv"]
+    if all(os.path.exists(path) for path in isot_files):
+        df = pd.concat([pd.read_csv(path) for path in isot_files], ignore_index=True)
+        texts = df["text"].dropna().astype(str)
+        return texts.sample(n=min(limit, len(texts)), random_state=seed).tolist()
+
+    rng = np.random.default_rng(seed)
+    statements = load_liar_texts()
+    articles = []
+    for _ in range(limit):
+        target = int(rng.lognormal(mean=np.log(2500), sigma=0.5))
+        parts, length = [], 0
+        while length < target:
+            part = statements[rng.integers(len(statements))]
+            parts.append(part)
+            length += len(part) + 1
+        articles.append(" ".join(parts))
+    return articles
+
+def time_calls(fn, inputs, repeat: int = 1) -> np.ndarray:
+    """Call fn once per input and return the per-call latencies in milliseconds."""
+    latencies = []
+    for _ in range(repeat):
+        for item in inputs:
+            start = time.perf_counter()
+            fn(item)
+            latencies.append((time.perf_counter() - start) * 1000)
+    return np.asarray(latencies)
+
+def summarize(latencies, seconds: float = None) -> dict:
+    """Return count, mean and p50/p95/p99 of latencies in milliseconds.
+
+    With seconds, the wall-clock time the calls took, also the throughput in calls per second.
+    """
+    latencies = np.asarray(latencies)
+    summary = {
+        "count": int(latencies.size),
+        "mean_ms": round(float(latencies.mean()), 3),
+        "p50_ms": round(float(np.percentile(latencies, 50)), 3),
+        "p95_ms": round(float(np.percentile(latencies, 95)), 3),
+        "p99_ms": round(float(np.percentile(latencies, 99)), 3),
+    }
+    if seconds is not None:
+        summary["throughput_per_s"] = round(latencies.size / seconds, 2) if seconds > 0 else 0.0
+    return summary
+
+def print_table(rows: dict):
+    """Print a {name: summary} mapping as an aligned table (with a req/s column when summaries have throughput)."""
+    throughput = any("throughput_per_s" in s for s in rows.values())
+    print(f"{'case':<32}{'n':>7}{'mean':>10}{'p50':>10}{'p95':>10}{'p99':>10}" + (f"{'req/s':>10}" if throughput else ""))
+    for name, s in rows.items():
+        line = f"{name:<32}{s['count']:>7}{s['mean_ms']:>10.3f}{s['p50_ms']:>10.3f}{s['p95_ms']:>10.3f}{s['p99_ms']:>10.3f}"
+        if throughput:
+            line += f"{s.get('throughput_per_s', float('nan')):>10.1f}"
+        print(line)
+
+def run_info() -> dict:
+    """The commit and environment a benchmark ran on, stored next to its results."""
+    def git(*args):
+        try:
+            return subprocess.run(["git", *args], capture_output=True, text=True, check=True).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+    return {
+        "commit": git("rev-parse", "--short", "HEAD"),
+        "dirty": bool(git("status", "--porcelain", "--untracked-files=no")),
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+    }
+
+def save_results(path: str, results: dict):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(results, f, indent=2)
+
+def compare_results(old: dict, new: dict, threshold: float = 0.10) -> list[str]:
+    """Print every case both result files have, old -> new, and return the cases that regressed.
+
+    A case regressed when its p95 grew or its throughput fell by more than threshold.
+    """
+    print(f"{old['run'].get('commit')} -> {new['run'].get('commit')}")
+    print(f"{'case (new value, change)':<40}{'p50 ms':>18}{'p95 ms':>18}{'p99 ms':>18}{'req/s':>18}")
+    regressions = []
+    for section in ("micro", "load"):
+        for name, after in new.get(section, {}).items():
+            before = old.get(section, {}).get(name)
+            if before is None:
+                continue
+            cells = []
+            for key in ("p50_ms", "p95_ms", "p99_ms", "throughput_per_s"):
+                if key in before and key in after and before[key]:
+                    change = after[key] / before[key] - 1
+                    cells.append(f"{after[key]:.2f} ({change:+.0%})")
+                else:
+                    cells.append("-")
+            print(f"{section + ' / ' + name:<40}" + "".join(f"{cell:>18}" for cell in cells))
+            slower = before.get("p95_ms") and after["p95_ms"] > before["p95_ms"] * (1 + threshold)
+            fewer = before.get("throughput_per_s") and \
+                after.get("throughput_per_s", 0) < before["throughput_per_s"] * (1 - threshold)
+            if slower or fewer:
+                regressions.append(f"{section} / {name}")
+    return regressions
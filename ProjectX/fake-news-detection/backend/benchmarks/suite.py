@@ -0,0 +1,222 @@
+"""Benchmark suite: micro-benchmarks plus a concurrent load test of the API, saved as JSON.
+
+Micro-benchmarks time clean_text, single and batch inference (with the
+prediction cache off, so every call is scored) and access token decoding.
+The load test runs the app in-process over ASGI, with its lifespan, against
+an InMemoryRepository seeded with LIAR statements as news and a set of
+users, and drives /predict, /news, /auth/login and /feedback at the same
+time for --duration seconds. Each endpoint has its own clients, which send
+requests back to back; every /predict text is unique.
+
+Every case reports count, mean, p50/p95/p99 and throughput. The results,
+with the commit and machine they were measured on, go to
+models/benchmarks/<commit>.json; pass --baseline an older file to compare
+against it, or --compare two files without running anything. Both exit with
+status 1 when a case's p95 grew or its throughput fell by more than
+--threshold. Inputs and client behaviour are seeded, so two runs on the same
+machine send the same requests; compare results from one machine only.
+
+Run from the fake-news-detection directory:
+    python -m backend.benchmarks.suite --duration 30
+    python -m backend.benchmarks.suite --compare models/benchmarks/abc1234.json models/benchmarks/def5678.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+import httpx
+from jose import jwt
+
+from backend.auth import SECRET_KEY, ALGORITHM, create_access_token
+from backend.benchmarks.common import (load_liar_texts, load_article_texts, time_calls, summarize, print_table,
+                                       run_info, save_results, compare_results)
+from backend.cron_job import feed_scheduler
+from backend.main import app
+from backend.models import predict_fake_news, predict_fake_news_batch, prediction_cache, model_manager
+from backend.news_classifier import news_classifier
+from backend.password_hashing import password_hasher
+from backend.repository import InMemoryRepository, use_repository
+from backend.utils import clean_text
+
+RESULTS_DIR = "models/benchmarks"
+PASSWORD = "Correct-Horse-9"
+
+def micro_benchmarks(args, statements: list[str]) -> dict:
+    articles = load_article_texts(limit=args.samples, seed=args.seed)
+    texts = statements[:args.samples]
+    batches = [texts[i:i + args.batch_size] for i in range(0, len(texts), args.batch_size)]
+    token = create_access_token({"sub": "bench@example.com", "uid": "1"})
+
+    def timed(fn, inputs, repeat=1):
+        latencies = time_calls(fn, inputs, repeat)
+        return summarize(latencies, latencies.sum() / 1000)
+
+    predict_fake_news(texts[0])  # load and warm up the model
+    max_bytes, prediction_cache.max_bytes = prediction_cache.max_bytes, 0  # every call is scored, as on a miss
+    try:
+        return {
+            "clean_text / statement": timed(clean_text, texts, args.repeat),
+            "clean_text / article": timed(clean_text, articles, args.repeat),
+            "predict / statement": timed(predict_fake_news, texts, args.repeat),
+            "predict / article": timed(predict_fake_news, articles),
+            f"predict_batch / {args.batch_size} statements": timed(predict_fake_news_batch, batches, args.repeat),
+            "jwt decode": timed(lambda t: jwt.decode(t, SECRET_KEY, algorithms=[ALGORITHM]),
+                                [token] * len(texts), args.repeat),
+        }
+    finally:
+        prediction_cache.max_bytes = max_bytes
+
+async def seed(repo: InMemoryRepository, statements: list[str], args) -> list[str]:
+    """Fill repo with news and users (all with PASSWORD) and return the user emails."""
+    newest = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    for i, statement in enumerate(statements[:args.news]):
+        await repo.insert("news", {"title": statement[:120], "link": f"https://news.example/{i}",
+                                   "description": statement, "canonical_link": None,
+                                   "published_at": (newest - timedelta(minutes=i)).isoformat()})
+    hashed = await password_hasher.hash(PASSWORD)  # one bcrypt hash, shared: seeding stays fast
+    emails = [f"user{i}@example.com" for i in range(args.users)]
+    for i, email in enumerate(emails):
+        await repo.insert("users", {"name": f"User {i}", "email": email, "password": hashed})
+    return emails
+
+async def run_clients(count: int, request, deadline: float, results: dict, seed: int):
+    """Run count clients sending request(rng) back to back until deadline; time each response."""
+    async def client(rng):
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            response = await request(rng)
+            results["latencies"].append((time.perf_counter() - start) * 1000)
+            if response.status_code >= 400:
+                results["errors"][response.status_code] = results["errors"].get(response.status_code, 0) + 1
+
+    await asyncio.gather(*(client(random.Random(seed + i)) for i in range(count)))
+
+async def load_test(args, statements: list[str]) -> dict:
+    feed_scheduler.enabled = False
+    news_classifier.enabled = False
+    repo = InMemoryRepository()
+    previous = use_repository(repo)
+    emails = await seed(repo, statements, args)
+    texts = iter(f"{statements[i % len(statements)]} ({i})" for i in range(sys.maxsize))
+
+    try:
+        async with app.router.lifespan_context(app):
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+                session = await client.post("/auth/login", data={"username": emails[0], "password": PASSWORD})
+                session.raise_for_status()
+                auth = {"Authorization": f"Bearer {session.json()['access_token']}"}
+                analysis_ids = []
+                for _ in range(args.analyses):
+                    response = await client.post("/predict", json={"text": next(texts)})
+                    response.raise_for_status()
+                    analysis_ids.append(response.json()["predictionId"])
+
+                def predict(rng):
+                    return client.post("/predict", json={"text": next(texts)})
+
+                cursors = {}
+
+                async def news(rng):
+                    # Each client pages through the news from the newest, then starts over
+                    response = await client.get("/news", params={"limit": 10, "cursor": cursors.get(id(rng))})
+                    if response.status_code == 200:
+                        cursors[id(rng)] = response.json()["next_cursor"]
+                    return response
+
+                def login(rng):
+                    return client.post("/auth/login", data={"username": rng.choice(emails), "password": PASSWORD})
+
+                def feedback(rng):
+                    return client.post("/feedback", headers=auth,
+                                       json={"analysis_id": rng.choice(analysis_ids), "rating": rng.randint(1, 5)})
+
+                scenarios = {"/predict": (predict, args.predict_clients), "/news": (news, args.news_clients),
+                             "/auth/login": (login, args.login_clients), "/feedback": (feedback, args.feedback_clients)}
+                results = {name: {"latencies": [], "errors": {}} for name in scenarios}
+                start = time.perf_counter()
+                deadline = start + args.duration
+                await asyncio.gather(*(
+                    run_clients(count, request, deadline, results[name], args.seed + 1000 * i)
+                    for i, (name, (request, count)) in enumerate(scenarios.items()) if count > 0))
+                elapsed = time.perf_counter() - start
+    finally:
+        use_repository(previous)
+
+    summaries = {}
+    for name, result in results.items():
+        if result["latencies"]:
+            summaries[name] = summarize(result["latencies"], elapsed)
+            summaries[name]["errors"] = sum(result["errors"].values())
+            if result["errors"]:
+                print(f"{name}: error responses by status {dict(sorted(result['errors'].items()))}")
+    all_latencies = [latency for result in results.values() for latency in result["latencies"]]
+    errors = sum(summary["errors"] for summary in summaries.values())
+    summaries["all endpoints"] = {**summarize(all_latencies, elapsed), "errors": errors}
+    return summaries
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--only", choices=("micro", "load"), help="run one part of the suite")
+    parser.add_argument("--samples", type=int, default=500, help="texts per micro-benchmark")
+    parser.add_argument("--repeat", type=int, default=3, help="passes over the texts of the cheaper micro-benchmarks")
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=30, help="seconds of load")
+    parser.add_argument("--predict-clients", type=int, default=8)
+    parser.add_argument("--news-clients", type=int, default=4)
+    parser.add_argument("--login-clients", type=int, default=2)
+    parser.add_argument("--feedback-clients", type=int, default=2)
+    parser.add_argument("--news", type=int, default=1000, help="news rows to seed")
+    parser.add_argument("--users", type=int, default=100, help="users to seed")
+    parser.add_argument("--analyses", type=int, default=50, help="predictions made up front for /feedback to rate")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help=f"results file (default: {RESULTS_DIR}/<commit>.json)")
+    parser.add_argument("--baseline", help="compare the results with this earlier results file")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="only compare two results files")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="relative p95 growth or throughput drop reported as a regression")
+    args = parser.parse_args()
+    # A log line per request would be timed along with it
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+    if args.compare:
+        with open(args.compare[0]) as old, open(args.compare[1]) as new:
+            regressions = compare_results(json.load(old), json.load(new), args.threshold)
+        sys.exit(report(regressions))
+
+    statements = load_liar_texts(["test.tsv", "valid.tsv"])
+    random.Random(args.seed).shuffle(statements)
+    info = run_info()
+    results = {"run": {**info, "args": {k: v for k, v in vars(args).items()
+                                         if k not in ("output", "baseline", "compare")}}}
+    if args.only != "load":
+        results["micro"] = micro_benchmarks(args, statements)
+        print_table(results["micro"])
+        print()
+    if args.only != "micro":
+        results["load"] = asyncio.run(load_test(args, statements))
+        print_table(results["load"])
+    results["run"]["model_version"] = model_manager.current.version
+
+    name = f"{info['commit'] or 'results'}{'-dirty' if info['dirty'] else ''}.json"
+    path = args.output or os.path.join(RESULTS_DIR, name)
+    save_results(path, results)
+    print(f"\nsaved {path}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            print()
+            sys.exit(report(compare_results(json.load(f), results, args.threshold)))
+
+def report(regressions: list[str]) -> int:
+    for name in regressions:
+        print(f"regression: {name}")
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    main()
@@ -1,37 +1,84 @@
 import os
 import json
 import logging
-from typing import List
-from dotenv import load_dotenv
+from dotenv import dotenv_values
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Load environment variables
-load_dotenv()
-
-class Config:
-    def __init__(self, config_file: str = "config.json"):
-        # Load configuration from file
-        with open(config_file, "r") as f:
-            config = json.load(f)
-
-        # Supabase credentials
-        self.SUPABASE_URL: str = config["supabase"]["url"]
-        self.SUPABASE_KEY: str = config["supabase"]["key"]
-        if not self.SUPABASE_URL or not self.SUPABASE_KEY:
-            raise ValueError("Supabase URL and Key must be set in the config file.")
-
-        # RSS Feed Sources
-        self.RSS_FEEDS: List[str] = config["rss_feeds"]
-        if not self.RSS_FEEDS or not self.RSS_FEEDS[0]:
-            raise ValueError("At least one RSS feed must be set in the config file.")
-
-        # Model Path
-        self.MODEL_PATH: str = config["model_path"]
-        if not os.path.exists(self.MODEL_PATH):
-            raise FileNotFoundError(f"Model file not found at {self.MODEL_PATH}")
-
-# Instantiate the configuration
-config = Config()
\ No newline at end of file
+CONFIG_FILE = "config.json"
+ENV_FILE = ".env"
+DEFAULT_MODEL_REGISTRY = "models/registry"
+
+class Settings:
+    """Process-wide configuration, read once and shared by every module.
+
+    A value comes from the environment, else from .env, else (for the
+    Supabase credentials, RSS feeds and model registry) from config.json.
+    Both files are read on first use and a missing one counts as empty, so
+    importing a module never fails on configuration; required values are
+    checked where they are used (e.g. the Supabase client checks its
+    credentials when it is opened). .env is not copied into os.environ.
+    """
+
+    def __init__(self, config_file: str = CONFIG_FILE, env_file: str = ENV_FILE):
+        self.config_file = config_file
+        self.env_file = env_file
+        self._dotenv = None
+        self._file = None
+
+    @property
+    def dotenv(self) -> dict:
+        if self._dotenv is None:
+            exists = self.env_file and os.path.exists(self.env_file)
+            self._dotenv = dict(dotenv_values(self.env_file)) if exists else {}
+        return self._dotenv
+
+    @property
+    def file(self) -> dict:
+        if self._file is None:
+            self._file = {}
+            if self.config_file and os.path.exists(self.config_file):
+                with open(self.config_file, "r") as f:
+                    self._file = json.load(f)
+        return self._file
+
+    def get(self, name: str, default: str = None) -> str:
+        value = os.environ.get(name)
+        if value is None:
+            value = self.dotenv.get(name)
+        return default if value is None else value
+
+    def get_int(self, name: str, default: int) -> int:
+        return int(self.get(name, default))
+
+    def get_float(self, name: str, default: float) -> float:
+        return float(self.get(name, default))
+
+    def get_bool(self, name: str, default: bool) -> bool:
+        return str(self.get(name, default)).lower() in ("1", "true", "yes")
+
+    @property
+    def supabase_url(self) -> str:
+        return self.get("SUPABASE_URL") or self.file.get("supabase", {}).get("url")
+
+    @property
+    def supabase_key(self) -> str:
+        return self.get("SUPABASE_KEY") or self.file.get("supabase", {}).get("key")
+
+    @property
+    def rss_feeds(self) -> list[str]:
+        """The rss_feeds of config.json (RSS_FEEDS, comma separated, overrides them), stripped and de-duplicated."""
+        env_feeds = self.get("RSS_FEEDS")
+        feeds = env_feeds.split(",") if env_feeds else self.file.get("rss_feeds", [])
+        return list(dict.fromkeys(url.strip() for url in feeds if url and url.strip()))
+
+    @property
+    def model_registry(self) -> str:
+        """Directory of the versioned model artifacts (see backend/model_registry.py)."""
+        return self.get("MODEL_REGISTRY_DIR") or self.file.get("model_registry", DEFAULT_MODEL_REGISTRY)
+
+settings = Settings()
+
+def configure_logging():
+    """Set up root logging for the API and the command-line scripts; importing a module leaves logging alone."""
+    logging.basicConfig(level=settings.get("LOG_LEVEL", "INFO").upper())
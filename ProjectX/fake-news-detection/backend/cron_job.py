@@ -1,53 +1,202 @@
+import os
 import time
-import threading
+import random
+import asyncio
 import logging
-import datetime
-import atexit
-import os
-from dotenv import load_dotenv
-from backend.rss_scraper import fetch_rss_news
+from datetime import datetime, timezone
+from backend.ingestion import feed_ingestor, load_feed_urls
+from backend.repository import get_repository
+from backend.process_lock import ProcessLock
+from backend.config import settings
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Load environment variables
-load_dotenv()
+# Starting poll interval per feed in seconds (default: 600); it then adapts within the bounds below
+FETCH_INTERVAL = settings.get_float("FETCH_INTERVAL", 600)
+RSS_MIN_INTERVAL = settings.get_float("RSS_MIN_INTERVAL", 120)
+RSS_MAX_INTERVAL = settings.get_float("RSS_MAX_INTERVAL", 3600)
+# Each delay is stretched or shrunk by up to this fraction so feeds do not poll in lockstep
+RSS_JITTER = settings.get_float("RSS_JITTER", 0.1)
+# Seconds after startup before the first polls, which are spread over one interval
+RSS_INITIAL_DELAY = settings.get_float("RSS_INITIAL_DELAY", 5)
+# Consecutive failures after which a feed makes the scheduler report "degraded"
+RSS_UNHEALTHY_FAILURES = settings.get_int("RSS_UNHEALTHY_FAILURES", 3)
+# Held by the one worker process that polls; the others retry it every min_interval to take over
+RSS_SCHEDULER_LOCK = settings.get("RSS_SCHEDULER_LOCK", "models/rss_scheduler.lock")
+RSS_SCHEDULER_ENABLED = settings.get_bool("RSS_SCHEDULER_ENABLED", True)
+
+def _isoformat(timestamp: float):
+    return datetime.fromtimestamp(timestamp, timezone.utc).isoformat() if timestamp else None
+
+class FeedSchedule:
+    """Polling state of one feed (times are time.monotonic() unless named *_at)."""
+
+    def __init__(self, url: str, interval: float, next_run: float):
+        self.url = url
+        self.interval = interval
+        self.next_run = next_run
+        self.polls = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.last_new_entries = 0
+        self.last_error = None
+        self.last_polled_at = None
+        self.last_success_at = None
+
+class FeedScheduler:
+    """Poll every feed on its own adaptive schedule, on the event loop.
+
+    Each feed starts at initial_interval. A poll that finds new entries
+    halves the interval (down to min_interval); one that finds nothing new,
+    or gets a 304, stretches it by half (up to max_interval), so busy feeds
+    are polled often and quiet ones rarely. A failed poll keeps the interval
+    but backs off exponentially with the number of consecutive failures.
+    Every delay gets +/- jitter. Feeds that fall due together are fetched
+    in one FeedIngestor cycle, so they share its connection limits and
+    bulk insert.
+
+    Every worker process starts the polling task, but only the one holding
+    lock polls, so each feed is fetched once per interval and one process
+    writes the feed state and the near-duplicate index. The others retry
+    the lock every min_interval and take over if its holder exits.
+
+    start() is called from the FastAPI lifespan and stop() on shutdown.
+    """
+
+    def __init__(self, ingestor=feed_ingestor, urls: list[str] = None, initial_interval: float = FETCH_INTERVAL,
+                 min_interval: float = RSS_MIN_INTERVAL, max_interval: float = RSS_MAX_INTERVAL,
+                 jitter: float = RSS_JITTER, initial_delay: float = RSS_INITIAL_DELAY,
+                 enabled: bool = RSS_SCHEDULER_ENABLED, rng: random.Random = None, lock: ProcessLock = None):
+        if not 0 < min_interval <= max_interval:
+            raise ValueError("intervals must satisfy 0 < min_interval <= max_interval")
+        self.ingestor = ingestor
+        self.urls = urls
+        self.initial_interval = min(max(initial_interval, min_interval), max_interval)
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.jitter = jitter
+        self.initial_delay = initial_delay
+        self.enabled = enabled
+        self.rng = rng or random.Random()
+        self.lock = lock if lock is not None else ProcessLock()
+        self.feeds = {}
+        self.cycles = 0
+        self._task = None
 
-# Get fetch interval from .env file (default: 600 seconds)
-FETCH_INTERVAL = int(os.getenv("FETCH_INTERVAL", 600))
+    def _jittered(self, delay: float) -> float:
+        return delay * self.rng.uniform(1 - self.jitter, 1 + self.jitter)
 
-# Track the last fetch time
-LAST_FETCH_TIME = None
+    def start(self):
+        """Start the polling task on the running loop; a no-op when disabled or already running."""
+        if not self.enabled or (self._task and not self._task.done()):
+            return
+        urls = self.urls if self.urls is not None else load_feed_urls()
+        now = time.monotonic()
+        # Keep what was learned about feeds that are still configured
+        self.feeds = {url: self.feeds.get(url) or FeedSchedule(
+            url, self.initial_interval, now + self.initial_delay + self.rng.uniform(0, self.initial_interval))
+            for url in urls}
+        if not self.feeds:
+            logger.warning("No RSS feeds configured; the feed scheduler is not started")
+            return
+        self._task = asyncio.get_running_loop().create_task(self._run())
+        logger.info(f"Feed scheduler started for {len(self.feeds)} feeds")
 
-def fetch_news_background():
-    """Automatically fetch RSS news at a configurable interval."""
-    global LAST_FETCH_TIME
-    while True:
+    async def stop(self):
+        """Cancel the polling task, abandoning a cycle that is in flight."""
+        if self._task is None:
+            return
+        self._task.cancel()
         try:
-            logger.info("Fetching RSS news...")
-            fetch_rss_news()
-            LAST_FETCH_TIME = datetime.datetime.now()
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        self.lock.release()
+        logger.info("Feed scheduler stopped")
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def _run(self):
+        while True:
+            if not self.lock.held:
+                if not self.lock.acquire():
+                    await asyncio.sleep(self.min_interval)  # another worker process polls
+                    continue
+                logger.info(f"Feed scheduler polling in process {os.getpid()}")
+            now = time.monotonic()
+            due = [feed for feed in self.feeds.values() if feed.next_run <= now]
+            if due:
+                await self.poll(due)
+            else:
+                await asyncio.sleep(min(feed.next_run for feed in self.feeds.values()) - now)
+
+    async def poll(self, due: list[FeedSchedule]):
+        """Fetch the due feeds in one ingestion cycle and reschedule each of them."""
+        self.cycles += 1
+        try:
+            summary = await self.ingestor.run(get_repository(), [feed.url for feed in due])
         except Exception as e:
-            logger.error(f"Failed to fetch RSS news: {e}")
-        time.sleep(FETCH_INTERVAL)
-
-def health_check():
-    """Check if the background job is running as expected."""
-    if LAST_FETCH_TIME is None:
-        return {"status": "unknown", "message": "Background job has not started yet."}
-    time_since_last_fetch = (datetime.datetime.now() - LAST_FETCH_TIME).total_seconds()
-    if time_since_last_fetch > FETCH_INTERVAL * 2:  # Allow some buffer
-        return {"status": "unhealthy", "message": f"Last fetch was {time_since_last_fetch} seconds ago."}
-    return {"status": "healthy", "message": f"Last fetch was {time_since_last_fetch} seconds ago."}
-
-def stop_background_job():
-    """Stop the background job gracefully."""
-    logger.info("Stopping background job...")
-    # Add cleanup logic if needed
-
-# Register the shutdown hook
-atexit.register(stop_background_job)
-
-# Start background job
-threading.Thread(target=fetch_news_background, daemon=True).start()
\ No newline at end of file
+            logger.error(f"RSS ingestion cycle failed: {e!r}")
+            summary = {"store_errors": [repr(e)], "per_feed": {}}
+
+        store_error = summary["store_errors"][0] if summary["store_errors"] else None
+        polled_at = time.time()
+        for feed in due:
+            outcome = summary["per_feed"].get(feed.url, {"status": "error", "error": "not polled"})
+            feed.polls += 1
+            feed.last_polled_at = polled_at
+            if outcome["status"] in ("ok", "not_modified") and not store_error:
+                self._succeeded(feed, outcome["new_entries"])
+            else:
+                self._failed(feed, outcome.get("error") or store_error or outcome["status"])
+
+    def _succeeded(self, feed: FeedSchedule, new_entries: int):
+        feed.consecutive_failures = 0
+        feed.last_error = None
+        feed.last_new_entries = new_entries
+        feed.last_success_at = feed.last_polled_at
+        factor = 0.5 if new_entries else 1.5
+        feed.interval = min(max(feed.interval * factor, self.min_interval), self.max_interval)
+        feed.next_run = time.monotonic() + self._jittered(feed.interval)
+
+    def _failed(self, feed: FeedSchedule, error: str):
+        feed.failures += 1
+        feed.consecutive_failures += 1
+        feed.last_error = error
+        backoff = min(feed.interval * 2 ** feed.consecutive_failures, self.max_interval)
+        feed.next_run = time.monotonic() + self._jittered(backoff)
+        logger.warning(f"Polling {feed.url} failed ({feed.consecutive_failures} in a row), "
+                       f"retrying in {round(feed.next_run - time.monotonic())}s: {error}")
+
+    def health(self) -> dict:
+        """Per-feed interval, lag, next run and failure counts, plus an overall status."""
+        now = time.monotonic()
+        feeds = [{
+            "url": feed.url,
+            "interval_s": round(feed.interval, 1),
+            "next_run_in_s": round(max(feed.next_run - now, 0.0), 1),
+            # How far behind schedule the feed is; grows if the loop or a cycle stalls
+            "lag_s": round(max(now - feed.next_run, 0.0), 1),
+            "polls": feed.polls,
+            "failures": feed.failures,
+            "consecutive_failures": feed.consecutive_failures,
+            "last_new_entries": feed.last_new_entries,
+            "last_error": feed.last_error,
+            "last_polled_at": _isoformat(feed.last_polled_at),
+            "last_success_at": _isoformat(feed.last_success_at),
+        } for feed in self.feeds.values()]
+
+        if not self.running:
+            status = "stopped"
+        elif not self.lock.held:
+            status = "standby"  # another worker process polls
+        elif any(feed["consecutive_failures"] >= RSS_UNHEALTHY_FAILURES for feed in feeds):
+            status = "degraded"
+        else:
+            status = "healthy"
+        return {"status": status, "holds_lock": self.lock.held, "cycles": self.cycles, "feeds": feeds}
+
+feed_scheduler = FeedScheduler(lock=ProcessLock(RSS_SCHEDULER_LOCK))
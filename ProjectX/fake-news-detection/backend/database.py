@@ -1,64 +1,50 @@
-import os
+import json
+import base64
 import logging
-import bcrypt
-from uuid import uuid4
 from backend.models import FeedbackInput, UserCreate, NewsItem
-from dotenv import load_dotenv
-from supabase import create_client, Client
-from .utils import hash_password
+from backend.password_hashing import password_hasher
+from backend.repository import RepositoryError
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Load environment variables
-load_dotenv()
+# Every helper takes the repository to use (see backend/repository.py) as its
+# first argument and is awaited by the async FastAPI handlers.
 
-# Get Supabase URL and Key from .env file
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_KEY = os.getenv("SUPABASE_KEY")
+async def find_user(repo, email: str, columns: str = "*"):
+    """Return the user row with this email, or None."""
+    users = await repo.select("users", {"email": email}, columns=columns, limit=1)
+    return users[0] if users else None
 
-# Validate environment variables
-logger.info(f"Supabase URL is set: {'Yes' if SUPABASE_URL else 'No'}")
-logger.info(f"Supabase Key is set: {'Yes' if SUPABASE_KEY else 'No'}")
+async def create_user(repo, user: UserCreate):
+    """Insert a user in one round trip and return {"user": {id, name, email}}.
 
-# Create Supabase client
-try:
-    supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
-    logger.info("Supabase client created successfully")
-except Exception as e:
-    logger.error(f"Failed to create Supabase client: {e}")
-    raise
-
-# Function to create the 'news' table if it doesn't exist
-def create_user(user: UserCreate):
+    The unique constraint on users.email rejects duplicates, so there is no
+    separate existence check (which could also race with a parallel signup).
+    """
     try:
-        exists = supabase.table("users").select("*").eq("email", user.email).execute()
-        if exists.data:
-            return {"error": "Email is already registered."}
+        # bcrypt runs on its own bounded pool, off the event loop and the request threadpool
+        hashed = await password_hasher.hash(user.password)
 
-        hashed = bcrypt.hashpw(user.password.encode(), bcrypt.gensalt()).decode()
-
-        response = supabase.table("users").insert({
+        rows = await repo.insert("users", {
             "name": user.name,
             "email": user.email,
             "password": hashed
-        }).execute()
+        }, columns="id, name, email")
 
-        if response.data is not None:
+        if rows:
             logger.info("User created successfully")
-            return {"message": "User created"}
-        else:
-            error_msg = response.model_dump().get("error")
-            logger.error(f"Supabase insert error: {error_msg}")
-            return {"error": str(error_msg)}
+            return {"message": "User created", "user": rows[0]}
+        logger.error("Supabase insert returned no user row")
+        return {"error": "User creation failed"}
 
-    except Exception as e:
+    except RepositoryError as e:
+        if e.is_unique_violation:
+            return {"error": "Email is already registered."}
         logger.error(f"Exception in create_user: {e}")
         return {"error": str(e)}
 
 # Function to store news
-def store_news(news: NewsItem):
+async def store_news(repo, news: NewsItem):
     """Store a news item in the Supabase database."""
     try:
         data = {
@@ -66,108 +52,153 @@ def store_news(news: NewsItem):
             "link": news.link,
             "description": news.description
         }
-        response = supabase.table("news").insert(data).execute()
-        if response.status_code == 201:
-            logger.info(f"Stored news: {news.title}")
-            return {"message": "News stored successfully!"}
-        elif response.status_code == 409:  # Conflict (duplicate entry)
+        await repo.insert("news", data, returning=False)
+        logger.info(f"Stored news: {news.title}")
+        return {"message": "News stored successfully!"}
+    except RepositoryError as e:
+        if e.is_conflict:  # Conflict (duplicate entry)
             logger.warning(f"Duplicate news: {news.title}")
             return {"message": "News already exists."}
-        else:
-            logger.error(f"Failed to store news: {response}")
-            return {"error": "Failed to store news"}
-    except Exception as e:
         logger.error(f"Failed to store news: {e}")
         return {"error": f"Failed to store news: {e}"}
 
-# Function to fetch stored news from Supabase with pagination
-def get_news(limit: int = 10, offset: int = 0):
-    """Fetch stored news from Supabase database with pagination."""
+async def store_news_items(repo, rows: list[dict]):
+    """Upsert many news rows (title, link, description) in one request.
+
+    Links already stored are skipped by the unique constraint on news.link;
+    "stored" counts the rows actually inserted.
+    """
+    if not rows:
+        return {"message": "No news to store", "stored": 0}
+    try:
+        stored = await repo.insert("news", rows, columns="link", on_conflict="link", ignore_duplicates=True)
+        logger.info(f"Upserted {len(rows)} news items, {len(stored)} new")
+        return {"message": f"{len(stored)} news items stored", "stored": len(stored)}
+    except RepositoryError as e:
+        logger.error(f"Failed to store news in bulk: {e}")
+        return {"error": f"Failed to store news: {e}"}
+
+# Columns /news returns, newest first by publication time (id breaks ties)
+NEWS_COLUMNS = "id, title, link, description, published_at, canonical_link"
+NEWS_ORDER = "published_at.desc,id.desc"
+
+def encode_news_cursor(row: dict) -> str:
+    """Opaque cursor pointing after row in NEWS_ORDER."""
+    key = json.dumps([row["published_at"], row["id"]], separators=(",", ":"))
+    return base64.urlsafe_b64encode(key.encode("utf-8")).decode("ascii").rstrip("=")
+
+def decode_news_cursor(cursor: str) -> tuple:
+    """Return the (published_at, id) key of a cursor; raises ValueError when it is malformed."""
     try:
-        response = supabase.table("news").select("*").range(offset, offset + limit - 1).execute()
-        if response.status_code == 200:
-            logger.info(f"Fetched {len(response.data)} news items from Supabase.")
-            return response.data
-        else:
-            logger.error(f"Failed to fetch news: {response}")
-            return {"error": "Failed to fetch news"}
-    except Exception as e:
+        published_at, news_id = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (ValueError, TypeError) as e:
+        raise ValueError("Invalid cursor") from e
+    if not isinstance(published_at, str) or not isinstance(news_id, int):
+        raise ValueError("Invalid cursor")
+    return published_at, news_id
+
+# Function to fetch stored news from Supabase with keyset pagination
+async def get_news(repo, limit: int = 10, cursor: str = None):
+    """Fetch one page of stored news, newest first.
+
+    Pages are read by keyset (published_at, id) rather than offset, so a
+    deep page costs the same index lookup as the first one. Returns
+    {"news", "next_cursor"}; next_cursor is None on the last page.
+    """
+    after = decode_news_cursor(cursor) if cursor else None
+    try:
+        # One extra row tells whether another page follows
+        rows = await repo.select("news", columns=NEWS_COLUMNS, order=NEWS_ORDER, limit=limit + 1, after=after)
+    except RepositoryError as e:
         logger.error(f"Failed to fetch news: {e}")
         return {"error": f"Failed to fetch news: {e}"}
+    page = rows[:limit]
+    next_cursor = encode_news_cursor(page[-1]) if len(rows) > limit else None
+    logger.info(f"Fetched {len(page)} news items from Supabase.")
+    return {"news": page, "next_cursor": next_cursor}
 
-def verify_user(email: str, password: str):
+async def verify_user(repo, email: str, password: str):
     try:
-        response = supabase.table("users").select("*").eq("email", email).execute()
-        users = response.data or []
+        user = await find_user(repo, email)
 
-        if not users:
+        if not user:
             return None, "User does not exist"
 
-        user = users[0]  # take the first match
-
-        if bcrypt.checkpw(password.encode(), user["password"].encode()):
+        if await password_hasher.verify(password, user["password"]):
             return user, None
         else:
             return None, "Invalid password"
 
-    except Exception as e:
+    except RepositoryError as e:
         return None, str(e)
-    
-def store_analysis(prediction_id: str, text: str, prediction: str, confidence: float):
+
+async def update_password(repo, email: str, hashed: str):
+    """Replace the stored password hash of a user; returns the updated rows."""
+    return await repo.update("users", {"password": hashed}, {"email": email})
+
+async def store_analysis(repo, prediction_id: str, text: str, prediction: str, confidence: float, model_version: str = None):
     """Insert the analysis result into the analysis table."""
+    return await store_analyses(repo, [{
+        "analysis_id": prediction_id,
+        "text": text,
+        "prediction": prediction,
+        "confidence": confidence,
+        "model_version": model_version
+    }])
+
+async def store_analyses(repo, records: list[dict], on_conflict: str = None):
+    """Insert many analysis results into the analysis table in one request.
+
+    Each record needs the same keys as store_analysis: analysis_id, text,
+    prediction, confidence and model_version. With on_conflict naming a
+    unique column (e.g. news_id), records that already exist are skipped.
+    """
+    if not records:
+        return {"message": "No analyses to store"}
     try:
-        data = {
-            "analysis_id": prediction_id,
-            "text": text,
-            "prediction": prediction,
-            "confidence": confidence
-        }
+        await repo.insert("analysis", records, returning=False, on_conflict=on_conflict,
+                          ignore_duplicates=on_conflict is not None)
+        logger.info(f"Stored {len(records)} analyses in bulk")
+        return {"message": f"{len(records)} analyses stored"}
+    except RepositoryError as e:
+        logger.error(f"Exception in store_analyses: {e}")
+        return {"error": str(e)}
 
-        response = supabase.table("analysis").insert(data).execute()
+async def store_feedback(repo, feedback: FeedbackInput, email: str, user_id: str = None):
+    """Store a rating with a single insert.
 
-        if response.data:
-            logger.info("Analysis stored successfully")
-            return {"message": "Analysis stored"}
-        else:
-            logger.error(f"Supabase error: {response}")
-            return {"error": "Failed to store analysis"}
-    except Exception as e:
-        logger.error(f"Exception in store_analysis: {e}")
-        return {"error": str(e)}
-    
-def store_feedback(feedback: FeedbackInput, email: str):
+    user_id normally comes from the token's uid claim; the feedback foreign
+    keys reject unknown analyses and users, so neither is looked up first.
+    Tokens issued before the claim existed fall back to a lookup by email.
+    """
     try:
         logger.info(f"Received feedback: {feedback.model_dump()}, email: {email}")
 
-        analysis_check = supabase.table("analysis").select("*").eq("analysis_id", feedback.analysis_id).execute()
-        if not analysis_check.data:
-            logger.error("Analysis not found")
-            return {"error": "Analysis not found"}
-
-        user_query = supabase.table("users").select("id").eq("email", email).single().execute()
-        if not user_query.data:
-            logger.error("User not found")
-            return {"error": "User not found"}
-        user_id = user_query.data["id"]
-
         if not (1 <= feedback.rating <= 5):
             logger.error("Rating out of range")
             return {"error": "Rating must be between 1 and 5"}
 
+        if user_id is None:
+            user = await find_user(repo, email, columns="id")
+            if not user:
+                logger.error("User not found")
+                return {"error": "User not found"}
+            user_id = user["id"]
+
         insert_data = {
             "user_id": user_id,
             "analysis_id": feedback.analysis_id,
             "rating": feedback.rating
         }
 
-        response = supabase.table("feedback").insert(insert_data).execute()
-        if response.data is None:
-            logger.error(f"Insert failed: {response.model_dump().get('error')}")
-            return {"error": f"Failed: {response.model_dump().get('error')}"}
-        else:
-            logger.info("Feedback stored successfully")
-            return {"message": "Feedback stored"}
+        await repo.insert("feedback", insert_data, returning=False)
+        logger.info("Feedback stored successfully")
+        return {"message": "Feedback stored"}
 
-    except Exception as e:
+    except RepositoryError as e:
+        if e.is_foreign_key_violation:
+            missing = "User" if "user_id" in str(e) else "Analysis"
+            logger.error(f"{missing} not found")
+            return {"error": f"{missing} not found"}
         logger.error(f"store_feedback error: {e}")
-        return {"error": str(e)}
\ No newline at end of file
+        return {"error": str(e)}
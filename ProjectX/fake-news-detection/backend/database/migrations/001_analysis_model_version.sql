@@ -0,0 +1,4 @@
+-- Record which model version produced each analysis row
+ALTER TABLE analysis ADD COLUMN IF NOT EXISTS model_version TEXT;
+
+CREATE INDEX IF NOT EXISTS analysis_model_version_idx ON analysis (model_version);
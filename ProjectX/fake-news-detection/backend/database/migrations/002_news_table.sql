@@ -0,0 +1,10 @@
+-- RSS entries stored by backend/ingestion.py; link is the upsert key
+CREATE TABLE IF NOT EXISTS news (
+  id BIGSERIAL PRIMARY KEY,
+  title TEXT NOT NULL,
+  link TEXT NOT NULL,
+  description TEXT,
+  created_at TIMESTAMP DEFAULT now()
+);
+
+CREATE UNIQUE INDEX IF NOT EXISTS news_link_key ON news (link);
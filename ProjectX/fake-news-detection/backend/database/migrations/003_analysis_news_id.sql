@@ -0,0 +1,6 @@
+-- Link analyses made by the news classifier to the news row they score.
+-- analysis.article_id points at the articles table, which ingestion does not fill.
+ALTER TABLE analysis ADD COLUMN IF NOT EXISTS news_id BIGINT REFERENCES news(id) ON DELETE CASCADE;
+
+-- One verdict per news item; also the conflict target that makes re-runs idempotent
+CREATE UNIQUE INDEX IF NOT EXISTS analysis_news_id_key ON analysis (news_id);
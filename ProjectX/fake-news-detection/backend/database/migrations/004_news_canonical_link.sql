@@ -0,0 +1,5 @@
+-- Syndicated copies point at the first stored copy of the story (see backend/near_duplicates.py);
+-- NULL when the item is itself canonical
+ALTER TABLE news ADD COLUMN IF NOT EXISTS canonical_link TEXT;
+
+CREATE INDEX IF NOT EXISTS news_canonical_link_idx ON news (canonical_link);
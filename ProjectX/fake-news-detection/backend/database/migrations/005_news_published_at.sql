@@ -0,0 +1,8 @@
+-- Publication time of each RSS entry, the /news sort key
+ALTER TABLE news ADD COLUMN IF NOT EXISTS published_at TIMESTAMPTZ;
+UPDATE news SET published_at = created_at WHERE published_at IS NULL;
+ALTER TABLE news ALTER COLUMN published_at SET DEFAULT now();
+ALTER TABLE news ALTER COLUMN published_at SET NOT NULL;
+
+-- /news pages by keyset: WHERE (published_at, id) < (cursor) ORDER BY published_at DESC, id DESC
+CREATE INDEX IF NOT EXISTS news_published_at_id_idx ON news (published_at DESC, id DESC);
@@ -0,0 +1,7 @@
+-- News rows without a verdict yet, for the news classifier (see backend/news_classifier.py).
+-- An anti-join rather than "id > last checkpoint": ids come from a sequence, so a concurrent
+-- upsert can commit a smaller id after a larger one was already classified.
+CREATE OR REPLACE VIEW unclassified_news AS
+SELECT n.id, n.link, n.title, n.description, n.canonical_link
+FROM news n
+WHERE NOT EXISTS (SELECT 1 FROM analysis a WHERE a.news_id = n.id);
@@ -1,5 +1,9 @@
+-- Full current schema for a fresh database: it already includes migrations/001-006,
+-- which are only needed to bring an existing database up to date (they are idempotent).
+
 -- Drop all existing related tables (for reset)
-drop table if exists feedback, analysis, articles, sources, users, admins cascade;
+drop view if exists unclassified_news;
+drop table if exists feedback, analysis, news, articles, sources, users, admins cascade;
 
 -- ========================
 -- 1. SOURCES
@@ -24,19 +28,52 @@ create table articles (
 );
 
 -- ========================
--- 3. ANALYSIS (UPDATED)
+-- 3. NEWS (RSS entries stored by backend/ingestion.py)
+-- ========================
+CREATE TABLE news (
+  id BIGSERIAL PRIMARY KEY,
+  title TEXT NOT NULL,
+  link TEXT NOT NULL,
+  description TEXT,
+  -- First stored copy of a syndicated story (backend/near_duplicates.py); NULL when canonical
+  canonical_link TEXT,
+  published_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+  created_at TIMESTAMP DEFAULT now()
+);
+
+-- link is the upsert key
+CREATE UNIQUE INDEX news_link_key ON news (link);
+CREATE INDEX news_canonical_link_idx ON news (canonical_link);
+-- /news pages by keyset on (published_at, id)
+CREATE INDEX news_published_at_id_idx ON news (published_at DESC, id DESC);
+
+-- ========================
+-- 4. ANALYSIS (UPDATED)
 -- ========================
 CREATE TABLE analysis (
   analysis_id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
   text TEXT NOT NULL,
   article_id INTEGER REFERENCES articles(article_id),
+  -- Set by the news classifier for the news row it scored
+  news_id BIGINT REFERENCES news(id) ON DELETE CASCADE,
   prediction TEXT NOT NULL,
   confidence REAL NOT NULL CHECK (confidence BETWEEN 0.0 AND 1.0),
+  model_version TEXT,
   analysis_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
+CREATE INDEX analysis_model_version_idx ON analysis (model_version);
+-- One verdict per news item; also the conflict target of the news classifier's inserts
+CREATE UNIQUE INDEX analysis_news_id_key ON analysis (news_id);
+
+-- News rows without a verdict yet, read by backend/news_classifier.py
+CREATE VIEW unclassified_news AS
+SELECT n.id, n.link, n.title, n.description, n.canonical_link
+FROM news n
+WHERE NOT EXISTS (SELECT 1 FROM analysis a WHERE a.news_id = n.id);
+
 -- ========================
--- 4. USERS (for auth)
+-- 5. USERS (for auth)
 -- ========================
 create table users (
   id uuid primary key default gen_random_uuid(),
@@ -47,7 +84,7 @@ create table users (
 );
 
 -- ========================
--- 5. FEEDBACK (linked to analysis + users)
+-- 6. FEEDBACK (linked to analysis + users)
 -- ========================
 CREATE TABLE feedback (
   feedback_id SERIAL PRIMARY KEY,
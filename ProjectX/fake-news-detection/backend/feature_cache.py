@@ -0,0 +1,212 @@
+import os
+import json
+import shutil
+import hashlib
+import inspect
+import logging
+import tempfile
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from sklearn.base import BaseEstimator, TransformerMixin
+from sklearn.feature_extraction.text import CountVectorizer
+from sklearn.preprocessing import normalize
+
+from backend import text_normalization
+from backend.prediction_cache import fingerprint_files
+from backend.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Cleaned corpora and their n-gram count matrices live in <FEATURE_CACHE_DIR>/<name>-<fingerprint>/
+FEATURE_CACHE_DIR = settings.get("FEATURE_CACHE_DIR", "models/feature_cache")
+CORPUS_FILE = "corpus.pkl"
+TERMS_FILE = "terms.npy"
+CSR_ARRAYS = ("data", "indices", "indptr")
+
+# Raw datasets read by train_model.py and analyze_misclassifications.py
+DATASET_FILES = [
+    "dataset/fake.csv",
+    "dataset/true.csv",
+    "dataset/liar/train.tsv",
+    "dataset/liar/test.tsv",
+    "dataset/liar/valid.tsv",
+]
+
+def _write_atomically(path: str, write):
+    """Call write(tmp_dir) and rename the result to path, so readers never see partial files."""
+    parent = os.path.dirname(path)
+    os.makedirs(parent, exist_ok=True)
+    tmp_dir = tempfile.mkdtemp(dir=parent, prefix=f".{os.path.basename(path)}-")
+    try:
+        write(tmp_dir)
+        os.rename(tmp_dir, path)
+    except OSError:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        if not os.path.isdir(path):  # another process may have won the race
+            raise
+    except Exception:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+
+class CountMatrix:
+    """char_wb n-gram counts of every document in a corpus, columns in sorted term order."""
+
+    def __init__(self, terms: np.ndarray, counts: sp.csr_matrix):
+        self.terms = terms
+        self.counts = counts
+
+    @classmethod
+    def build(cls, texts, ngram_range) -> "CountMatrix":
+        vectorizer = CountVectorizer(analyzer="char_wb", ngram_range=tuple(ngram_range), dtype=np.int32)
+        counts = vectorizer.fit_transform(texts).tocsr()
+        return cls(vectorizer.get_feature_names_out().astype(str), counts)
+
+    def save(self, path: str):
+        np.save(os.path.join(path, TERMS_FILE), self.terms)
+        for name in CSR_ARRAYS:
+            np.save(os.path.join(path, f"{name}.npy"), getattr(self.counts, name))
+
+    @classmethod
+    def load(cls, path: str) -> "CountMatrix":
+        """Load the matrix with its arrays memory-mapped, so CV workers share one copy."""
+        terms = np.load(os.path.join(path, TERMS_FILE), mmap_mode="r")
+        data, indices, indptr = (np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r") for name in CSR_ARRAYS)
+        counts = sp.csr_matrix((data, indices, indptr), shape=(len(indptr) - 1, len(terms)), copy=False)
+        return cls(terms, counts)
+
+class CachedCorpus:
+    """A cleaned corpus on disk plus the count matrices computed for it so far.
+
+    Count matrices are built the first time an ngram_range is requested and
+    reused afterwards, within a run and across runs. Pickling keeps only the
+    directory path, so GridSearchCV workers re-open the memory-mapped files
+    instead of receiving a copy of every matrix.
+    """
+
+    def __init__(self, path: str, frame: pd.DataFrame = None):
+        self.path = path
+        self._frame = frame
+        self._counts = {}
+
+    @property
+    def key(self) -> str:
+        return os.path.basename(self.path)
+
+    @property
+    def frame(self) -> pd.DataFrame:
+        if self._frame is None:
+            self._frame = pd.read_pickle(os.path.join(self.path, CORPUS_FILE))
+        return self._frame
+
+    def counts(self, ngram_range) -> CountMatrix:
+        ngram_range = tuple(int(n) for n in ngram_range)
+        if ngram_range not in self._counts:
+            path = os.path.join(self.path, "counts-{}-{}".format(*ngram_range))
+            if not os.path.isdir(path):
+                logger.info(f"Building {ngram_range} count matrix for {self.key}")
+                matrix = CountMatrix.build(self.frame["text"], ngram_range)
+                _write_atomically(path, matrix.save)
+            self._counts[ngram_range] = CountMatrix.load(path)
+        return self._counts[ngram_range]
+
+    def __getstate__(self):
+        return {"path": self.path}
+
+    def __setstate__(self, state):
+        self.__init__(state["path"])
+
+    def __deepcopy__(self, memo):
+        # sklearn's clone() deep-copies non-estimator parameters; the cache is read-only
+        return self
+
+class FeatureCache:
+    """Persist cleaned corpora and n-gram counts keyed by dataset and cleaning fingerprint."""
+
+    def __init__(self, path: str = FEATURE_CACHE_DIR):
+        self.path = path
+
+    def corpus(self, name: str, build, source_paths=DATASET_FILES, params: dict = None) -> CachedCorpus:
+        """Return the cached corpus called name, calling build() to create it when needed.
+
+        build() must return a DataFrame with a cleaned "text" column. The
+        cache key hashes source_paths, the module defining build (its label
+        mapping, deduplication and so on), the text normalization code, this
+        module (how n-gram counts are prepared) and params, which should hold
+        any value build depends on that is not in its source (e.g. a command
+        line option). Changing any of them invalidates the entry.
+        """
+        fingerprint = self.fingerprint(build, source_paths, params)
+        path = os.path.join(self.path, f"{name}-{fingerprint}")
+        if os.path.exists(os.path.join(path, CORPUS_FILE)):
+            logger.info(f"Using cached corpus {name}-{fingerprint}")
+            return CachedCorpus(path)
+
+        frame = build().reset_index(drop=True)
+        _write_atomically(path, lambda tmp: frame.to_pickle(os.path.join(tmp, CORPUS_FILE)))
+        self._remove_stale(name, keep=path)
+        return CachedCorpus(path, frame)
+
+    @staticmethod
+    def fingerprint(build, source_paths, params: dict = None) -> str:
+        try:
+            build_source = inspect.getsourcefile(build)
+        except TypeError:  # a builtin or C function has no source to hash
+            build_source = None
+        files = fingerprint_files(*source_paths, *filter(None, (build_source, text_normalization.__file__, __file__)))
+        digest = hashlib.sha256(files.encode())
+        digest.update(json.dumps(params or {}, sort_keys=True, default=str).encode())
+        return digest.hexdigest()[:16]
+
+    def _remove_stale(self, name: str, keep: str):
+        for entry in os.listdir(self.path):
+            entry_path = os.path.join(self.path, entry)
+            if entry.startswith(f"{name}-") and entry_path != keep and os.path.isdir(entry_path):
+                logger.info(f"Removing stale feature cache {entry}")
+                shutil.rmtree(entry_path, ignore_errors=True)
+
+class CachedTfidfVectorizer(BaseEstimator, TransformerMixin):
+    """TfidfVectorizer(analyzer="char_wb") computed from a CachedCorpus.
+
+    X is an array of row numbers into corpus.frame instead of raw text.
+    fit() restricts the cached counts to the given rows, then applies the
+    same vocabulary pruning, max_features selection and smoothed idf as
+    TfidfVectorizer, so a grid search over this transformer scores exactly
+    like one over the real vectorizer without re-tokenizing the corpus in
+    every fold and for every grid point.
+    """
+
+    def __init__(self, corpus=None, ngram_range=(1, 1), max_features=None):
+        self.corpus = corpus
+        self.ngram_range = ngram_range
+        self.max_features = max_features
+
+    def _rows(self, X):
+        return self.corpus.counts(self.ngram_range).counts[np.asarray(X).ravel()]
+
+    def fit(self, X, y=None):
+        counts = self._rows(X)
+        dfs = np.bincount(counts.indices, minlength=counts.shape[1])
+        # Terms never seen in these rows are not part of the fitted vocabulary
+        columns = np.flatnonzero(dfs)
+        if self.max_features is not None and len(columns) > self.max_features:
+            tfs = np.asarray(counts[:, columns].sum(axis=0)).ravel()
+            # Same selection as CountVectorizer._limit_features, including tie order
+            columns = np.sort(columns[(-tfs).argsort()[:self.max_features]])
+        n_samples = counts.shape[0]
+        self.columns_ = columns
+        self.idf_ = np.log((1 + n_samples) / (1 + dfs[columns])) + 1
+        return self
+
+    def transform(self, X):
+        counts = self._rows(X)
+        if len(self.columns_) < counts.shape[1]:
+            counts = counts[:, self.columns_]
+        counts = counts.astype(np.float64)
+        return normalize(counts @ sp.diags(self.idf_), norm="l2", copy=False)
+
+    def get_feature_names_out(self, input_features=None):
+        return np.asarray(self.corpus.counts(self.ngram_range).terms[self.columns_], dtype=object)
+
+feature_cache = FeatureCache()
@@ -0,0 +1,122 @@
+"""Per-feed RSS polling state shared by the worker processes through one JSON file.
+
+One process is expected to poll (the one holding the feed scheduler's
+lock, see backend/cron_job.py), but any worker can serve a manual
+/fetch_rss. So no process assumes it is the only writer: each re-reads the
+file before a cycle and merges it into its own state, and save() merges
+with what is on disk, feed by feed, keeping the most recently updated
+state of each feed.
+"""
+import os
+import time
+import json
+import logging
+import tempfile
+import threading
+from backend.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Where per-feed polling state (validators and seen entries) is kept between runs
+RSS_STATE_FILE = settings.get("RSS_STATE_FILE", "models/rss_feed_state.json")
+# Entry ids remembered per feed; comfortably more than a feed lists at once
+RSS_SEEN_ENTRIES = settings.get_int("RSS_SEEN_ENTRIES", 500)
+
+class FeedStateStore:
+    """Per-feed polling state, persisted as one JSON file.
+
+    For every feed URL it keeps the ETag and Last-Modified validators of the
+    last successful download and the ids (GUID, or link when there is none)
+    of recently seen entries, newest last. The file is replaced atomically,
+    like the model registry manifest. Each feed's state carries the time it
+    was updated (updated_at), which decides what merge() and save() keep.
+
+    The state is changed on the event loop only. To write it from a worker
+    thread, take a snapshot() on the loop and pass that to save(); a
+    snapshot older than the last one written is not saved.
+    """
+
+    def __init__(self, path: str = RSS_STATE_FILE, max_seen: int = RSS_SEEN_ENTRIES):
+        self.path = path
+        self.max_seen = max_seen
+        self._feeds = None
+        self._version = 0
+        self._saved_version = 0
+        self._save_lock = threading.Lock()
+
+    @property
+    def feeds(self) -> dict:
+        if self._feeds is None:
+            self._feeds = self.read()
+        return self._feeds
+
+    def read(self) -> dict:
+        """The per-feed state in the file, as last saved by any process."""
+        if not self.path or not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path) as f:
+                return json.load(f).get("feeds", {})
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable feed state {self.path}: {e}")
+            return {}
+
+    def get(self, url: str) -> dict:
+        return self.feeds.get(url, {})
+
+    def conditional_headers(self, url: str) -> dict:
+        """Request headers that let the server answer 304 when the feed is unchanged."""
+        state = self.get(url)
+        headers = {}
+        if state.get("etag"):
+            headers["If-None-Match"] = state["etag"]
+        if state.get("last_modified"):
+            headers["If-Modified-Since"] = state["last_modified"]
+        return headers
+
+    def unseen(self, url: str, entry_ids: list[str]) -> set:
+        seen = set(self.get(url).get("seen", ()))
+        return {entry_id for entry_id in entry_ids if entry_id not in seen}
+
+    def update(self, url: str, etag: str = None, last_modified: str = None, entry_ids: list[str] = ()):
+        """Record a successful download of url and the entries it listed."""
+        state = self.feeds.setdefault(url, {})
+        state["etag"] = etag
+        state["last_modified"] = last_modified
+        listed = set(entry_ids)
+        seen = [entry_id for entry_id in state.get("seen", []) if entry_id not in listed]
+        state["seen"] = (seen + list(entry_ids))[-self.max_seen:]
+        state["updated_at"] = time.time()
+
+    def merge(self, feeds: dict):
+        """Take the state of every feed that was updated more recently in feeds, e.g. by another process."""
+        for url, state in feeds.items():
+            if state.get("updated_at", 0) > self.get(url).get("updated_at", 0):
+                self.feeds[url] = state
+
+    def snapshot(self) -> dict:
+        """A copy of the current state that later update() calls leave alone."""
+        self._version += 1
+        feeds = {url: {**state, "seen": list(state.get("seen", ()))} for url, state in self.feeds.items()}
+        return {"version": self._version, "feeds": feeds}
+
+    def save(self, snapshot: dict = None):
+        """Write snapshot (by default one taken now) to path, merged with the feeds saved there."""
+        if not self.path or (snapshot is None and self._feeds is None):
+            return
+        snapshot = snapshot or self.snapshot()
+        with self._save_lock:
+            if snapshot["version"] <= self._saved_version:  # a newer snapshot was written meanwhile
+                return
+            # Feeds another process saved more recently than our copy keep their state
+            feeds = self.read()
+            for url, state in snapshot["feeds"].items():
+                if state.get("updated_at", 0) >= feeds.get(url, {}).get("updated_at", 0):
+                    feeds[url] = state
+            parent = os.path.dirname(self.path) or "."
+            os.makedirs(parent, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=parent, suffix=".json")
+            with os.fdopen(fd, "w") as f:
+                json.dump({"feeds": feeds}, f, indent=2)
+            os.replace(tmp_path, self.path)
+            self._saved_version = snapshot["version"]
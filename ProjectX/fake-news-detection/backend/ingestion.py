@@ -0,0 +1,231 @@
+import time
+import asyncio
+import logging
+from datetime import datetime, timezone
+from urllib.parse import urlsplit
+
+import httpx
+import feedparser
+import validators
+
+from backend.config import Settings, settings
+from backend.metrics import rss_fetches, rss_fetch_bytes, rss_fetch_duration
+from backend.database import store_news_items
+from backend.feed_state import FeedStateStore
+from backend.news_classifier import news_classifier, news_text
+from backend.near_duplicates import near_duplicate_index
+from backend.news_cache import news_page_cache
+
+logger = logging.getLogger(__name__)
+
+# Feeds fetched at once overall, and from any single host
+RSS_MAX_CONCURRENCY = settings.get_int("RSS_MAX_CONCURRENCY", 16)
+RSS_PER_HOST_CONCURRENCY = settings.get_int("RSS_PER_HOST_CONCURRENCY", 2)
+# Seconds allowed for one feed download (connect + read)
+RSS_FETCH_TIMEOUT = settings.get_float("RSS_FETCH_TIMEOUT", 10)
+# Newest entries kept per feed and rows sent per upsert request
+RSS_MAX_ENTRIES_PER_FEED = settings.get_int("RSS_MAX_ENTRIES_PER_FEED", 50)
+RSS_UPSERT_BATCH_SIZE = settings.get_int("RSS_UPSERT_BATCH_SIZE", 500)
+
+def load_feed_urls(config_file: str = None) -> list[str]:
+    """Return the configured feeds (see Settings.rss_feeds), optionally from another config file.
+
+    RSS_FEEDS (comma separated) in the environment overrides the file.
+    """
+    source = settings if config_file is None else Settings(config_file=config_file)
+    return source.rss_feeds
+
+def _published_at(entry):
+    parsed = entry.get("published_parsed") or entry.get("updated_parsed")
+    if not parsed:
+        return None
+    return datetime(*parsed[:6], tzinfo=timezone.utc).isoformat()
+
+def parse_feed(content: bytes, max_entries: int = RSS_MAX_ENTRIES_PER_FEED) -> list[tuple[str, dict]]:
+    """Parse a feed document into (entry id, news row) pairs.
+
+    The entry id is the GUID when the feed has one and the link otherwise;
+    rows hold the news columns title, link, description and published_at
+    (the entry's publication time, or now when the feed gives none).
+    """
+    feed = feedparser.parse(content)
+    fetched_at = datetime.now(timezone.utc).isoformat()
+    entries = []
+    for entry in feed.entries[:max_entries]:
+        title = (entry.get("title") or "").strip()
+        link = (entry.get("link") or "").strip()
+        if not title or not link:
+            continue
+        entries.append((entry.get("id") or link, {
+            "title": title,
+            "link": link,
+            "description": entry.get("description") or "No description available",
+            "published_at": _published_at(entry) or fetched_at,
+        }))
+    return entries
+
+class FeedIngestor:
+    """Fetch RSS feeds concurrently and bulk-upsert their entries into news.
+
+    Downloads share one httpx.AsyncClient. At most max_concurrency feeds are
+    in flight overall and per_host_limit per host, so a long feed list does
+    not hammer a single publisher. Parsing runs in a worker thread to keep
+    the event loop free, and the entries of a whole cycle are written with
+    a few INSERT ... ON CONFLICT (link) DO NOTHING requests.
+
+    Polls are conditional: state (a FeedStateStore) supplies each feed's
+    ETag and Last-Modified, so unchanged feeds answer 304 without a body,
+    and entries seen in an earlier cycle are not sent to the database
+    again. State only advances once a cycle's rows are stored, so a failed
+    write is retried on the next poll. The state is re-read from its file
+    at the start of each cycle, so a cycle run by another worker process
+    (a manual /fetch_rss) starts from what the polling process saved.
+    Without a state store nothing persists between instances.
+
+    With a dedup index (a NearDuplicateIndex), new entries are indexed
+    before they are stored, and syndicated copies of a story carry the
+    link of its first copy in canonical_link.
+
+    on_stored(count) is called after a cycle that stored new rows; the
+    module instance uses it to clear the /news cache and wake the news
+    classifier.
+    """
+
+    def __init__(self, max_concurrency: int = RSS_MAX_CONCURRENCY, per_host_limit: int = RSS_PER_HOST_CONCURRENCY,
+                 timeout: float = RSS_FETCH_TIMEOUT, max_entries: int = RSS_MAX_ENTRIES_PER_FEED,
+                 batch_size: int = RSS_UPSERT_BATCH_SIZE, state: FeedStateStore = None, dedup=None,
+                 on_stored=None, transport=None):
+        if max_concurrency < 1 or per_host_limit < 1:
+            raise ValueError("max_concurrency and per_host_limit must be at least 1")
+        self.max_concurrency = max_concurrency
+        self.per_host_limit = per_host_limit
+        self.timeout = timeout
+        self.max_entries = max_entries
+        self.batch_size = batch_size
+        self.state = state if state is not None else FeedStateStore(path=None)
+        self.dedup = dedup
+        self.on_stored = on_stored
+        self.transport = transport
+
+    def _host_limit(self, host_limits: dict, url: str) -> asyncio.Semaphore:
+        host = urlsplit(url).netloc.lower()
+        if host not in host_limits:
+            host_limits[host] = asyncio.Semaphore(self.per_host_limit)
+        return host_limits[host]
+
+    async def fetch(self, client: httpx.AsyncClient, limit: asyncio.Semaphore, host_limits: dict, url: str) -> dict:
+        """Download and parse one feed.
+
+        Returns {"url", "entries", "bytes", "etag", "last_modified"},
+        {"url", "not_modified"} for a 304, or {"url", "error"}.
+        """
+        async with limit, self._host_limit(host_limits, url):
+            start = time.perf_counter()
+            try:
+                response = await client.get(url, headers=self.state.conditional_headers(url))
+                if response.status_code == 304:
+                    rss_fetches.labels(url, "not_modified").inc()
+                    return {"url": url, "not_modified": True, "bytes": 0}
+                response.raise_for_status()
+            except httpx.HTTPError as e:
+                rss_fetches.labels(url, "error").inc()
+                logger.warning(f"Failed to fetch RSS feed {url}: {e!r}")
+                return {"url": url, "error": repr(e)}
+            finally:
+                rss_fetch_duration.labels(url).observe(time.perf_counter() - start)
+        rss_fetches.labels(url, "ok").inc()
+        rss_fetch_bytes.labels(url).inc(len(response.content))
+        entries = await asyncio.to_thread(parse_feed, response.content, self.max_entries)
+        return {
+            "url": url,
+            "entries": entries,
+            "bytes": len(response.content),
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+        }
+
+    async def run(self, repo, urls: list[str]) -> dict:
+        """Run one ingestion cycle over urls and return a summary of it."""
+        start = time.perf_counter()
+        valid = [url for url in urls if validators.url(url)]
+        for url in set(urls) - set(valid):
+            logger.error(f"Invalid RSS feed URL: {url}")
+
+        # Pick up the validators and seen entries other worker processes saved since
+        self.state.merge(await asyncio.to_thread(self.state.read))
+
+        # Limits are per cycle: semaphores belong to the loop running it
+        limit = asyncio.Semaphore(self.max_concurrency)
+        host_limits = {}
+        async with httpx.AsyncClient(timeout=self.timeout, follow_redirects=True, transport=self.transport,
+                                     headers={"User-Agent": "fake-news-detection-ingest/1.0"}) as client:
+            results = await asyncio.gather(*(self.fetch(client, limit, host_limits, url) for url in valid))
+
+        # Only entries not seen before, and the first copy of a story several feeds repeat
+        rows = {}
+        per_feed = {url: {"status": "invalid"} for url in urls if url not in valid}
+        for result in results:
+            entries = result.get("entries", [])
+            unseen = self.state.unseen(result["url"], [entry_id for entry_id, _ in entries])
+            for entry_id, row in entries:
+                if entry_id in unseen:
+                    rows.setdefault(row["link"], row)
+            if "error" in result:
+                per_feed[result["url"]] = {"status": "error", "error": result["error"]}
+            elif result.get("not_modified"):
+                per_feed[result["url"]] = {"status": "not_modified", "new_entries": 0}
+            else:
+                per_feed[result["url"]] = {"status": "ok", "new_entries": len(unseen)}
+        rows = list(rows.values())
+
+        near_duplicates = 0
+        if self.dedup is not None and rows:
+            canonical = await asyncio.to_thread(self.dedup.assign_many,
+                                                [(row["link"], news_text(row)) for row in rows])
+            for row in rows:
+                row["canonical_link"] = canonical[row["link"]] if canonical[row["link"]] != row["link"] else None
+                near_duplicates += row["canonical_link"] is not None
+
+        errors = []
+        written = 0
+        for i in range(0, len(rows), self.batch_size):
+            result = await store_news_items(repo, rows[i:i + self.batch_size])
+            if "error" in result:
+                errors.append(result["error"])
+            else:
+                written += result["stored"]
+
+        if not errors:
+            for result in results:
+                if "entries" in result:
+                    self.state.update(result["url"], result["etag"], result["last_modified"],
+                                      [entry_id for entry_id, _ in result["entries"]])
+            # Copied on the loop: another run may update the state while the file is written
+            await asyncio.to_thread(self.state.save, self.state.snapshot())
+        if written and self.on_stored is not None:
+            self.on_stored(written)
+
+        summary = {
+            "feeds": len(valid),
+            "not_modified": sum(1 for result in results if result.get("not_modified")),
+            "failed_feeds": [result["url"] for result in results if "error" in result],
+            "invalid_feeds": len(urls) - len(valid),
+            "entries": len(rows),
+            "near_duplicates": near_duplicates,
+            "rows_written": written,
+            "bytes_downloaded": sum(result.get("bytes", 0) for result in results),
+            "store_errors": errors,
+            "seconds": round(time.perf_counter() - start, 3),
+            "per_feed": per_feed,
+        }
+        logger.info(f"RSS cycle: {summary['feeds']} feeds ({summary['not_modified']} unchanged, "
+                    f"{len(summary['failed_feeds'])} failed), {summary['bytes_downloaded']} bytes downloaded, "
+                    f"{summary['entries']} new entries, {written} rows written in {summary['seconds']}s")
+        return summary
+
+def news_stored(count: int):
+    """Called after a cycle stores news: /news pages are stale and there is news to classify."""
+    news_page_cache.invalidate(count)
+    news_classifier.notify(count)
+
+feed_ingestor = FeedIngestor(state=FeedStateStore(), dedup=near_duplicate_index, on_stored=news_stored)
@@ -0,0 +1,196 @@
+import os
+import re
+import json
+import logging
+import numpy as np
+from collections import Counter
+
+logger = logging.getLogger(__name__)
+
+_white_spaces = re.compile(r"\s\s+")
+
+# Arrays written as plain .npy files so they can be memory-mapped
+ARRAY_FILES = ("terms", "idf", "coef")
+META_FILE = "meta.json"
+
+def export_linear_model(pipeline, path: str):
+    """Export a fitted TfidfVectorizer + LogisticRegression pipeline as NumPy arrays.
+
+    path is a directory holding uncompressed .npy files (the sorted vocabulary
+    as a fixed-width string array, with idf and coefficients in the same
+    order) plus meta.json with the intercept and vectorizer settings.
+    Uncompressed arrays can be memory-mapped, so every worker process on a
+    node shares one page-cached copy.
+    """
+    vectorizer, classifier = pipeline[0], pipeline[-1]
+    if len(pipeline) != 2 or vectorizer.analyzer != "char_wb":
+        raise ValueError("Only TfidfVectorizer(analyzer='char_wb') + linear classifier pipelines can be exported")
+    if vectorizer.preprocessor is not None or vectorizer.strip_accents or vectorizer.binary:
+        raise ValueError("Custom preprocessing, accent stripping and binary counts are not supported")
+    if vectorizer.norm not in ("l1", "l2", None) or not vectorizer.use_idf:
+        raise ValueError("Only l1/l2/no normalization with idf weighting is supported")
+    if len(classifier.classes_) != 2:
+        raise ValueError("Only binary classifiers can be exported")
+
+    terms = np.array(list(vectorizer.vocabulary_.keys()))
+    term_indices = np.fromiter(vectorizer.vocabulary_.values(), dtype=np.intp, count=len(terms))
+    order = np.argsort(terms)
+    feature_order = term_indices[order]
+
+    os.makedirs(path, exist_ok=True)
+    arrays = {
+        "terms": terms[order],
+        "idf": vectorizer.idf_.astype(np.float64)[feature_order],
+        "coef": classifier.coef_.ravel().astype(np.float64)[feature_order],
+    }
+    for name, array in arrays.items():
+        np.save(os.path.join(path, f"{name}.npy"), np.ascontiguousarray(array))
+
+    meta = {
+        "intercept": float(np.ravel(classifier.intercept_)[0]),
+        "classes": np.asarray(classifier.classes_).tolist(),
+        "ngram_range": list(vectorizer.ngram_range),
+        "lowercase": bool(vectorizer.lowercase),
+        "sublinear_tf": bool(vectorizer.sublinear_tf),
+        "norm": vectorizer.norm,
+    }
+    with open(os.path.join(path, META_FILE), "w") as f:
+        json.dump(meta, f, indent=2)
+    logger.info(f"Exported linear model with {len(terms)} features to {path}")
+
+class LinearTextScorer:
+    """Lean scorer for an exported char_wb TF-IDF + logistic regression model.
+
+    Computes the same P(FAKE) as the sklearn pipeline with an array-based
+    n-gram lookup (binary search over the sorted vocabulary) and a sparse dot
+    product, skipping the Pipeline and its input validation entirely. char_wb
+    n-grams never cross word boundaries, so the feature counts of each
+    distinct word are computed once and memoized.
+    """
+
+    # Upper bound on memoized words before the word cache is reset
+    WORD_CACHE_SIZE = 20_000
+
+    def __init__(self, terms, idf, coef, intercept, classes, ngram_range,
+                 lowercase=True, sublinear_tf=False, norm="l2"):
+        self.terms = terms
+        self.idf = idf
+        self.coef = coef
+        self.intercept = float(intercept)
+        self.classes_ = np.asarray(classes)
+        self.min_n, self.max_n = (int(n) for n in ngram_range)
+        self.lowercase = bool(lowercase)
+        self.sublinear_tf = bool(sublinear_tf)
+        self.norm = norm or None
+        # P(class 1) is the sigmoid of the decision function when classes_[1] is FAKE
+        self.positive_is_fake = self.classes_[1] == 1
+        self._word_features = {}
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = True):
+        """Load an exported model directory, memory-mapping the arrays by default."""
+        mmap_mode = "r" if mmap else None
+        arrays = {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode=mmap_mode) for name in ARRAY_FILES}
+        with open(os.path.join(path, META_FILE)) as f:
+            meta = json.load(f)
+        return cls(**arrays, **meta)
+
+    def _padded_word_ngrams(self, w: str) -> list[str]:
+        w = " " + w + " "
+        w_len = len(w)
+        ngrams = []
+        for n in range(self.min_n, self.max_n + 1):
+            if w_len <= n:  # count a short word only once
+                ngrams.append(w)
+                break
+            ngrams.extend([w[i:i + n] for i in range(w_len - n + 1)])
+        return ngrams
+
+    def ngrams(self, text: str) -> list[str]:
+        """Reproduce TfidfVectorizer's char_wb analyzer."""
+        if self.lowercase:
+            text = text.lower()
+        text = _white_spaces.sub(" ", text)
+        ngrams = []
+        for w in text.split():
+            ngrams.extend(self._padded_word_ngrams(w))
+        return ngrams
+
+    def lookup(self, ngrams: list[str]) -> np.ndarray:
+        """Return the feature index of each n-gram, or -1 when it is out of vocabulary."""
+        if not ngrams:
+            return np.empty(0, dtype=np.intp)
+        queries = np.array(ngrams)
+        positions = np.searchsorted(self.terms, queries)
+        positions[positions == len(self.terms)] = 0
+        return np.where(self.terms[positions] == queries, positions, -1)
+
+    def _memoize_words(self, words) -> dict:
+        """Look up the n-grams of every word not seen before in one vectorized call.
+
+        Returns a word cache that contains all of words.
+        """
+        cache = self._word_features
+        missing = [w for w in words if w not in cache]
+        if not missing:
+            return cache
+        if len(cache) + len(missing) > self.WORD_CACHE_SIZE:
+            cache, missing = {}, list(words)
+        ngrams = [self._padded_word_ngrams(w) for w in missing]
+        indices = self.lookup([gram for grams in ngrams for gram in grams])
+        start = 0
+        for word, grams in zip(missing, ngrams):
+            found = indices[start:start + len(grams)]
+            start += len(grams)
+            cache[word] = list(Counter(found[found >= 0].tolist()).items())
+        self._word_features = cache
+        return cache
+
+    def vectorize(self, texts: list[str]) -> list:
+        """Return the TF-IDF row of each text as (term indices, weights), or None when it has no known term."""
+        if self.lowercase:
+            texts = [text.lower() for text in texts]
+        word_counts = [Counter(text.split()) for text in texts]
+        word_features = self._memoize_words({w for counts in word_counts for w in counts})
+
+        rows = []
+        for counts in word_counts:
+            tf = Counter()
+            for word, occurrences in counts.items():
+                for j, count in word_features[word]:
+                    tf[j] += count * occurrences
+            if not tf:
+                rows.append(None)
+                continue
+            indices = np.fromiter(tf.keys(), dtype=np.intp, count=len(tf))
+            weights = np.fromiter(tf.values(), dtype=np.float64, count=len(tf))
+            if self.sublinear_tf:
+                weights = np.log(weights) + 1
+            weights *= self.idf[indices]
+            if self.norm == "l2":
+                weights /= np.sqrt(np.dot(weights, weights))
+            elif self.norm == "l1":
+                weights /= np.abs(weights).sum()
+            rows.append((indices, weights))
+        return rows
+
+    def score(self, rows: list) -> np.ndarray:
+        """Return the decision function of rows from vectorize()."""
+        scores = np.full(len(rows), self.intercept)
+        for i, row in enumerate(rows):
+            if row is not None:
+                indices, weights = row
+                scores[i] += np.dot(weights, self.coef[indices])
+        return scores
+
+    def decision_function(self, texts: list[str]) -> np.ndarray:
+        return self.score(self.vectorize(texts))
+
+    def fake_proba(self, rows: list) -> np.ndarray:
+        """Return P(FAKE) for rows from vectorize()."""
+        proba = 1 / (1 + np.exp(-self.score(rows)))
+        return proba if self.positive_is_fake else 1 - proba
+
+    def predict_fake_proba(self, texts: list[str]) -> np.ndarray:
+        """Return P(FAKE) for each text."""
+        return self.fake_proba(self.vectorize(texts))
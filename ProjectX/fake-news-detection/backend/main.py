@@ -1,30 +1,68 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException, Depends
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import OAuth2PasswordRequestForm
-from fastapi import Request, BackgroundTasks
+from fastapi import Response, Header
+from fastapi.concurrency import run_in_threadpool
 from jose import jwt, JWTError, ExpiredSignatureError
 from datetime import datetime, timedelta, timezone
-from pydantic import EmailStr
 import logging
-import bcrypt
 import re
 
-from backend.models import predict_fake_news,FeedbackInput, NewsText, UserCreate, TokenWithUser, PasswordResetRequest, PasswordResetConfirm
-from backend.database import get_news, create_user, verify_user, store_feedback, store_analysis, FeedbackInput
+from backend.models import predict_fake_news_batch, prediction_cache, model_manager, FeedbackInput, NewsText, NewsBatch, ProfilingToggle, UserCreate, TokenWithUser, PasswordResetRequest, PasswordResetConfirm
+from backend.database import get_news, create_user, find_user, verify_user, update_password, store_feedback, FeedbackInput
 from backend.email_utils import send_reset_email
 from backend.rss_scraper import fetch_rss_news
-from backend.database import supabase
+from backend.cron_job import feed_scheduler
+from backend.news_classifier import news_classifier
+from backend.near_duplicates import near_duplicate_index
+from backend.news_cache import news_page_cache
+from backend.batching import prediction_batcher
+from backend.analysis_writer import analysis_writer
+from backend.password_hashing import password_hasher, PasswordHasherBusy
+from backend.repository import get_repository, RepositoryError
+from backend.config import configure_logging
+from backend.metrics import metrics, MetricsMiddleware, CONTENT_TYPE as METRICS_CONTENT_TYPE
+from backend.profiling import request_profiler, ProfilingMiddleware
+from backend.auth import SECRET_KEY, ALGORITHM, Principal, create_access_token, get_current_user, token_cache
 from uuid import uuid4
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Importing this module has no side effects; everything is set up here, once per worker
+    configure_logging()
+    # Load and warm up the model off the event loop so the first request does not pay for it
+    await run_in_threadpool(model_manager.load)
+    # Open the pooled database connections before serving requests
+    repo = get_repository()
+    await repo.start()
+    # Pick up newly published model versions without a restart
+    model_manager.start_watching()
+    analysis_writer.start()
+    # Score ingested news in the background (in one worker process), picking up whatever has no verdict yet
+    news_classifier.start()
+    # Poll the configured RSS feeds, each on its own adaptive schedule
+    feed_scheduler.start()
+    yield
+    await feed_scheduler.stop()
+    await news_classifier.stop()
+    near_duplicate_index.close()
+    model_manager.stop_watching()
+    # Score the predictions still queued; their analyses go to the writer, which is drained next
+    await prediction_batcher.close()
+    # Write any analyses still buffered before the connections are closed
+    await analysis_writer.close()
+    await repo.close()
+    password_hasher.shutdown()
+
 # Initialize FastAPI app
 app = FastAPI(
     title="Fake News Detection API",
     description="An API to detect fake news using machine learning.",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 app.add_middleware(
@@ -34,16 +72,18 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Profiles requests sent with an X-Profile token, or a sample of them (see backend/profiling.py)
+app.add_middleware(ProfilingMiddleware)
+# Outermost, so the time includes every other middleware
+app.add_middleware(MetricsMiddleware)
 
-SECRET_KEY = "supersecretkey"
-ALGORITHM = "HS256"
-ACCESS_TOKEN_EXPIRE_MINUTES = 30
+MAX_BATCH_SIZE = 1000
+# Seconds a client should wait before retrying when the password hashing pool is saturated
+HASHING_RETRY_AFTER = 1
 
-def create_access_token(data: dict, expires_delta: timedelta = None):
-    to_encode = data.copy()
-    expire = datetime.now(timezone.utc) + (expires_delta or timedelta(minutes=15))
-    to_encode.update({"exp": expire})
-    return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+def hashing_busy_error() -> HTTPException:
+    return HTTPException(status_code=503, detail="Too many login attempts in progress, please retry.",
+                         headers={"Retry-After": str(HASHING_RETRY_AFTER)})
 
 def create_password_reset_token(email: str, expires_delta: timedelta = None):
     expire = datetime.now(timezone.utc) + (expires_delta or timedelta(minutes=15))
@@ -75,84 +115,162 @@ def validate_password_strength(password: str):
 def home():
     return {"message": "Fake News Detection API is Running!"}
 
+MAX_NEWS_PAGE_SIZE = 100
+
 @app.get("/news")
-def fetch_news():
+async def fetch_news(limit: int = 10, cursor: str = None, repo=Depends(get_repository)):
+    """One page of stored news, newest first; pass next_cursor back as cursor for the next page."""
+    if not 1 <= limit <= MAX_NEWS_PAGE_SIZE:
+        raise HTTPException(status_code=400, detail=f"limit must be between 1 and {MAX_NEWS_PAGE_SIZE}")
+    key = (limit, cursor)
+    page = news_page_cache.get(key)
+    if page is not None:
+        return page
     try:
-        return {"news": get_news()}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        page = await get_news(repo, limit=limit, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if "error" in page:
+        raise HTTPException(status_code=503, detail=page["error"])
+    news_page_cache.set(key, page)
+    return page
 
 @app.post("/fetch_rss")
-def fetch_rss():
+async def fetch_rss(repo=Depends(get_repository)):
     try:
-        fetch_rss_news()
-        return {"message": "RSS fetching triggered!"}
+        summary = await fetch_rss_news(repo)
+        return {"message": "RSS fetching triggered!", "summary": summary}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/rss/health")
+async def rss_health():
+    """Per-feed polling interval, lag, next run and failures of the feed scheduler."""
+    return feed_scheduler.health()
+
+def analysis_record(prediction_id: str, text: str, result: dict) -> dict:
+    """Build the analysis table row for a prediction result."""
+    return {
+        "analysis_id": prediction_id,
+        "text": text,
+        "prediction": result["prediction"],
+        "confidence": result["confidence"],
+        "model_version": result["model_version"]
+    }
+
 @app.post("/predict")
-def predict(data: NewsText):
-    """Predict whether a given news article is FAKE or REAL."""
+async def predict(data: NewsText, persist: bool = False):
+    """Predict whether a given news article is FAKE or REAL.
+
+    The analysis row is written in the background; with persist=true it is
+    stored before the response, so its predictionId can be rated at once
+    through any worker.
+    """
     try:
-        prediction_id = str(uuid4())
-        result = predict_fake_news(data.text)
+        # Concurrent requests are scored together by the micro-batcher
+        result = await prediction_batcher.predict(data.text)
+        if "error" in result:
+            raise HTTPException(status_code=400, detail=result["error"])
 
-        # Store the analysis result in the database
-        store_analysis(
-            prediction_id=prediction_id,
-            text=data.text,
-            prediction=result["prediction"],
-            confidence=result["confidence"]
-        )
+        # Every request gets its own analysis row, cached verdict or not, so feedback is per request
+        prediction_id = str(uuid4())
+        # The analysis row is written in the background, in bulk with other requests
+        analysis_writer.submit(analysis_record(prediction_id, data.text, result))
+        if persist and not await analysis_writer.ensure_written(prediction_id, timeout=0):
+            raise HTTPException(status_code=503, detail="The analysis could not be stored, please retry.")
 
         return {
             "predictionId": prediction_id,
             "prediction": result["prediction"],
-            "confidence": result["confidence"]
+            "confidence": result["confidence"],
+            "modelVersion": result["model_version"]
         }
 
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Prediction error: {e}")
         raise HTTPException(status_code=400, detail=str(e))
-    
+
+@app.get("/predict/stats")
+def predict_stats():
+    """Report the served model version and the batching, cache, analysis writer and news classifier statistics."""
+    return {
+        "model_version": model_manager.current.version,
+        "batching": prediction_batcher.stats(),
+        "cache": prediction_cache.stats(),
+        "analysis_writer": analysis_writer.stats(),
+        "news_classifier": news_classifier.stats()
+    }
+
+@app.post("/predict/batch")
+async def predict_batch(data: NewsBatch):
+    """Predict a list of news articles in one pass; the analyses are stored in the background."""
+    if not data.texts:
+        raise HTTPException(status_code=400, detail="No texts provided")
+    if len(data.texts) > MAX_BATCH_SIZE:
+        raise HTTPException(status_code=400, detail=f"Batch size must not exceed {MAX_BATCH_SIZE} texts.")
+
+    try:
+        results = await run_in_threadpool(predict_fake_news_batch, data.texts)
+
+        response = []
+        for text, result in zip(data.texts, results):
+            if "error" in result:
+                response.append({"error": result["error"]})
+                continue
+            prediction_id = str(uuid4())
+            analysis_writer.submit(analysis_record(prediction_id, text, result))
+            response.append({
+                "predictionId": prediction_id,
+                "prediction": result["prediction"],
+                "confidence": result["confidence"],
+                "modelVersion": result["model_version"]
+            })
+
+        return {"results": response}
+
+    except Exception as e:
+        logger.error(f"Batch prediction error: {e}")
+        raise HTTPException(status_code=400, detail=str(e))
+
 @app.post("/auth/register", response_model=TokenWithUser)
-def register(user: UserCreate):
+async def register(user: UserCreate, repo=Depends(get_repository)):
     try:
         
         validate_password_strength(user.password)
 
-        existing_user = supabase.table("users").select("*").eq("email", user.email).execute()
-        if existing_user.data:
-            raise HTTPException(status_code=400, detail="Email is already registered.")
-
-        result = create_user(user)
+        # One insert: duplicates are rejected by the unique email constraint
+        # and the new row (with its DB id) comes back from the same statement
+        result = await create_user(repo, user)
         if "error" in result:
             raise HTTPException(status_code=400, detail=result["error"])
+        user_row = result["user"]
 
-        # Fetch the newly created user to get the DB id
-        user_row = supabase.table("users").select("id, name, email").eq("email", user.email).single().execute()
-        if not user_row.data:
-            raise HTTPException(status_code=500, detail="User creation failed (no user row)")
-
-        token = create_access_token({"sub": user.email})
+        token = create_access_token({"sub": user.email, "uid": str(user_row["id"])})
         return {
             "access_token": token,
             "token_type": "bearer",
             "user": {
-                "id": str(user_row.data["id"]),
-                "name": user_row.data["name"],
-                "email": user_row.data["email"]
+                "id": str(user_row["id"]),
+                "name": user_row["name"],
+                "email": user_row["email"]
             }
         }
     except HTTPException:
         raise
+    except PasswordHasherBusy:
+        raise hashing_busy_error()
     except Exception as e:
         logger.error(f"Registration failed: {e}")
         raise HTTPException(status_code=500, detail="Registration failed")
 
 @app.post("/auth/login", response_model=TokenWithUser)
-def login_user(form_data: OAuth2PasswordRequestForm = Depends()):
-    user, error = verify_user(form_data.username, form_data.password)
+async def login_user(form_data: OAuth2PasswordRequestForm = Depends(), repo=Depends(get_repository)):
+    try:
+        user, error = await verify_user(repo, form_data.username, form_data.password)
+    except PasswordHasherBusy:
+        raise hashing_busy_error()
 
     if error == "User does not exist":
         raise HTTPException(status_code=404, detail="User does not exist")
@@ -161,7 +279,7 @@ def login_user(form_data: OAuth2PasswordRequestForm = Depends()):
     elif error:  # unexpected db errors
         raise HTTPException(status_code=400, detail=error)
 
-    access_token = create_access_token(data={"sub": user["email"]})
+    access_token = create_access_token(data={"sub": user["email"], "uid": str(user["id"])})
     return {
         "access_token": access_token,
         "token_type": "bearer",
@@ -173,54 +291,81 @@ def login_user(form_data: OAuth2PasswordRequestForm = Depends()):
     }
 
 @app.post("/feedback")
-def receive_feedback(feedback: FeedbackInput, request: Request):
-    token = request.headers.get("authorization", "").replace("Bearer ", "")
-    logger.info(f"Received token: {token}")
-    if not token:
-        raise HTTPException(status_code=401, detail="Unauthorized")
-
+async def receive_feedback(feedback: FeedbackInput, user: Principal = Depends(get_current_user),
+                           repo=Depends(get_repository)):
+    """Rate an analysis. 404 when it is not stored: a prediction made by another worker is only
+    guaranteed to be stored once its /predict returned, when that was called with persist=true."""
+    # The rated analysis may still be waiting in this worker's write-behind buffer
+    await analysis_writer.ensure_written(feedback.analysis_id)
+    result = await store_feedback(repo, feedback, user.email, user_id=user.user_id)
+    if result.get("error") == "Analysis not found":
+        raise HTTPException(status_code=404, detail=result["error"])
+    if "error" in result:
+        raise HTTPException(status_code=400, detail=result["error"])
+    return result
+
+@app.get("/metrics")
+def prometheus_metrics():
+    """Request, prediction stage, database and RSS metrics of this worker in the Prometheus text format."""
+    return Response(metrics.render(), media_type=METRICS_CONTENT_TYPE)
+
+def require_profiling_admin(token: str):
+    if not request_profiler.authorized(token):
+        raise HTTPException(status_code=403, detail="A valid X-Profile token is required.")
+
+@app.get("/admin/profiling")
+def profiling_status(x_profile: str = Header(None)):
+    require_profiling_admin(x_profile)
+    return request_profiler.stats()
+
+@app.post("/admin/profiling")
+def set_profiling(data: ProfilingToggle, x_profile: str = Header(None)):
+    """Change the fraction of requests profiled without an X-Profile header (0 turns sampling off)."""
+    require_profiling_admin(x_profile)
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        logger.info(f"Decoded payload: {payload}")
-        email = payload.get("sub")
-        if not email:
-            raise HTTPException(status_code=401, detail="Invalid token payload")
-        result = store_feedback(feedback, email)
-        if "error" in result:
-            raise HTTPException(status_code=400, detail=result["error"])
-        return result
+        request_profiler.set_sample_rate(data.sample_rate)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return request_profiler.stats()
 
-    except ExpiredSignatureError:
-        logger.error("Token expired")
-        raise HTTPException(status_code=401, detail="Token expired")
+@app.get("/auth/stats")
+def auth_stats():
+    """Report the verified-token cache and password hashing pool statistics."""
+    return {
+        "token_cache": token_cache.stats(),
+        "password_hashing": password_hasher.stats()
+    }
 
-    except JWTError as e:
-        logger.error(f"JWT error: {e}")
-        raise HTTPException(status_code=401, detail="Invalid token")
-    
 @app.post("/auth/reset-password")
-def reset_password(data: PasswordResetConfirm):
+async def reset_password(data: PasswordResetConfirm, repo=Depends(get_repository)):
     email = verify_password_reset_token(data.token)
     if not email:
         raise HTTPException(status_code=400, detail="Invalid reset token")
 
     # hash new password
-    hashed = bcrypt.hashpw(data.new_password.encode(), bcrypt.gensalt()).decode()
+    try:
+        hashed = await password_hasher.hash(data.new_password)
+    except PasswordHasherBusy:
+        raise hashing_busy_error()
 
     # update Supabase users table
-    result = supabase.table("users").update({"password": hashed}).eq("email", email).execute()
-    if not result.data:
+    try:
+        updated = await update_password(repo, email, hashed)
+    except RepositoryError as e:
+        logger.error(f"Password update failed: {e}")
+        updated = []
+    if not updated:
         raise HTTPException(status_code=500, detail="Password update failed")
 
     return {"message": "Password reset successful"}
 
 @app.post("/auth/request-password-reset")
-async def request_password_reset(data: PasswordResetRequest):
+async def request_password_reset(data: PasswordResetRequest, repo=Depends(get_repository)):
     try:
         logger.info(f" Request received for password reset: {data.email}")
 
-        user = supabase.table("users").select("id, email").eq("email", data.email).execute()
-        if not user.data:
+        user = await find_user(repo, data.email, columns="id, email")
+        if not user:
             logger.info(f"No user found with email {data.email}, returning generic response")
             return {"message": "If that email exists, a reset link has been sent."}
 
@@ -0,0 +1,247 @@
+import time
+import threading
+from bisect import bisect_left
+
+# Latency buckets in seconds, from sub-millisecond prediction stages up to slow feed downloads
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+class _CounterValue:
+    __slots__ = ("value", "_lock")
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0):
+        with self._lock:
+            self.value += amount
+
+class _GaugeValue(_CounterValue):
+    __slots__ = ()
+
+    def set(self, value: float):
+        self.value = value
+
+class _HistogramValue:
+    __slots__ = ("bounds", "counts", "sum", "_lock")
+
+    def __init__(self, bounds: tuple):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # the last slot is +Inf
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        i = bisect_left(self.bounds, value)  # buckets are inclusive: value <= le
+        with self._lock:
+            self.counts[i] += 1
+            self.sum += value
+
+    def time(self) -> "_Timer":
+        return _Timer(self)
+
+class _Timer:
+    """Context manager observing the seconds its block took."""
+    __slots__ = ("histogram", "start")
+
+    def __init__(self, histogram: _HistogramValue):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start)
+
+class Metric:
+    """A named metric with one value per combination of label values.
+
+    labels() returns the child for some label values; hot paths should
+    look it up once and keep it, so an update is a list index and a lock.
+    """
+
+    type = None
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}  # label values as strings -> child
+        self._lookup = {}  # label values as passed (e.g. an int status) -> child
+        self._lock = threading.Lock()
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values):
+        child = self._lookup.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} takes labels {self.labelnames}, got {values}")
+            with self._lock:
+                child = self._children.setdefault(tuple(map(str, values)), self._new_child())
+                self._lookup[values] = child
+        return child
+
+    def clear(self):
+        with self._lock:
+            self._children.clear()
+            self._lookup.clear()
+
+    def _label_text(self, values: tuple, extra: tuple = ()) -> str:
+        pairs = [f'{name}="{_escape(value)}"' for name, value in zip(self.labelnames, values)]
+        pairs.extend(f'{name}="{value}"' for name, value in extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+    def samples(self, values: tuple, child) -> list[str]:
+        raise NotImplementedError
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+        with self._lock:
+            children = list(self._children.items())
+        for values, child in children:
+            lines.extend(self.samples(values, child))
+        return lines
+
+class Counter(Metric):
+    type = "counter"
+
+    def _new_child(self):
+        return _CounterValue()
+
+    def inc(self, amount: float = 1.0):
+        """Increment the unlabelled value."""
+        self.labels().inc(amount)
+
+    def samples(self, values, child):
+        return [f"{self.name}{self._label_text(values)} {_format(child.value)}"]
+
+class Gauge(Counter):
+    type = "gauge"
+
+    def _new_child(self):
+        return _GaugeValue()
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = (), buckets: tuple = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self):
+        return _HistogramValue(self.buckets)
+
+    def samples(self, values, child):
+        with child._lock:
+            counts, total = list(child.counts), child.sum
+        lines, cumulative = [], 0
+        for bound, count in zip(self.buckets + (float("inf"),), counts):
+            cumulative += count
+            lines.append(f"{self.name}_bucket{self._label_text(values, (('le', _format(bound)),))} {cumulative}")
+        lines.append(f"{self.name}_sum{self._label_text(values)} {_format(total)}")
+        lines.append(f"{self.name}_count{self._label_text(values)} {cumulative}")
+        return lines
+
+class MetricsRegistry:
+    """The process's metrics, rendered in the Prometheus text format by GET /metrics.
+
+    Each worker process keeps its own values; Prometheus adds them up
+    across the scraped workers.
+    """
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _register(self, cls, name: str, *args, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, *args, **kwargs)
+            elif type(metric) is not cls:
+                raise ValueError(f"Metric {name} is already registered as a {metric.type}")
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: tuple = ()) -> Counter:
+        return self._register(Counter, name, documentation, labelnames)
+
+    def gauge(self, name: str, documentation: str, labelnames: tuple = ()) -> Gauge:
+        return self._register(Gauge, name, documentation, labelnames)
+
+    def histogram(self, name: str, documentation: str, labelnames: tuple = (),
+                  buckets: tuple = LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+metrics = MetricsRegistry()
+
+http_requests = metrics.counter(
+    "http_requests_total", "HTTP requests by method, route template and status code.", ("method", "route", "status"))
+http_request_duration = metrics.histogram(
+    "http_request_duration_seconds", "Time to answer an HTTP request, by method and route template.",
+    ("method", "route"))
+predict_stage_duration = metrics.histogram(
+    "predict_stage_duration_seconds",
+    "Time per prediction stage for one scored batch (clean_text, vectorize, score) "
+    "or one bulk analysis write (store_analysis).", ("stage",))
+db_requests = metrics.counter(
+    "db_requests_total", "Database round trips by HTTP method, table and outcome.", ("method", "table", "outcome"))
+db_request_duration = metrics.histogram(
+    "db_request_duration_seconds", "Database round-trip time by HTTP method and table.", ("method", "table"))
+rss_fetches = metrics.counter(
+    "rss_fetches_total", "RSS feed downloads by feed and outcome (ok, not_modified, error).", ("feed", "status"))
+rss_fetch_bytes = metrics.counter(
+    "rss_fetch_bytes_total", "Bytes of RSS feed documents downloaded, by feed.", ("feed",))
+rss_fetch_duration = metrics.histogram(
+    "rss_fetch_duration_seconds", "Time to download an RSS feed, by feed.", ("feed",))
+model_info = metrics.gauge("model_info", "The model version being served (the value is always 1).", ("version",))
+
+class MetricsMiddleware:
+    """ASGI middleware recording every HTTP request in http_requests and http_request_duration.
+
+    Requests are labelled with the route template (/news, not /news?cursor=...)
+    so the number of series stays bounded; paths matching no route are "unmatched".
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        start = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = scope.get("route")
+            path = getattr(route, "path", None) or "unmatched"
+            http_request_duration.labels(scope["method"], path).observe(time.perf_counter() - start)
+            http_requests.labels(scope["method"], path, status).inc()
@@ -0,0 +1,209 @@
+import os
+import json
+import shutil
+import logging
+import tempfile
+from datetime import datetime, timezone
+
+import joblib
+import numpy as np
+
+from backend.linear_model import LinearTextScorer, export_linear_model
+from backend.prediction_cache import fingerprint_files
+from backend.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Versioned model artifacts live in <REGISTRY_DIR>/<version>/, described by manifest.json
+REGISTRY_DIR = settings.model_registry
+MANIFEST_FILE = "manifest.json"
+PIPELINE_FILE = "fake_news_model.pkl"
+LINEAR_DIR = "fake_news_linear"
+
+# Artifacts used before the registry existed; served when no manifest is present
+LEGACY_MODEL_PATH = "backend/fake_news_model.pkl"
+LEGACY_LINEAR_MODEL_PATH = "backend/fake_news_linear"
+LEGACY_THRESHOLD_PATH = "models/decision_threshold.pkl"
+DEFAULT_THRESHOLD = 0.5
+
+def load_decision_threshold(path: str = LEGACY_THRESHOLD_PATH) -> float:
+    """Load the tuned FAKE threshold, falling back to 0.5 if it is unavailable."""
+    if not os.path.exists(path):
+        logger.warning(f"Decision threshold not found at {path}, using {DEFAULT_THRESHOLD}")
+        return DEFAULT_THRESHOLD
+    try:
+        threshold = joblib.load(path)
+        if isinstance(threshold, dict):
+            threshold = threshold["threshold"]
+        threshold = float(threshold)
+    except Exception as e:
+        logger.warning(f"Could not load decision threshold from {path}: {e}. Using {DEFAULT_THRESHOLD}")
+        return DEFAULT_THRESHOLD
+    if not 0.0 < threshold < 1.0:
+        logger.warning(f"Decision threshold {threshold} is out of range, using {DEFAULT_THRESHOLD}")
+        return DEFAULT_THRESHOLD
+    return threshold
+
+class LoadedModel:
+    """One model version ready for inference, together with its decision threshold."""
+
+    def __init__(self, version: str, threshold: float, scorer=None, pipeline=None):
+        if scorer is None and pipeline is None:
+            raise ValueError("A loaded model needs a scorer or a pipeline")
+        self.version = version
+        self.threshold = threshold
+        self.scorer = scorer
+        self.pipeline = pipeline
+
+    def vectorize(self, cleaned_texts: list[str]):
+        """Turn already cleaned texts into the features score() takes."""
+        if self.scorer is not None:
+            return self.scorer.vectorize(cleaned_texts)
+        return self.pipeline[:-1].transform(cleaned_texts)
+
+    def score(self, features) -> np.ndarray:
+        """Return P(FAKE) for features from vectorize()."""
+        if self.scorer is not None:
+            return self.scorer.fake_proba(features)
+        estimator = self.pipeline[-1]
+        if hasattr(estimator, "predict_proba"):
+            fake_index = list(estimator.classes_).index(1)
+            return estimator.predict_proba(features)[:, fake_index]
+        scores = estimator.decision_function(features)
+        return 1 / (1 + np.exp(-scores))
+
+    def predict_fake_proba(self, cleaned_texts: list[str]) -> np.ndarray:
+        """Return P(FAKE) for already cleaned texts, running the model once."""
+        return self.score(self.vectorize(cleaned_texts))
+
+class ModelArtifacts:
+    """File locations of one model version."""
+
+    def __init__(self, version: str, pipeline_path: str, linear_path: str, threshold: float):
+        self.version = version
+        self.pipeline_path = pipeline_path
+        self.linear_path = linear_path
+        self.threshold = threshold
+
+    def load(self) -> LoadedModel:
+        """Load the memory-mapped linear scorer if exported, else unpickle the pipeline."""
+        if os.path.isdir(self.linear_path):
+            # Workers share the page-cached arrays instead of each unpickling the pipeline
+            return LoadedModel(self.version, self.threshold, scorer=LinearTextScorer.load(self.linear_path))
+        if os.path.exists(self.pipeline_path):
+            return LoadedModel(self.version, self.threshold, pipeline=joblib.load(self.pipeline_path))
+        raise FileNotFoundError(f"Model file not found: {self.pipeline_path}")
+
+class ModelRegistry:
+    """Directory of versioned model artifacts with a manifest naming the current one.
+
+    Layout:
+        <path>/manifest.json          {"current": "<version>", "versions": {...}}
+        <path>/<version>/fake_news_model.pkl
+        <path>/<version>/fake_news_linear/
+    The manifest is replaced atomically, so readers never see a partial update.
+    """
+
+    def __init__(self, path: str = REGISTRY_DIR):
+        self.path = path
+        self.manifest_path = os.path.join(path, MANIFEST_FILE)
+
+    def read_manifest(self):
+        """Return the parsed manifest, or None when the registry has not been created."""
+        if not os.path.exists(self.manifest_path):
+            return None
+        with open(self.manifest_path) as f:
+            return json.load(f)
+
+    def _write_manifest(self, manifest: dict):
+        os.makedirs(self.path, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.path, suffix=".json")
+        with os.fdopen(fd, "w") as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp_path, self.manifest_path)
+
+    def current_version(self):
+        """Return the version the manifest marks as current (None without a manifest)."""
+        manifest = self.read_manifest()
+        return manifest["current"] if manifest else None
+
+    def versions(self) -> list[str]:
+        manifest = self.read_manifest()
+        return list(manifest["versions"]) if manifest else []
+
+    def artifacts(self, version: str = None) -> ModelArtifacts:
+        """Return the artifact paths of version (default: current).
+
+        Without a manifest the legacy backend/fake_news_model.pkl artifacts are
+        used, versioned by a content hash.
+        """
+        manifest = self.read_manifest()
+        if manifest is None:
+            if version is not None:
+                raise KeyError(f"Model registry at {self.path} has no manifest")
+            fingerprint = fingerprint_files(LEGACY_MODEL_PATH, LEGACY_LINEAR_MODEL_PATH, LEGACY_THRESHOLD_PATH)
+            return ModelArtifacts(
+                f"legacy-{fingerprint}", LEGACY_MODEL_PATH, LEGACY_LINEAR_MODEL_PATH,
+                load_decision_threshold(LEGACY_THRESHOLD_PATH)
+            )
+
+        version = version or manifest["current"]
+        if version not in manifest["versions"]:
+            raise KeyError(f"Unknown model version: {version}")
+        entry = manifest["versions"][version]
+        version_dir = os.path.join(self.path, version)
+        return ModelArtifacts(
+            version,
+            os.path.join(version_dir, PIPELINE_FILE),
+            os.path.join(version_dir, LINEAR_DIR),
+            entry.get("threshold", DEFAULT_THRESHOLD)
+        )
+
+    def load(self, version: str = None) -> LoadedModel:
+        return self.artifacts(version).load()
+
+    def publish(self, pipeline, threshold: float = None, metrics: dict = None,
+                version: str = None, activate: bool = True) -> str:
+        """Store a fitted pipeline as a new version and optionally make it current.
+
+        The artifacts are written to a temporary directory and renamed into
+        place before the manifest is updated, so a running API only ever sees
+        complete versions.
+        """
+        version = version or datetime.now(timezone.utc).strftime("%Y%m%d-%H%M%S")
+        version_dir = os.path.join(self.path, version)
+        if os.path.exists(version_dir):
+            raise FileExistsError(f"Model version already exists: {version}")
+
+        os.makedirs(self.path, exist_ok=True)
+        tmp_dir = tempfile.mkdtemp(dir=self.path, prefix=f".{version}-")
+        try:
+            joblib.dump(pipeline, os.path.join(tmp_dir, PIPELINE_FILE))
+            export_linear_model(pipeline, os.path.join(tmp_dir, LINEAR_DIR))
+            os.rename(tmp_dir, version_dir)
+        except Exception:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+
+        manifest = self.read_manifest() or {"current": None, "versions": {}}
+        manifest["versions"][version] = {
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "threshold": threshold if threshold is not None else load_decision_threshold(),
+            "metrics": metrics or {},
+        }
+        if activate or manifest["current"] is None:
+            manifest["current"] = version
+        self._write_manifest(manifest)
+        logger.info(f"Published model version {version} to {self.path}" + (" (current)" if activate else ""))
+        return version
+
+    def activate(self, version: str):
+        """Make an already published version current (e.g. to roll back)."""
+        manifest = self.read_manifest()
+        if manifest is None or version not in manifest["versions"]:
+            raise KeyError(f"Unknown model version: {version}")
+        manifest["current"] = version
+        self._write_manifest(manifest)
+        logger.info(f"Activated model version {version}")
+
+registry = ModelRegistry()
@@ -0,0 +1,90 @@
+import os
+import json
+import time
+import shutil
+import logging
+import resource
+import tempfile
+from datetime import datetime, timezone
+
+from joblib import Memory
+from sklearn.base import clone
+from sklearn.experimental import enable_halving_search_cv  # noqa: F401
+from sklearn.model_selection import GridSearchCV, HalvingGridSearchCV, ParameterGrid
+from backend.config import settings
+
+logger = logging.getLogger(__name__)
+
+SEARCH_MODES = ("exhaustive", "halving")
+# Search reports are written to <SEARCH_REPORT_DIR>/<mode>-<timestamp>.json
+SEARCH_REPORT_DIR = settings.get("SEARCH_REPORT_DIR", "models/search_reports")
+
+def peak_rss_mb() -> float:
+    """Peak resident memory of this process and its finished children, in MiB."""
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return max(own, children) / 1024  # ru_maxrss is in kB on Linux
+
+def make_search(mode: str, pipeline, param_grid: dict, cv: int = 5, n_jobs: int = -1, verbose: int = 0):
+    """Build the hyperparameter search for mode.
+
+    "exhaustive" fits every configuration on every fold. "halving" runs
+    successive halving over the training-set size: all configurations
+    start on a small sample, and only the best third of them moves on to
+    three times as many samples, until the survivors see the whole set.
+    """
+    common = dict(cv=cv, n_jobs=n_jobs, verbose=verbose, scoring="accuracy", refit=False)
+    if mode == "exhaustive":
+        return GridSearchCV(pipeline, param_grid, **common)
+    if mode == "halving":
+        return HalvingGridSearchCV(
+            pipeline, param_grid, factor=3, resource="n_samples",
+            min_resources="exhaust", random_state=42, **common
+        )
+    raise ValueError(f"Unknown search mode: {mode} (expected one of {SEARCH_MODES})")
+
+def run_search(mode: str, pipeline, param_grid: dict, X, y, cv: int = 5, n_jobs: int = -1, verbose: int = 0):
+    """Run the search and return it together with a report of its cost and result.
+
+    Fitted pipeline steps are cached for the duration of the search, so
+    configurations that only differ in later steps (e.g. the classifier's C)
+    reuse the vectorizer fitted on the same fold.
+    """
+    cache_dir = tempfile.mkdtemp(prefix="search-steps-")
+    try:
+        pipeline = clone(pipeline).set_params(memory=Memory(cache_dir, verbose=0))
+        search = make_search(mode, pipeline, param_grid, cv=cv, n_jobs=n_jobs, verbose=verbose)
+        start = time.perf_counter()
+        search.fit(X, y)
+        elapsed = time.perf_counter() - start
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+    results = search.cv_results_
+    report = {
+        "mode": mode,
+        "finished_at": datetime.now(timezone.utc).isoformat(),
+        "wall_clock_seconds": round(elapsed, 2),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        "n_candidates": len(ParameterGrid(param_grid)),
+        # Halving lists a candidate once per round it took part in
+        "n_fits": len(results["params"]) * cv,
+        # Fits weighted by the samples they were given: the budget halving saves
+        "sample_fits": int(sum(results.get("n_resources", [len(X)] * len(results["params"])))) * cv,
+        "best_score": float(search.best_score_),
+        "best_params": {k: str(v) for k, v in search.best_params_.items()},
+    }
+    if mode == "halving":
+        report["n_resources"] = [int(n) for n in search.n_resources_]
+    logger.info(f"{mode} search finished in {elapsed:.1f}s, best score {search.best_score_:.4f}")
+    return search, report
+
+def write_search_report(report: dict, path: str = None) -> str:
+    """Write report as JSON (default: SEARCH_REPORT_DIR/<mode>-<timestamp>.json) and return the path."""
+    if path is None:
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%d-%H%M%S")
+        path = os.path.join(SEARCH_REPORT_DIR, f"{report['mode']}-{stamp}.json")
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2)
+    return path
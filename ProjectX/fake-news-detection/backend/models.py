@@ -1,31 +1,163 @@
-import os
-import joblib
+import time
+import logging
+import threading
 from backend.utils import clean_text
+from backend.model_registry import registry
+from backend.prediction_cache import PredictionCache, SQLiteCacheBackend, CACHE_SHARED_PATH
+from backend.config import settings
+from backend.metrics import predict_stage_duration, model_info
+from backend.profiling import profiled
 from pydantic import BaseModel, EmailStr
 
-# Load model
-MODEL_PATH = "backend/fake_news_model.pkl"
-if not os.path.exists(MODEL_PATH):
-    raise FileNotFoundError(f"Model file not found: {MODEL_PATH}")
-
-model = joblib.load(MODEL_PATH)
+logger = logging.getLogger(__name__)
+
+# How often the background watcher checks the registry manifest for a new version
+MODEL_RELOAD_INTERVAL = settings.get_float("MODEL_RELOAD_INTERVAL", 30)
+WARMUP_TEXT = "breaking news the senate passed the budget bill on tuesday"
+clean_text_stage = predict_stage_duration.labels("clean_text")
+vectorize_stage = predict_stage_duration.labels("vectorize")
+score_stage = predict_stage_duration.labels("score")
+
+class ModelManager:
+    """Serve the registry's current model and hot-swap it when the manifest changes.
+
+    A new version is loaded and warmed up with a prediction in the background;
+    only then is the reference swapped. Requests that already took the old
+    model finish with it, so no request is dropped during a reload.
+
+    Nothing is loaded on construction: the API lifespan calls load() before
+    serving, and anything else (scripts, tests) loads on first use of current.
+    """
+
+    def __init__(self, registry, cache: PredictionCache = None):
+        self.registry = registry
+        self.cache = cache
+        self._current = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def current(self):
+        if self._current is None:
+            self.load()
+        return self._current
+
+    def load(self):
+        """Load and warm up the registry's current version unless a model is already being served."""
+        with self._lock:
+            if self._current is None:
+                self._swap(self.registry.artifacts())
+        return self._current
+
+    def reload(self, version: str = None) -> bool:
+        """Load version (default: the manifest's current one) and swap it in if it is new."""
+        with self._lock:
+            artifacts = self.registry.artifacts(version)
+            if self._current is not None and artifacts.version == self._current.version:
+                return False
+            self._swap(artifacts)
+            return True
+
+    def _swap(self, artifacts):
+        candidate = artifacts.load()
+        candidate.predict_fake_proba([WARMUP_TEXT])  # warm-up: fault in the arrays before serving
+        previous, self._current = self._current, candidate
+        if self.cache is not None:
+            self.cache.set_model_version(candidate.version)
+        model_info.clear()
+        model_info.labels(candidate.version).set(1)
+        if previous is None:
+            logger.info(f"Serving model version {candidate.version}")
+        else:
+            logger.info(f"Swapped model version {previous.version} -> {candidate.version}")
+
+    def _watch(self, interval: float):
+        while not self._stop.wait(interval):
+            try:
+                version = self.registry.current_version()
+                if version and version != self.current.version:
+                    self.reload(version)
+            except Exception as e:
+                logger.error(f"Model reload failed, still serving {self.current.version}: {e}")
+
+    def start_watching(self, interval: float = MODEL_RELOAD_INTERVAL):
+        """Start the background thread that picks up newly activated versions."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._watch, args=(interval,), daemon=True, name="model-reloader")
+        self._thread.start()
+
+    def stop_watching(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+# Cached predictions are keyed by the model version, so a new version invalidates them;
+# the version is set when the model manager loads its first model
+prediction_cache = PredictionCache(
+    None,
+    backend=SQLiteCacheBackend(CACHE_SHARED_PATH) if CACHE_SHARED_PATH else None
+)
+model_manager = ModelManager(registry, prediction_cache)
+
+def _to_result(proba_fake: float, loaded):
+    is_fake = proba_fake >= loaded.threshold
+    confidence = proba_fake if is_fake else 1 - proba_fake
+    return {
+        "prediction": "FAKE" if is_fake else "REAL",
+        "confidence": round(float(confidence), 4),
+        "model_version": loaded.version
+    }
 
 def predict_fake_news(text: str):
     """Predict if a news article is Fake or Real."""
-    if not text.strip():
-        return {"error": "No text provided"}
-
-    text = clean_text(text)  # Clean before prediction
-    prediction = model.predict([text])[0]
-
-    confidence = None
-    if hasattr(model, "predict_proba"):
-        confidence = model.predict_proba([text])[0][prediction]
-
-    return {
-        "prediction": "FAKE" if prediction == 1 else "REAL",
-        "confidence": round(confidence, 4) if confidence else "N/A"
-    }
+    return predict_fake_news_batch([text])[0]
+
+@profiled
+def predict_fake_news_batch(texts: list[str]):
+    """Predict a list of news articles in one vectorized pass.
+
+    All non-empty texts are cleaned and looked up in the prediction cache;
+    the misses are scored together as a single sparse matrix. Results are
+    returned in input order and carry the model_version that produced them
+    and whether they came from the cache; empty texts get an error entry. The time spent cleaning,
+    vectorizing and scoring is recorded in predict_stage_duration_seconds.
+    """
+    # Score the whole batch with one model, even if a reload happens meanwhile
+    loaded = model_manager.current
+    results = [{"error": "No text provided"} for _ in texts]
+    start = time.perf_counter()
+    cleaned_texts = [clean_text(text) if text.strip() else None for text in texts]  # Clean before prediction
+    clean_text_stage.observe(time.perf_counter() - start)
+
+    misses = {}
+    for i, cleaned in enumerate(cleaned_texts):
+        if cleaned is None:
+            continue
+        key = prediction_cache.key(cleaned, loaded.version)
+        cached = prediction_cache.get(key)
+        if cached is not None:
+            results[i] = {**cached, "cached": True}
+        else:
+            misses.setdefault(cleaned, []).append(i)
+
+    if misses:
+        start = time.perf_counter()
+        features = loaded.vectorize(list(misses))
+        vectorized = time.perf_counter()
+        probas = loaded.score(features)
+        vectorize_stage.observe(vectorized - start)
+        score_stage.observe(time.perf_counter() - vectorized)
+        for cleaned, proba_fake in zip(misses, probas):
+            result = _to_result(proba_fake, loaded)
+            key = prediction_cache.key(cleaned, loaded.version)
+            prediction_cache.set(key, result)
+            for i in misses[cleaned]:
+                results[i] = {**result, "cached": False}
+    return results
 
 # Test Example
 if __name__ == "__main__":
@@ -60,6 +192,12 @@ class FeedbackInput(BaseModel):
 class NewsText(BaseModel):
     text: str
 
+class NewsBatch(BaseModel):
+    texts: list[str]
+
+class ProfilingToggle(BaseModel):
+    sample_rate: float
+
 class PasswordResetRequest(BaseModel):
     email: EmailStr
 
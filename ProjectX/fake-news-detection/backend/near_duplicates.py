@@ -0,0 +1,210 @@
+import os
+import sqlite3
+import hashlib
+import logging
+import threading
+from functools import lru_cache
+
+import numpy as np
+
+from backend.text_normalization import clean_text
+from backend.config import settings
+
+logger = logging.getLogger(__name__)
+
+# SQLite file holding signatures and LSH buckets between runs
+NEAR_DUP_INDEX_PATH = settings.get("NEAR_DUP_INDEX_PATH", "models/near_duplicates.sqlite")
+# Estimated Jaccard similarity of the shingle sets above which two articles are copies
+NEAR_DUP_THRESHOLD = settings.get_float("NEAR_DUP_THRESHOLD", 0.8)
+NEAR_DUP_NUM_PERM = settings.get_int("NEAR_DUP_NUM_PERM", 128)
+# Length in bytes (at most 8) of the shingles taken from the cleaned text
+NEAR_DUP_SHINGLE_SIZE = settings.get_int("NEAR_DUP_SHINGLE_SIZE", 5)
+# SQLite page cache; bucket inserts hit random pages, so the default 2 MB thrashes past ~100k articles
+NEAR_DUP_CACHE_MB = settings.get_int("NEAR_DUP_CACHE_MB", 64)
+
+@lru_cache(maxsize=None)
+def lsh_bands(threshold: float, num_perm: int) -> tuple[int, int]:
+    """Pick (bands, rows) for num_perm hashes minimizing false positives plus false negatives at threshold.
+
+    Two signatures share a bucket with probability 1 - (1 - s**rows)**bands
+    for similarity s; this is the S-curve whose step is moved to threshold.
+    """
+    s = np.linspace(0, 1, 501)
+    below, above = s <= threshold, s >= threshold
+    best, best_error = (1, num_perm), float("inf")
+    for bands in range(1, num_perm + 1):
+        for rows in range(1, num_perm // bands + 1):
+            candidate = 1 - (1 - s ** rows) ** bands
+            error = np.trapezoid(candidate[below], s[below]) + np.trapezoid(1 - candidate[above], s[above])
+            if error < best_error:
+                best, best_error = (bands, rows), error
+    return best
+
+class NearDuplicateIndex:
+    """MinHash + LSH index of news articles, kept in SQLite.
+
+    Each article's cleaned text is cut into overlapping byte shingles and
+    reduced to a num_perm MinHash signature. The signature is split into bands, and
+    every band is hashed to a bucket. Articles sharing any bucket are
+    candidates; a candidate whose estimated Jaccard similarity reaches
+    threshold is a near-duplicate. The band layout follows from threshold
+    (see lsh_bands).
+
+    Articles are keyed by link, so a link can be assigned before its news
+    row (and id) exists. assign() links an article to the canonical copy
+    of its closest match, or to itself when nothing matches. An index file built with different parameters is
+    discarded and rebuilt. Calls are serialized, so one index can be used
+    from worker threads.
+    """
+
+    def __init__(self, path: str = NEAR_DUP_INDEX_PATH, threshold: float = NEAR_DUP_THRESHOLD,
+                 num_perm: int = NEAR_DUP_NUM_PERM, shingle_size: int = NEAR_DUP_SHINGLE_SIZE, seed: int = 1):
+        if not 0 < threshold <= 1:
+            raise ValueError("threshold must be in (0, 1]")
+        if not 1 <= shingle_size <= 8:
+            raise ValueError("shingle_size must be between 1 and 8 bytes")
+        self.path = path
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self.bands, self.rows = lsh_bands(threshold, num_perm)
+        # Multiply-shift hashing: the top 32 bits of a*x + b (mod 2**64) for odd a
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(0, 2**64 - 1, num_perm, dtype=np.uint64, endpoint=True) | np.uint64(1)
+        self._b = rng.integers(0, 2**64 - 1, num_perm, dtype=np.uint64, endpoint=True)
+        self._lock = threading.Lock()
+        self._db = None
+        self.queries = 0
+        self.matches = 0
+
+    @property
+    def params(self) -> dict:
+        return {"threshold": self.threshold, "num_perm": self.num_perm, "shingle_size": self.shingle_size,
+                "bands": self.bands, "rows": self.rows}
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._db is not None:
+            return self._db
+        if os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        db = sqlite3.connect(self.path, check_same_thread=False)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        db.execute(f"PRAGMA cache_size=-{NEAR_DUP_CACHE_MB * 1024}")
+        db.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        stored = dict(db.execute("SELECT key, value FROM meta"))
+        expected = {key: str(value) for key, value in self.params.items()}
+        if stored and stored != expected:
+            logger.warning(f"Near-duplicate index {self.path} was built with {stored}, rebuilding with {expected}")
+            db.executescript("DROP TABLE IF EXISTS documents; DROP TABLE IF EXISTS buckets; DELETE FROM meta;")
+        db.executescript("""
+            CREATE TABLE IF NOT EXISTS documents (
+                doc_id INTEGER PRIMARY KEY,
+                link TEXT NOT NULL UNIQUE,
+                canonical_link TEXT NOT NULL,
+                signature BLOB NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS buckets (
+                bucket INTEGER NOT NULL,
+                doc_id INTEGER NOT NULL,
+                PRIMARY KEY (bucket, doc_id)
+            ) WITHOUT ROWID;
+        """)
+        db.executemany("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", expected.items())
+        db.commit()
+        self._db = db
+        return db
+
+    def signature(self, text: str):
+        """MinHash signature (uint32 array) of text, or None when it has no content."""
+        cleaned = clean_text(text)
+        if not cleaned:
+            return None
+        data = np.frombuffer(cleaned.encode("utf-8"), dtype=np.uint8).astype(np.uint64)
+        # Each k-byte window packed into one integer is its own (collision-free) shingle id
+        k = min(self.shingle_size, len(data))
+        windows = len(data) - k + 1
+        shingles = np.zeros(windows, dtype=np.uint64)
+        for j in range(k):
+            shingles |= data[j:j + windows] << np.uint64(8 * j)
+        shingles = np.unique(shingles)
+        return ((np.multiply.outer(shingles, self._a) + self._b) >> np.uint64(32)).min(axis=0).astype(np.uint32)
+
+    def _buckets(self, signature) -> list[int]:
+        keys = []
+        for band in range(self.bands):
+            chunk = signature[band * self.rows:(band + 1) * self.rows]
+            digest = hashlib.blake2b(chunk.tobytes(), digest_size=8, salt=band.to_bytes(16, "little")).digest()
+            keys.append(int.from_bytes(digest, "little", signed=True))
+        return keys
+
+    def _query(self, db, signature, buckets):
+        placeholders = ",".join("?" * len(buckets))
+        candidates = db.execute(
+            f"SELECT DISTINCT d.link, d.canonical_link, d.signature FROM buckets b "
+            f"JOIN documents d ON d.doc_id = b.doc_id WHERE b.bucket IN ({placeholders})", buckets).fetchall()
+        best = None
+        for link, canonical_link, stored in candidates:
+            similarity = float(np.mean(np.frombuffer(stored, dtype=np.uint32) == signature))
+            if similarity >= self.threshold and (best is None or similarity > best[2]):
+                best = (link, canonical_link, similarity)
+        return best
+
+    def query(self, text: str):
+        """Return (link, canonical_link, similarity) of the closest stored near-duplicate, or None."""
+        signature = self.signature(text)
+        if signature is None:
+            return None
+        with self._lock:
+            self.queries += 1
+            return self._query(self._connect(), signature, self._buckets(signature))
+
+    def assign_many(self, articles: list[tuple[str, str]]) -> dict:
+        """Index (link, text) articles in one transaction; returns {link: canonical_link}.
+
+        Later articles in the list can match earlier ones. Links already in
+        the index keep the canonical they were given before.
+        """
+        canonical = {}
+        with self._lock:
+            db = self._connect()
+            with db:
+                for link, text in articles:
+                    known = db.execute("SELECT canonical_link FROM documents WHERE link = ?", (link,)).fetchone()
+                    if known:
+                        canonical[link] = known[0]
+                        continue
+                    signature = self.signature(text)
+                    if signature is None:
+                        canonical[link] = link
+                        continue
+                    buckets = self._buckets(signature)
+                    self.queries += 1
+                    match = self._query(db, signature, buckets)
+                    if match:
+                        self.matches += 1
+                    canonical[link] = match[1] if match else link
+                    doc_id = db.execute("INSERT INTO documents (link, canonical_link, signature) VALUES (?, ?, ?)",
+                                        (link, canonical[link], signature.tobytes())).lastrowid
+                    db.executemany("INSERT OR IGNORE INTO buckets (bucket, doc_id) VALUES (?, ?)",
+                                   [(bucket, doc_id) for bucket in buckets])
+        return canonical
+
+    def assign(self, link: str, text: str) -> str:
+        """Index one article and return the link of its canonical copy."""
+        return self.assign_many([(link, text)])[link]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._connect().execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def stats(self) -> dict:
+        return {**self.params, "documents": len(self), "queries": self.queries, "matches": self.matches}
+
+near_duplicate_index = NearDuplicateIndex()
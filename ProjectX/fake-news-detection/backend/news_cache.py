@@ -0,0 +1,61 @@
+import time
+from collections import OrderedDict
+from backend.config import settings
+
+# Seconds a /news page is served from memory; the ingester also clears the cache when it stores news
+NEWS_CACHE_TTL = settings.get_float("NEWS_CACHE_TTL", 15)
+NEWS_CACHE_SIZE = settings.get_int("NEWS_CACHE_SIZE", 256)
+
+class NewsPageCache:
+    """Short-lived LRU of /news responses keyed by (limit, cursor).
+
+    Pages change only when news is stored, so invalidate() is called by
+    the RSS ingester after it writes rows. The TTL bounds staleness for
+    writes made by other workers, which this process does not see.
+    """
+
+    def __init__(self, ttl: float = NEWS_CACHE_TTL, max_size: int = NEWS_CACHE_SIZE):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is not None:
+            page, expires_at = entry
+            if expires_at > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return page
+            del self._entries[key]
+        self.misses += 1
+        return None
+
+    def set(self, key, page: dict):
+        if self.ttl <= 0:
+            return
+        self._entries[key] = (page, time.monotonic() + self.ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, stored: int = 0):
+        """Drop every cached page (new news changes the first page and shifts the rest)."""
+        self._entries.clear()
+        self.invalidations += 1
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "ttl_s": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+news_page_cache = NewsPageCache()
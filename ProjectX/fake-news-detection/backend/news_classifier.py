@@ -0,0 +1,206 @@
+import os
+import time
+import uuid
+import asyncio
+import logging
+
+from backend.models import predict_fake_news_batch
+from backend.database import store_analyses
+from backend.repository import get_repository
+from backend.process_lock import ProcessLock
+from backend.config import settings
+
+logger = logging.getLogger(__name__)
+
+# News rows scored per batch; only one batch is in flight at a time
+NEWS_CLASSIFY_BATCH_SIZE = settings.get_int("NEWS_CLASSIFY_BATCH_SIZE", 64)
+# Seconds between checks for unscored news when the scraper has not signalled any
+NEWS_CLASSIFY_INTERVAL = settings.get_float("NEWS_CLASSIFY_INTERVAL", 300)
+# Held by the one worker process that classifies; the others wait to take over
+NEWS_CLASSIFY_LOCK = settings.get("NEWS_CLASSIFY_LOCK", "models/news_classifier.lock")
+NEWS_CLASSIFY_ENABLED = settings.get_bool("NEWS_CLASSIFY_ENABLED", True)
+
+def news_text(row: dict) -> str:
+    """The text a news row is classified on: its title and description."""
+    return f"{row.get('title') or ''}. {row.get('description') or ''}".strip()
+
+class NewsClassifier:
+    """Score ingested news in the background and store the verdicts in analysis.
+
+    Unscored rows are read from the unclassified_news view (news rows no
+    analysis refers to, migration 006) in id order, batch_size at a time,
+    run through predict_fake_news_batch (which cleans the texts and scores
+    them in one pass) on a worker thread, and written to analysis with
+    their news_id in one insert. There is no checkpoint to fall behind: a
+    row committed late with a smaller id, or one whose write failed, is
+    still in the view on the next pass. Within a pass the rows read so far
+    are skipped by id, so rows that get no verdict are retried on the next
+    pass rather than read again at once; the unique analysis.news_id makes
+    concurrent or replayed writes skip rows that did get stored.
+
+    Near-duplicates (news rows with a canonical_link, see
+    backend/near_duplicates.py) are not scored again: they get a copy of
+    the canonical article's verdict, read from analysis or taken from the
+    same batch. Only when the canonical has no verdict yet are they scored.
+
+    The scraper calls notify() after storing news. Notifications only set
+    a flag, so however fast news arrives the classifier works through it
+    one bounded batch at a time. Without notifications it checks every
+    interval seconds.
+
+    Every worker process starts the background task, but only the one
+    holding lock classifies; the others check for the lock at each wakeup
+    and take over if its holder exits.
+    """
+
+    def __init__(self, batch_size: int = NEWS_CLASSIFY_BATCH_SIZE, interval: float = NEWS_CLASSIFY_INTERVAL,
+                 predict_batch=predict_fake_news_batch, enabled: bool = NEWS_CLASSIFY_ENABLED,
+                 lock: ProcessLock = None):
+        if batch_size < 1:
+            raise ValueError("batch_size must be at least 1")
+        self.batch_size = batch_size
+        self.interval = interval
+        self.lock = lock if lock is not None else ProcessLock()
+        self.predict_batch = predict_batch
+        self.enabled = enabled
+        self._task = None
+        self._wakeup = None
+        self.classified = 0
+        self.skipped = 0
+        self.reused = 0
+        self.batches = 0
+        self.errors = 0
+        self.batch_ms_total = 0.0
+
+    def start(self):
+        """Start the background task on the running loop; a no-op when disabled or already running."""
+        if not self.enabled or (self._task and not self._task.done()):
+            return
+        self._wakeup = asyncio.Event()
+        self._wakeup.set()  # catch up on anything stored while we were down
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    def notify(self, stored: int = 0):
+        """Signal that new news was stored; must be called on the event loop."""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        self._wakeup = None
+        self.lock.release()
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            if not self.lock.held:
+                if not self.lock.acquire():
+                    continue  # another worker process classifies
+                logger.info(f"News classifier running in process {os.getpid()}")
+            try:
+                await self.run_until_idle(get_repository())
+            except Exception as e:
+                logger.error(f"News classification failed, retrying later: {e!r}")
+
+    async def run_until_idle(self, repo) -> int:
+        """Classify batches until no unscored news is left; returns the number classified."""
+        total, after_id = 0, 0
+        while True:
+            batch = await self.classify_batch(repo, after_id)
+            if batch is None:
+                return total
+            count, after_id = batch
+            total += count
+
+    async def classify_batch(self, repo, after_id: int = 0):
+        """Classify the next unscored rows with ids above after_id.
+
+        Returns (rows classified, the last id read), or None when there is
+        nothing left. Raises RuntimeError when the analyses cannot be stored.
+        """
+        rows = await repo.select("unclassified_news", {"id": ("gt", after_id)},
+                                 columns="id, link, title, description, canonical_link",
+                                 order="id.asc", limit=self.batch_size)
+        if not rows:
+            return None
+
+        start = time.perf_counter()
+        batch_links = {row["link"] for row in rows}
+        canonical_links = {row["canonical_link"] for row in rows if row.get("canonical_link")}
+        verdicts = await self._stored_verdicts(repo, canonical_links - batch_links)
+
+        # Score everything except copies whose canonical verdict is known or in this batch
+        scored = [row for row in rows if not row.get("canonical_link")
+                  or (row["canonical_link"] not in verdicts and row["canonical_link"] not in batch_links)]
+        results = await asyncio.to_thread(self.predict_batch, [news_text(row) for row in scored]) if scored else []
+        for row, result in zip(scored, results):
+            if "error" not in result:
+                verdicts[row["link"]] = result
+
+        records = []
+        for row in rows:
+            verdict = verdicts.get(row["link"]) or verdicts.get(row.get("canonical_link"))
+            if verdict is None:
+                continue
+            records.append({
+                "analysis_id": str(uuid.uuid4()),
+                "news_id": row["id"],
+                "text": news_text(row),
+                "prediction": verdict["prediction"],
+                "confidence": verdict["confidence"],
+                "model_version": verdict["model_version"],
+            })
+
+        stored = await store_analyses(repo, records, on_conflict="news_id")
+        if "error" in stored:
+            self.errors += 1
+            raise RuntimeError(f"Storing news analyses failed: {stored['error']}")
+
+        self.batches += 1
+        self.classified += len(records)
+        self.skipped += len(rows) - len(records)
+        self.reused += len(records) - (len(scored) - sum(1 for result in results if "error" in result))
+        self.batch_ms_total += (time.perf_counter() - start) * 1000
+        return len(records), rows[-1]["id"]
+
+    async def _stored_verdicts(self, repo, links: set) -> dict:
+        """Return {link: analysis row} for the news with these links that already have a verdict."""
+        if not links:
+            return {}
+        news = await repo.select("news", {"link": ("in", sorted(links))}, columns="id, link")
+        if not news:
+            return {}
+        link_of = {row["id"]: row["link"] for row in news}
+        analyses = await repo.select("analysis", {"news_id": ("in", list(link_of))},
+                                     columns="news_id, prediction, confidence, model_version")
+        return {link_of[row["news_id"]]: row for row in analyses}
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def stats(self) -> dict:
+        return {
+            "running": self.running,
+            "holds_lock": self.lock.held,
+            "classified": self.classified,
+            "skipped": self.skipped,
+            "reused": self.reused,
+            "batches": self.batches,
+            "errors": self.errors,
+            "batch_size": self.batch_size,
+            "mean_batch_ms": round(self.batch_ms_total / self.batches, 2) if self.batches else 0.0,
+        }
+
+news_classifier = NewsClassifier(lock=ProcessLock(NEWS_CLASSIFY_LOCK))
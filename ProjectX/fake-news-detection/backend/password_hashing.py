@@ -0,0 +1,88 @@
+import time
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+import bcrypt
+from backend.config import settings
+
+logger = logging.getLogger(__name__)
+
+# bcrypt work factor for new hashes (existing hashes keep the cost they were made with)
+BCRYPT_ROUNDS = settings.get_int("BCRYPT_ROUNDS", 12)
+# Threads dedicated to hashing; bcrypt releases the GIL, so they run in parallel
+PASSWORD_HASH_WORKERS = settings.get_int("PASSWORD_HASH_WORKERS", 2)
+# Hash/verify calls allowed to queue or run at once before new ones are rejected
+PASSWORD_HASH_MAX_PENDING = settings.get_int("PASSWORD_HASH_MAX_PENDING", 32)
+
+class PasswordHasherBusy(Exception):
+    """Raised when too many hash/verify calls are already waiting for the pool."""
+
+class PasswordHasher:
+    """Run bcrypt on a small dedicated thread pool with admission control.
+
+    Hashing costs 100-300 ms of CPU per call. Running it on its own
+    executor keeps a login burst from occupying the threads that serve
+    /predict and other endpoints. At most max_pending calls may wait for
+    or use the pool; further calls fail fast with PasswordHasherBusy so the
+    caller can answer 503 instead of queueing without bound.
+    """
+
+    def __init__(self, workers: int = PASSWORD_HASH_WORKERS, max_pending: int = PASSWORD_HASH_MAX_PENDING,
+                 rounds: int = BCRYPT_ROUNDS):
+        if workers < 1 or max_pending < 1:
+            raise ValueError("workers and max_pending must be at least 1")
+        self.workers = workers
+        self.max_pending = max_pending
+        self.rounds = rounds
+        self._executor = None
+        self.pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self.busy_ms_total = 0.0
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="bcrypt")
+        return self._executor
+
+    async def _run(self, fn, *args):
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise PasswordHasherBusy(f"{self.pending} password hashing calls already pending")
+        self.pending += 1
+        try:
+            start = time.perf_counter()
+            result = await asyncio.get_running_loop().run_in_executor(self._get_executor(), fn, *args)
+            self.busy_ms_total += (time.perf_counter() - start) * 1000
+            self.completed += 1
+            return result
+        finally:
+            self.pending -= 1
+
+    async def hash(self, password: str) -> str:
+        """Return a bcrypt hash of password made with the configured cost."""
+        salt = bcrypt.gensalt(rounds=self.rounds)
+        hashed = await self._run(bcrypt.hashpw, password.encode("utf-8"), salt)
+        return hashed.decode("utf-8")
+
+    async def verify(self, password: str, hashed: str) -> bool:
+        """Check password against a stored bcrypt hash."""
+        return await self._run(bcrypt.checkpw, password.encode("utf-8"), hashed.encode("utf-8"))
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "rounds": self.rounds,
+            "max_pending": self.max_pending,
+            "pending": self.pending,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "mean_ms": round(self.busy_ms_total / self.completed, 2) if self.completed else 0.0,
+        }
+
+password_hasher = PasswordHasher()
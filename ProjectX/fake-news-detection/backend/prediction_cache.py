@@ -0,0 +1,214 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from backend.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Memory budget for the in-process LRU (approximate bytes of keys + values)
+CACHE_MAX_BYTES = settings.get_int("PREDICTION_CACHE_MAX_BYTES", 16 * 1024 * 1024)
+# Optional expiry for cached predictions, in seconds (0 disables expiry)
+CACHE_TTL_SECONDS = settings.get_float("PREDICTION_CACHE_TTL", 0)
+# Optional SQLite file shared by all uvicorn workers on the node
+CACHE_SHARED_PATH = settings.get("PREDICTION_CACHE_PATH", "")
+
+# Rough per-entry overhead of the dict, OrderedDict node and tuple
+ENTRY_OVERHEAD_BYTES = 256
+
+def fingerprint_files(*paths: str) -> str:
+    """Return a short content hash of the given files or directories (missing paths are skipped)."""
+    digest = hashlib.sha256()
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(os.path.join(path, name) for name in sorted(os.listdir(path)))
+        elif os.path.exists(path):
+            files.append(path)
+    for path in files:
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+    return digest.hexdigest()[:16]
+
+class SQLiteCacheBackend:
+    """Shared second-level cache stored in a SQLite file.
+
+    Every worker process opens the same file, so a prediction computed by one
+    worker is visible to the others on the same node.
+    """
+
+    # Delete expired rows once every this many writes
+    PURGE_EVERY = 1000
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._writes = 0
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # Opened on first use per thread, so creating the backend touches no file
+            conn = sqlite3.connect(self.path, timeout=5)
+            with conn:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS prediction_cache ("
+                    "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL)"
+                )
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str):
+        row = self._connect().execute(
+            "SELECT value, expires_at FROM prediction_cache WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        value, expires_at = row
+        if expires_at is not None and expires_at <= time.time():
+            return None
+        return json.loads(value)
+
+    def set(self, key: str, value: dict, ttl: float | None):
+        expires_at = time.time() + ttl if ttl else None
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO prediction_cache (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, json.dumps(value), expires_at)
+            )
+            self._writes += 1
+            if self._writes % self.PURGE_EVERY == 0:
+                conn.execute("DELETE FROM prediction_cache WHERE expires_at <= ?", (time.time(),))
+
+    def clear(self):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM prediction_cache")
+
+class PredictionCache:
+    """Content-addressed cache of predictions.
+
+    Keys are the SHA-256 of the cleaned text together with the model version,
+    so a new model artifact never sees results computed by an older one.
+    Entries live in a memory-bounded LRU with optional TTL, backed by an
+    optional shared backend.
+    """
+
+    def __init__(self, model_version: str, max_bytes: int = CACHE_MAX_BYTES,
+                 ttl: float | None = CACHE_TTL_SECONDS or None, backend=None):
+        self.model_version = model_version
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.backend = backend
+        self._entries = OrderedDict()  # key -> (value, size, expires_at)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def key(self, cleaned_text: str, model_version: str = None) -> str:
+        """Return the cache key for an already cleaned text scored by model_version."""
+        digest = hashlib.sha256((model_version or self.model_version).encode())
+        digest.update(b"\0")
+        digest.update(cleaned_text.encode())
+        return digest.hexdigest()
+
+    def set_model_version(self, model_version: str):
+        """Switch to a new model version, dropping every local entry."""
+        with self._lock:
+            if model_version == self.model_version:
+                return
+            if self.model_version is not None:
+                logger.info(f"Model version changed ({self.model_version} -> {model_version}), clearing prediction cache")
+            self.model_version = model_version
+            self._entries.clear()
+            self._bytes = 0
+
+    def get(self, key: str):
+        """Return a copy of the cached value for key, or None."""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, size, expires_at = entry
+                if expires_at is None or expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return dict(value)
+                self._remove(key)
+
+        value = self._backend_get(key)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+                return None
+            self.shared_hits += 1
+        self._store_local(key, value)
+        return dict(value)
+
+    def set(self, key: str, value: dict):
+        """Cache value under key locally and in the shared backend."""
+        self._store_local(key, value)
+        self._backend_set(key, value)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+        if self.backend:
+            self.backend.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.shared_hits + self.misses
+            return {
+                "model_version": self.model_version,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "shared_hits": self.shared_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round((self.hits + self.shared_hits) / lookups, 4) if lookups else 0.0,
+            }
+
+    def _store_local(self, key: str, value: dict):
+        size = len(key) + len(json.dumps(value)) + ENTRY_OVERHEAD_BYTES
+        expires_at = time.time() + self.ttl if self.ttl else None
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (dict(value), size, expires_at)
+            self._bytes += size
+            while self._bytes > self.max_bytes and self._entries:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def _remove(self, key: str):
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def _backend_get(self, key: str):
+        if not self.backend:
+            return None
+        try:
+            return self.backend.get(key)
+        except Exception as e:
+            logger.warning(f"Shared prediction cache read failed: {e}")
+            return None
+
+    def _backend_set(self, key: str, value: dict):
+        if not self.backend:
+            return
+        try:
+            self.backend.set(key, value, self.ttl)
+        except Exception as e:
+            logger.warning(f"Shared prediction cache write failed: {e}")
@@ -0,0 +1,48 @@
+import os
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory locks, every process runs the job
+    fcntl = None
+
+class ProcessLock:
+    """An exclusive lock on a file, so only one worker process on a host runs a background job.
+
+    acquire() never blocks: it returns whether this process holds the lock.
+    The lock is released by release() or when the holding process exits,
+    after which another process's next acquire() takes it over. Without a
+    path (tests, single-process runs) the lock is always acquired.
+    """
+
+    def __init__(self, path: str = None):
+        self.path = path
+        self._file = None
+        self._held = False
+
+    @property
+    def held(self) -> bool:
+        return self._held
+
+    def acquire(self) -> bool:
+        if self._held:
+            return True
+        if not self.path or fcntl is None:
+            self._held = True
+            return True
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        f = open(self.path, "a")
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            f.close()
+            return False
+        self._file = f
+        self._held = True
+        return True
+
+    def release(self):
+        if self._file is not None:
+            fcntl.flock(self._file, fcntl.LOCK_UN)
+            self._file.close()
+            self._file = None
+        self._held = False
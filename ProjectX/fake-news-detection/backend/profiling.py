@@ -0,0 +1,337 @@
+"""Opt-in cProfile traces of single API requests, and a CLI to summarize them.
+
+A request is profiled when it carries an X-Profile header equal to
+PROFILE_TOKEN, or when it is drawn by the sample rate (PROFILE_SAMPLE_RATE,
+adjustable at runtime through /admin/profiling with the same token). Each
+profiled request leaves <request id>.prof (pstats format) and <request id>.json
+(method, path, status, duration and its database round trips) in PROFILE_DIR;
+the response carries the id in X-Profile-Id.
+
+Summarize the slowest frames across the collected traces:
+    python -m backend.profiling --top 25 --path /predict
+"""
+import os
+import re
+import sys
+import json
+import time
+import uuid
+import hmac
+import random
+import asyncio
+import pstats
+import logging
+import argparse
+import cProfile
+import threading
+import contextvars
+import functools
+from datetime import datetime, timezone
+
+from backend.config import settings
+
+logger = logging.getLogger(__name__)
+
+PROFILE_DIR = settings.get("PROFILE_DIR", "models/profiles")
+# Fraction of requests profiled without being asked; 0 leaves only the header
+PROFILE_SAMPLE_RATE = settings.get_float("PROFILE_SAMPLE_RATE", 0)
+# Shared secret for the X-Profile header and the admin toggle; profiling on demand is off while it is unset
+PROFILE_TOKEN = settings.get("PROFILE_TOKEN", "")
+# The oldest traces are deleted beyond this many
+PROFILE_MAX_FILES = settings.get_int("PROFILE_MAX_FILES", 200)
+PROFILE_HEADER = b"x-profile"
+REQUEST_ID_HEADER = b"x-request-id"
+_REQUEST_ID_RE = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+# The event loop waiting for I/O or worker threads: time in it is idle, not a hot spot
+# Since Python 3.12 cProfile is process-wide: one profiler sees every thread, and a second one cannot be enabled
+PROFILER_PER_THREAD = sys.version_info < (3, 12)
+_IDLE_FRAME_RE = re.compile(r"^<method '(poll|select|control)' of 'select\.")
+
+_active = contextvars.ContextVar("request_profile", default=None)
+
+def current_profile():
+    """The RequestProfile of the request being handled, or None when it is not profiled."""
+    return _active.get()
+
+def record_span(name: str, seconds: float):
+    """Note a timed call (e.g. a database round trip) in the profile of the current request."""
+    profile = _active.get()
+    if profile is not None:
+        profile.spans.append({"name": name, "ms": round(seconds * 1000, 3)})
+
+class RequestProfile:
+    """cProfile data of one request, collected per thread and merged when it is saved.
+
+    Before Python 3.12 cProfile only sees the thread it is enabled on, so the
+    request's work on the event loop and in worker threads (see run()) gets
+    one profiler each. From 3.12 the first profiler already sees every
+    thread and run() adds none. Either way the profile also covers whatever
+    other requests the worker runs meanwhile.
+    """
+
+    def __init__(self, request_id: str, method: str, path: str):
+        self.request_id = request_id
+        self.method = method
+        self.path = path
+        self.started_at = datetime.now(timezone.utc).isoformat()
+        self.spans = []
+        self._profiles = []
+        self._threads = set()
+        self._lock = threading.Lock()
+
+    def enable(self):
+        """Start profiling the current thread; returns None when it is already profiled or cannot be."""
+        thread = threading.get_ident()
+        with self._lock:
+            if thread in self._threads or (self._threads and not PROFILER_PER_THREAD):
+                return None
+            self._threads.add(thread)
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError as e:  # another profiler (or a debugger, coverage) is active: serve the request unprofiled
+            logger.warning(f"Could not profile request {self.request_id}: {e}")
+            with self._lock:
+                self._threads.discard(thread)
+            return None
+        return profiler
+
+    def disable(self, profiler):
+        if profiler is None:
+            return
+        profiler.disable()
+        with self._lock:
+            self._threads.discard(threading.get_ident())
+            self._profiles.append(profiler)
+
+    def run(self, fn, *args, **kwargs):
+        """Call fn with the current thread profiled into this request."""
+        profiler = self.enable()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            self.disable(profiler)
+
+    def stats(self):
+        """Merged pstats.Stats of every thread, or None when nothing was recorded."""
+        merged = None
+        for profiler in self._profiles:
+            try:
+                stats = pstats.Stats(profiler)
+            except TypeError:  # a profiler that saw no calls
+                continue
+            if merged is None:
+                merged = stats
+            else:
+                merged.add(stats)
+        return merged
+
+def profiled(fn):
+    """Wrap fn so a call made for a profiled request is profiled on whichever thread runs it.
+
+    The request is found through a context variable, which asyncio.to_thread
+    and run_in_threadpool carry into the worker thread.
+    """
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        profile = _active.get()
+        if profile is None:
+            return fn(*args, **kwargs)
+        return profile.run(fn, *args, **kwargs)
+    return wrapper
+
+class RequestProfiler:
+    """Decide which requests to profile and write their traces to directory.
+
+    At most one request per worker is profiled at a time: a thread has a
+    single profiler slot, and the event loop thread is shared by every
+    request. Requests asking for a profile while one is running are served
+    normally and counted in skipped.
+    """
+
+    def __init__(self, directory: str = PROFILE_DIR, sample_rate: float = PROFILE_SAMPLE_RATE,
+                 token: str = PROFILE_TOKEN, max_files: int = PROFILE_MAX_FILES, draw=random.random):
+        self.directory = directory
+        self.token = token
+        self.max_files = max_files
+        self.sample_rate = 0.0
+        self.set_sample_rate(sample_rate)
+        self._draw = draw
+        self._busy = False
+        self.profiled = 0
+        self.skipped = 0
+
+    def set_sample_rate(self, rate: float):
+        if not 0.0 <= rate <= 1.0:
+            raise ValueError("sample_rate must be between 0 and 1")
+        self.sample_rate = rate
+
+    def authorized(self, token) -> bool:
+        """Whether token is the profiling secret (always False while none is configured)."""
+        if not self.token or not token:
+            return False
+        if isinstance(token, str):
+            token = token.encode()
+        return hmac.compare_digest(token, self.token.encode())
+
+    def begin(self, scope):
+        """Return a RequestProfile when the request in this ASGI scope is to be profiled, else None."""
+        if not self.token and self.sample_rate <= 0:
+            return None
+        headers = dict(scope.get("headers") or ())
+        asked = self.authorized(headers.get(PROFILE_HEADER))
+        if not asked and not (self.sample_rate > 0 and self._draw() < self.sample_rate):
+            return None
+        if self._busy:
+            self.skipped += 1
+            return None
+        self._busy = True
+        request_id = headers.get(REQUEST_ID_HEADER, b"").decode("latin-1")
+        if not _REQUEST_ID_RE.match(request_id):
+            request_id = uuid.uuid4().hex
+        return RequestProfile(request_id, scope.get("method", ""), scope.get("path", ""))
+
+    def finish(self, profile: RequestProfile, status: int, seconds: float):
+        """Write the trace of a finished request; called off the event loop."""
+        try:
+            self._save(profile, status, seconds)
+            self.profiled += 1
+        except Exception as e:
+            logger.error(f"Could not save the profile of request {profile.request_id}: {e}")
+        finally:
+            self._busy = False
+
+    def _save(self, profile: RequestProfile, status: int, seconds: float):
+        os.makedirs(self.directory, exist_ok=True)
+        base = os.path.join(self.directory, profile.request_id)
+        stats = profile.stats()
+        if stats is not None:
+            stats.dump_stats(base + ".prof")
+        with open(base + ".json", "w") as f:
+            json.dump({
+                "request_id": profile.request_id,
+                "method": profile.method,
+                "path": profile.path,
+                "status": status,
+                "started_at": profile.started_at,
+                "duration_ms": round(seconds * 1000, 3),
+                "db_ms": round(sum(span["ms"] for span in profile.spans), 3),
+                "spans": profile.spans,
+            }, f, indent=2)
+        logger.info(f"Saved profile of {profile.method} {profile.path} ({seconds * 1000:.1f} ms) to {base}.prof")
+        self._prune()
+
+    def _prune(self):
+        traces = sorted((entry for entry in os.scandir(self.directory) if entry.name.endswith(".json")),
+                        key=lambda entry: entry.stat().st_mtime)
+        for entry in traces[:max(0, len(traces) - self.max_files)]:
+            for path in (entry.path, entry.path[:-len(".json")] + ".prof"):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+
+    def stats(self) -> dict:
+        return {
+            "enabled": bool(self.token) or self.sample_rate > 0,
+            "sample_rate": self.sample_rate,
+            "profiled": self.profiled,
+            "skipped": self.skipped,
+            "directory": self.directory,
+        }
+
+request_profiler = RequestProfiler()
+
+class ProfilingMiddleware:
+    """ASGI middleware profiling the requests request_profiler selects (see RequestProfiler.begin)."""
+
+    def __init__(self, app, profiler: RequestProfiler = None):
+        self.app = app
+        self.profiler = profiler
+
+    async def __call__(self, scope, receive, send):
+        profiler = self.profiler or request_profiler
+        profile = profiler.begin(scope) if scope["type"] == "http" else None
+        if profile is None:
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_with_id(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                message = {**message, "headers": [*message.get("headers", []),
+                                                  (b"x-profile-id", profile.request_id.encode())]}
+            await send(message)
+
+        token = _active.set(profile)
+        start = time.perf_counter()
+        profiler_on_loop = profile.enable()
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            profile.disable(profiler_on_loop)
+            _active.reset(token)
+            await asyncio.to_thread(profiler.finish, profile, status, time.perf_counter() - start)
+
+def load_traces(directory: str, path: str = None) -> list[dict]:
+    """The metadata of every trace in directory (optionally only for one request path), slowest first."""
+    traces = []
+    for name in os.listdir(directory) if os.path.isdir(directory) else []:
+        if not name.endswith(".json"):
+            continue
+        with open(os.path.join(directory, name)) as f:
+            trace = json.load(f)
+        if path is None or trace.get("path") == path:
+            trace["profile"] = os.path.join(directory, name[:-len(".json")] + ".prof")
+            traces.append(trace)
+    return sorted(traces, key=lambda trace: trace["duration_ms"], reverse=True)
+
+def slowest_frames(traces: list[dict], sort: str = "tottime", top: int = 25, include_idle: bool = False) -> list[dict]:
+    """Aggregate the frames of several traces: total self and cumulative time and how many traces hit them."""
+    frames = {}
+    for trace in traces:
+        if not os.path.exists(trace["profile"]):
+            continue
+        for (filename, line, function), (_, calls, tottime, cumtime, _) in pstats.Stats(trace["profile"]).stats.items():
+            if not include_idle and _IDLE_FRAME_RE.match(function):
+                continue
+            frame = frames.setdefault((filename, line, function), {
+                "frame": f"{function} ({os.path.relpath(filename) if filename.startswith(os.sep) else filename}:{line})",
+                "calls": 0, "tottime_ms": 0.0, "cumtime_ms": 0.0, "traces": 0,
+            })
+            frame["calls"] += calls
+            frame["tottime_ms"] += tottime * 1000
+            frame["cumtime_ms"] += cumtime * 1000
+            frame["traces"] += 1
+    key = "cumtime_ms" if sort == "cumtime" else "tottime_ms"
+    return sorted(frames.values(), key=lambda frame: frame[key], reverse=True)[:top]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Summarize the slowest frames across collected request profiles.")
+    parser.add_argument("--dir", default=PROFILE_DIR)
+    parser.add_argument("--path", help="only requests to this path, e.g. /predict")
+    parser.add_argument("--sort", choices=("tottime", "cumtime"), default="tottime",
+                        help="rank frames by time in the frame itself or including its callees")
+    parser.add_argument("--top", type=int, default=25)
+    parser.add_argument("--include-idle", action="store_true", help="keep the event loop's I/O wait in the ranking")
+    args = parser.parse_args(argv)
+
+    traces = load_traces(args.dir, args.path)
+    if not traces:
+        print(f"No profiles in {args.dir}")
+        return
+    print(f"{len(traces)} profiled requests in {args.dir}; slowest:")
+    for trace in traces[:5]:
+        print(f"  {trace['request_id']}  {trace['method']} {trace['path']}  {trace['status']}  "
+              f"{trace['duration_ms']:.1f} ms (database {trace['db_ms']:.1f} ms)")
+    print()
+    print(f"{'tottime ms':>11}{'cumtime ms':>12}{'calls':>9}{'traces':>8}  frame")
+    for frame in slowest_frames(traces, args.sort, args.top, args.include_idle):
+        print(f"{frame['tottime_ms']:>11.2f}{frame['cumtime_ms']:>12.2f}{frame['calls']:>9}{frame['traces']:>8}  "
+              f"{frame['frame']}")
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,350 @@
+import time
+import uuid
+import asyncio
+import logging
+import operator
+from collections import Counter
+from datetime import datetime, timezone
+
+import httpx
+
+from backend.config import settings
+from backend.metrics import db_requests, db_request_duration
+from backend.profiling import record_span
+
+logger = logging.getLogger(__name__)
+
+# Per-call timeout in seconds, and the size of the pooled HTTP/2 connection pool
+DB_TIMEOUT = settings.get_float("DB_TIMEOUT", 5)
+DB_MAX_CONNECTIONS = settings.get_int("DB_MAX_CONNECTIONS", 20)
+DB_KEEPALIVE_EXPIRY = settings.get_float("DB_KEEPALIVE_EXPIRY", 60)
+
+# Postgres error codes PostgREST passes through in its error body
+UNIQUE_VIOLATION = "23505"
+FOREIGN_KEY_VIOLATION = "23503"
+
+# Comparison filters: a filter value may be (operator, value), e.g. {"id": ("gt", 10)} or {"id": ("in", [1, 2])}
+FILTER_OPERATORS = {"eq": operator.eq, "gt": operator.gt, "gte": operator.ge, "lt": operator.lt, "lte": operator.le,
+                    "in": lambda actual, values: str(actual) in {str(value) for value in values}}
+
+def _order_keys(order: str) -> list[tuple[str, bool]]:
+    """Parse a PostgREST order ("published_at.desc,id.desc") into (column, descending) pairs."""
+    keys = []
+    for part in order.split(","):
+        column, _, direction = part.strip().partition(".")
+        keys.append((column, direction.startswith("desc")))
+    return keys
+
+def _quote(value) -> str:
+    """Quote a value for a PostgREST in.(...) list, where commas and parentheses are reserved."""
+    return '"' + str(value).replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+class RepositoryError(Exception):
+    """A failed database call.
+
+    status is the HTTP status PostgREST answered with and code the Postgres
+    error code (e.g. 23505 for a unique violation), when available.
+    """
+
+    def __init__(self, message: str, status: int = None, code: str = None):
+        super().__init__(message)
+        self.status = status
+        self.code = code
+
+    @property
+    def is_conflict(self) -> bool:
+        return self.status == 409
+
+    @property
+    def is_unique_violation(self) -> bool:
+        return self.code == UNIQUE_VIOLATION
+
+    @property
+    def is_foreign_key_violation(self) -> bool:
+        return self.code == FOREIGN_KEY_VIOLATION
+
+class SupabaseRepository:
+    """Async access to the Supabase tables through PostgREST.
+
+    All calls share one httpx.AsyncClient with an HTTP/2 connection pool
+    and keep-alive, so requests are multiplexed over a few long-lived
+    connections instead of paying a TLS handshake each. The client is
+    opened by start() (called from the FastAPI lifespan) or lazily on the
+    first call, and bound to the event loop it was created on.
+    """
+
+    def __init__(self, url: str, key: str, timeout: float = DB_TIMEOUT,
+                 max_connections: int = DB_MAX_CONNECTIONS, http2: bool = True, transport=None):
+        self.url = (url or "").rstrip("/")
+        self.key = key
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self.http2 = http2
+        self.transport = transport
+        self.calls = Counter()
+        self._client = None
+        self._loop = None
+
+    def _create_client(self) -> httpx.AsyncClient:
+        if not self.url or not self.key:
+            raise RepositoryError("SUPABASE_URL and SUPABASE_KEY must be set")
+        return httpx.AsyncClient(
+            base_url=f"{self.url}/rest/v1",
+            headers={"apikey": self.key, "Authorization": f"Bearer {self.key}"},
+            http2=self.http2,
+            limits=httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_connections,
+                keepalive_expiry=DB_KEEPALIVE_EXPIRY,
+            ),
+            timeout=self.timeout,
+            transport=self.transport,
+        )
+
+    def _get_client(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._loop is not loop:
+            self._client = self._create_client()
+            self._loop = loop
+        return self._client
+
+    async def start(self):
+        self._get_client()
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+            self._loop = None
+
+    async def _request(self, method: str, table: str, params: dict = None, json=None,
+                       prefer: str = None, timeout: float = None) -> list:
+        self.calls[(method, table)] += 1
+        headers = {"Prefer": prefer} if prefer else {}
+        start = time.perf_counter()
+        try:
+            response = await self._get_client().request(
+                method, f"/{table}", params=params, json=json, headers=headers,
+                timeout=timeout if timeout is not None else self.timeout,
+            )
+        except httpx.HTTPError as e:
+            db_requests.labels(method, table, "error").inc()
+            raise RepositoryError(f"{method} {table} failed: {e!r}") from e
+        finally:
+            elapsed = time.perf_counter() - start
+            db_request_duration.labels(method, table).observe(elapsed)
+            record_span(f"{method} {table}", elapsed)
+        db_requests.labels(method, table, "ok" if response.status_code < 400 else "error").inc()
+        if response.status_code >= 400:
+            try:
+                body = response.json()
+            except ValueError:
+                body = {}
+            message = body.get("message", response.text)
+            raise RepositoryError(f"{method} {table} failed: {message}", status=response.status_code, code=body.get("code"))
+        return response.json() if response.content else []
+
+    @staticmethod
+    def _filter_params(filters: dict) -> dict:
+        params = {}
+        for column, value in (filters or {}).items():
+            op, value = value if isinstance(value, tuple) else ("eq", value)
+            if op not in FILTER_OPERATORS:
+                raise ValueError(f"Unsupported filter operator: {op}")
+            if op == "in":
+                value = "(" + ",".join(_quote(item) for item in value) + ")"
+            params[column] = f"{op}.{value}"
+        return params
+
+    @staticmethod
+    def _keyset_filter(order: str, after: tuple) -> str:
+        """PostgREST or=(...) matching the rows that come after the key tuple in order.
+
+        For order "a.desc,id.desc" and after (x, y) this is a < x OR (a = x AND id < y).
+        """
+        keys = _order_keys(order)
+        terms = []
+        for i, (column, descending) in enumerate(keys):
+            equal = [f"{key}.eq.{_quote(value)}" for (key, _), value in zip(keys[:i], after)]
+            last = f"{column}.{'lt' if descending else 'gt'}.{_quote(after[i])}"
+            terms.append(f"and({','.join(equal + [last])})" if equal else last)
+        return f"({','.join(terms)})"
+
+    async def select(self, table: str, filters: dict = None, columns: str = "*", order: str = None,
+                     limit: int = None, offset: int = None, after: tuple = None, timeout: float = None) -> list[dict]:
+        """Return the rows of table matching filters (equality, or (operator, value) comparisons).
+
+        after is a keyset cursor: the values of the order columns of the last
+        row already seen; only rows after it in that order are returned.
+        """
+        params = {"select": columns, **self._filter_params(filters)}
+        if after is not None:
+            params["or"] = self._keyset_filter(order, after)
+        if order:
+            params["order"] = order
+        if limit is not None:
+            params["limit"] = limit
+        if offset:
+            params["offset"] = offset
+        return await self._request("GET", table, params=params, timeout=timeout)
+
+    async def insert(self, table: str, rows, returning: bool = True, columns: str = "*",
+                     on_conflict: str = None, ignore_duplicates: bool = False, timeout: float = None) -> list[dict]:
+        """Insert one row or a list of rows in a single statement (INSERT ... RETURNING columns).
+
+        With on_conflict naming a unique column, rows that already exist are
+        updated (an upsert) or, with ignore_duplicates, skipped instead of
+        failing the whole insert. Returns the stored rows unless returning is False.
+        """
+        prefer = ["return=representation" if returning else "return=minimal"]
+        params = {"select": columns} if returning else {}
+        if on_conflict:
+            params["on_conflict"] = on_conflict
+            prefer.append("resolution=ignore-duplicates" if ignore_duplicates else "resolution=merge-duplicates")
+        return await self._request("POST", table, params=params, json=rows, prefer=",".join(prefer), timeout=timeout)
+
+    async def update(self, table: str, values: dict, filters: dict, timeout: float = None) -> list[dict]:
+        """Update the rows matching filters and return them."""
+        return await self._request("PATCH", table, params=self._filter_params(filters), json=values,
+                                   prefer="return=representation", timeout=timeout)
+
+def _unclassified_news(tables: dict) -> list[dict]:
+    """The unclassified_news view (migration 006): news rows no analysis refers to."""
+    classified = {row.get("news_id") for row in tables.get("analysis", [])}
+    return [row for row in tables.get("news", []) if row.get("id") not in classified]
+
+class InMemoryRepository:
+    """Dict-backed stand-in for SupabaseRepository, for tests and local runs.
+
+    It mirrors the schema's generated ids, unique constraints and foreign
+    keys (violations raise RepositoryError with PostgREST's status and
+    Postgres' error code) and counts calls per (method, table) the same way,
+    so tests can assert on round trips.
+    """
+
+    UNIQUE = {"users": ("email",), "analysis": ("analysis_id", "news_id"), "news": ("link",)}
+    FOREIGN_KEYS = {"feedback": {"user_id": ("users", "id"), "analysis_id": ("analysis", "analysis_id")}}
+    # Views of the migrations, computed from the tables on every select
+    VIEWS = {"unclassified_news": _unclassified_news}
+
+    def __init__(self, tables: dict = None):
+        self.tables = {name: list(rows) for name, rows in (tables or {}).items()}
+        self.calls = Counter()
+        self._serial = Counter()
+
+    async def start(self):
+        pass
+
+    async def close(self):
+        pass
+
+    def _defaults(self, table: str) -> dict:
+        if table == "users":
+            return {"id": str(uuid.uuid4()), "created_at": datetime.now(timezone.utc).isoformat()}
+        if table == "analysis":
+            return {"analysis_id": str(uuid.uuid4())}
+        self._serial[table] += 1
+        return {"id": self._serial[table]}
+
+    @staticmethod
+    def _matches(row: dict, filters: dict) -> bool:
+        for column, value in (filters or {}).items():
+            op, value = value if isinstance(value, tuple) else ("eq", value)
+            actual = row.get(column)
+            if op == "eq":
+                if str(actual) != str(value):
+                    return False
+            elif actual is None or not FILTER_OPERATORS[op](actual, value):
+                return False
+        return True
+
+    @staticmethod
+    def _project(row: dict, columns: str) -> dict:
+        if columns == "*":
+            return dict(row)
+        return {column.strip(): row.get(column.strip()) for column in columns.split(",")}
+
+    @staticmethod
+    def _is_after(row: dict, keys: list, after: tuple) -> bool:
+        for (column, descending), value in zip(keys, after):
+            actual = row.get(column)
+            if actual != value:
+                return actual < value if descending else actual > value
+        return False
+
+    async def select(self, table: str, filters: dict = None, columns: str = "*", order: str = None,
+                     limit: int = None, offset: int = None, after: tuple = None, timeout: float = None) -> list[dict]:
+        self.calls[("GET", table)] += 1
+        source = self.VIEWS[table](self.tables) if table in self.VIEWS else self.tables.get(table, [])
+        rows = [row for row in source if self._matches(row, filters)]
+        if order:
+            keys = _order_keys(order)
+            for column, descending in reversed(keys):  # stable sorts, least significant key first
+                rows.sort(key=lambda row: row.get(column), reverse=descending)
+            if after is not None:
+                rows = [row for row in rows if self._is_after(row, keys, after)]
+        rows = rows[offset or 0:]
+        if limit is not None:
+            rows = rows[:limit]
+        return [self._project(row, columns) for row in rows]
+
+    async def insert(self, table: str, rows, returning: bool = True, columns: str = "*",
+                     on_conflict: str = None, ignore_duplicates: bool = False, timeout: float = None) -> list[dict]:
+        self.calls[("POST", table)] += 1
+        rows = [rows] if isinstance(rows, dict) else rows
+        stored = self.tables.setdefault(table, [])
+        new_rows = [{**self._defaults(table), **row} for row in rows]
+
+        for column, (parent, parent_column) in self.FOREIGN_KEYS.get(table, {}).items():
+            existing = {str(row.get(parent_column)) for row in self.tables.get(parent, [])}
+            for row in new_rows:
+                if str(row.get(column)) not in existing:
+                    raise RepositoryError(f"insert on {table} violates foreign key {table}.{column}",
+                                          status=409, code=FOREIGN_KEY_VIOLATION)
+
+        result = []
+        for given, row in zip(rows, new_rows):
+            # NULLs never conflict, as in Postgres
+            duplicate = next((old for old in stored for column in self.UNIQUE.get(table, ())
+                              if row.get(column) is not None and old.get(column) == row.get(column)), None)
+            if duplicate is None:
+                stored.append(row)
+                result.append(row)
+            elif not on_conflict:
+                raise RepositoryError(f"duplicate key value violates unique constraint on {table}",
+                                      status=409, code=UNIQUE_VIOLATION)
+            elif not ignore_duplicates:
+                duplicate.update(given)  # merge-duplicates: update only the given columns
+                result.append(duplicate)
+        return [self._project(row, columns) for row in result] if returning else []
+
+    async def update(self, table: str, values: dict, filters: dict, timeout: float = None) -> list[dict]:
+        self.calls[("PATCH", table)] += 1
+        updated = []
+        for row in self.tables.get(table, []):
+            if self._matches(row, filters):
+                row.update(values)
+                updated.append(dict(row))
+        return updated
+
+_repository = None
+
+def get_repository():
+    """FastAPI dependency returning the active repository.
+
+    The Supabase repository is built from settings on first use rather than
+    at import, so importing this module reads no credentials.
+    """
+    global _repository
+    if _repository is None:
+        _repository = SupabaseRepository(settings.supabase_url, settings.supabase_key)
+    return _repository
+
+def use_repository(repo):
+    """Swap the active repository (e.g. for an InMemoryRepository in tests) and return the previous one.
+
+    Passing None goes back to building the Supabase repository on the next get_repository().
+    """
+    global _repository
+    previous, _repository = _repository, repo
+    return previous
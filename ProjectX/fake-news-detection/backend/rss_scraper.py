@@ -1,49 +1,24 @@
-import feedparser
-import os
-import time
+import asyncio
 import logging
-import validators
-import requests
-from dotenv import load_dotenv
-from backend.database import store_news, NewsItem
+from backend.config import configure_logging
+from backend.ingestion import feed_ingestor, load_feed_urls
+from backend.repository import get_repository
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Load environment variables
-load_dotenv()
-RSS_FEEDS = os.getenv("RSS_FEEDS", "").split(",")
+async def fetch_rss_news(repo=None, urls: list[str] = None):
+    """Fetch the configured RSS feeds concurrently and store their entries.
 
-def fetch_rss_news():
-    """Fetch news from RSS feeds and store them in the database."""
-    if not RSS_FEEDS or not RSS_FEEDS[0]:
-        logger.error("No RSS feeds configured. Please check your .env file.")
-        return
-
-    for feed_url in RSS_FEEDS:
-        if not validators.url(feed_url):
-            logger.error(f"Invalid RSS feed URL: {feed_url}")
-            continue
-        try:
-            logger.info(f"Fetching news from RSS feed: {feed_url}")
-            response = requests.get(feed_url, timeout=10)  # 10-second timeout
-            feed = feedparser.parse(response.content)
-            
-            for entry in feed.entries[:5]:  # Limit to 5 articles per source
-                try:
-                    news = NewsItem(
-                        title=entry.title,
-                        link=entry.link,
-                        description=entry.get("description", "No description available")
-                    )
-                    store_news(news)
-                except Exception as e:
-                    logger.error(f"Failed to process entry: {entry.title}. Error: {e}")
-            
-            time.sleep(5)  # Add a 5-second delay between feeds
-        except Exception as e:
-            logger.error(f"Failed to fetch RSS feed: {feed_url}. Error: {e}")
+    Feeds come from config.json (or RSS_FEEDS); returns the cycle summary
+    of backend.ingestion.FeedIngestor.run, or None when no feed is configured.
+    """
+    repo = repo or get_repository()
+    urls = urls if urls is not None else load_feed_urls()
+    if not urls:
+        logger.error("No RSS feeds configured. Please check config.json or RSS_FEEDS.")
+        return None
+    return await feed_ingestor.run(repo, urls)
 
 if __name__ == "__main__":
-    fetch_rss_news()  # Run manually if needed
\ No newline at end of file
+    configure_logging()
+    print(asyncio.run(fetch_rss_news()))  # Run manually if needed
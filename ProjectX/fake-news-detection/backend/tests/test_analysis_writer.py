@@ -0,0 +1,119 @@
+import asyncio
+
+from backend.analysis_writer import AnalysisWriter
+
+class InMemoryAnalysisTable:
+    """Stand-in for the analysis table that can be told to fail the next inserts."""
+
+    def __init__(self, failures: int = 0):
+        self.rows = []
+        self.inserts = 0
+        self.failures = failures
+
+    async def store_batch(self, records):
+        self.inserts += 1
+        if self.failures:
+            self.failures -= 1
+            return {"error": "connection reset"}
+        if any(r["analysis_id"] == "bad" for r in records):
+            return {"error": "invalid input syntax for type uuid"}
+        self.rows.extend(records)
+        return {"message": f"{len(records)} analyses stored"}
+
+def record(i):
+    return {"analysis_id": f"id-{i}", "text": "t", "prediction": "FAKE", "confidence": 0.9, "model_version": "v1"}
+
+def test_records_are_inserted_in_bulk_and_drained_on_close():
+    table = InMemoryAnalysisTable()
+    writer = AnalysisWriter(table.store_batch, max_batch_size=10, flush_interval_ms=1000)
+    stored = []
+
+    async def run():
+        for i in range(25):
+            assert writer.submit(record(i), on_stored=lambda r: stored.append(r["analysis_id"]))
+        await writer.close()
+
+    asyncio.run(run())
+    assert [r["analysis_id"] for r in table.rows] == [f"id-{i}" for i in range(25)]
+    assert table.inserts == 3  # 10 + 10 + the 5 drained on shutdown
+    assert sorted(stored) == sorted(f"id-{i}" for i in range(25))
+    stats = writer.stats()
+    assert (stats["written"], stats["queue_depth"], stats["pending"], stats["dropped"]) == (25, 0, 0, 0)
+
+def test_partial_batches_are_flushed_after_the_interval():
+    table = InMemoryAnalysisTable()
+    writer = AnalysisWriter(table.store_batch, max_batch_size=100, flush_interval_ms=20)
+
+    async def run():
+        writer.submit(record(1))
+        assert await writer.flush(timeout=1)
+        await writer.close()
+
+    asyncio.run(run())
+    assert len(table.rows) == 1
+
+def test_failed_inserts_are_retried_then_dropped():
+    table = InMemoryAnalysisTable(failures=2)
+    writer = AnalysisWriter(table.store_batch, flush_interval_ms=5, max_retries=3, retry_backoff_ms=1)
+    callbacks = []
+
+    async def run():
+        writer.submit(record(1))
+        assert await writer.flush(timeout=2)
+        assert len(table.rows) == 1 and writer.stats()["retried"] == 2
+
+        table.failures = 10
+        writer.submit(record(2), on_stored=callbacks.append)
+        assert await writer.flush(timeout=2)
+        await writer.close()
+
+    asyncio.run(run())
+    assert len(table.rows) == 1 and callbacks == []
+    assert writer.stats()["dropped"] == 1
+
+def test_full_queue_drops_new_records():
+    table = InMemoryAnalysisTable()
+    writer = AnalysisWriter(table.store_batch, max_queue_size=2)
+
+    async def run():
+        results = [writer.submit(record(i)) for i in range(5)]
+        await writer.close()
+        return results
+
+    assert asyncio.run(run()) == [True, True, False, False, False]
+    assert writer.stats()["dropped"] == 3
+    assert len(table.rows) == 2
+
+def test_a_bad_record_only_drops_itself():
+    table = InMemoryAnalysisTable()
+    writer = AnalysisWriter(table.store_batch, flush_interval_ms=5, max_retries=1, retry_backoff_ms=1)
+
+    async def run():
+        for i in (1, 2):
+            writer.submit(record(i))
+        writer.submit({**record(3), "analysis_id": "bad"})
+        await writer.close()
+
+    asyncio.run(run())
+    assert [r["analysis_id"] for r in table.rows] == ["id-1", "id-2"]
+    assert (writer.stats()["written"], writer.stats()["dropped"]) == (2, 1)
+
+def test_ensure_written_waits_for_one_record_not_the_whole_queue():
+    table = InMemoryAnalysisTable()
+    # The batch is not due for half a second, far longer than the rating waits
+    writer = AnalysisWriter(table.store_batch, max_batch_size=1000, flush_interval_ms=500)
+    stored = []
+
+    async def run():
+        writer.submit(record(1), on_stored=lambda r: stored.append(r["analysis_id"]))
+        writer.submit(record(2))
+        assert writer.is_pending("id-1")
+        assert await asyncio.wait_for(writer.ensure_written("id-1", timeout=0.01), 1)
+        assert [r["analysis_id"] for r in table.rows] == ["id-1"] and stored == ["id-1"]
+        assert not writer.is_pending("id-1") and await writer.ensure_written("id-1")
+        await writer.close()
+
+    asyncio.run(run())
+    # The batch skips the record written ahead of it, and its callback ran once
+    assert [r["analysis_id"] for r in table.rows] == ["id-1", "id-2"] and stored == ["id-1"]
+    assert writer.stats()["written"] == 2
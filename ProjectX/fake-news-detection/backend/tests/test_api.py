@@ -1,8 +1,22 @@
+import pytest
 from fastapi.testclient import TestClient
 from backend.main import app
+from backend.cron_job import feed_scheduler
+from backend.news_classifier import news_classifier
+from backend.repository import InMemoryRepository, use_repository
 
 client = TestClient(app)
 
+@pytest.fixture(autouse=True)
+def repo(monkeypatch):
+    """Run every request against an in-memory database, without the background RSS pollers."""
+    monkeypatch.setattr(feed_scheduler, "enabled", False)
+    monkeypatch.setattr(news_classifier, "enabled", False)
+    repo = InMemoryRepository()
+    previous = use_repository(repo)
+    yield repo
+    use_repository(previous)
+
 def test_home():
     response = client.get("/")
     assert response.status_code == 200
@@ -12,4 +26,122 @@ def test_predict():
     response = client.post("/predict", json={"text": "Breaking news! AI is changing the world."})
     assert response.status_code == 200
     assert "prediction" in response.json()
-    assert "confidence" in response.json()
\ No newline at end of file
+    assert "confidence" in response.json()
+
+def test_predict_batch():
+    response = client.post("/predict/batch", json={"texts": ["Breaking news! AI is changing the world.", ""]})
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert len(results) == 2
+    assert "predictionId" in results[0]
+    assert results[0]["prediction"] in ["FAKE", "REAL"]
+    assert "error" in results[1]
+
+def round_trips(repo, send):
+    """Send a request and return the response and the database calls it made per (method, table)."""
+    before = repo.calls.copy()
+    response = send()
+    return response, dict(repo.calls - before)
+
+def test_register_login_and_feedback_round_trips(repo):
+    repo.tables["analysis"] = [{"analysis_id": "a1", "text": "t", "prediction": "FAKE", "confidence": 0.9}]
+    user = {"name": "Ada", "email": "ada@example.com", "password": "Correct-Horse-9"}
+
+    with TestClient(app) as client:
+        registered, calls = round_trips(repo, lambda: client.post("/auth/register", json=user))
+        assert registered.status_code == 200
+        assert registered.json()["user"]["email"] == "ada@example.com"
+        assert calls == {("POST", "users"): 1}
+
+        duplicate, calls = round_trips(repo, lambda: client.post("/auth/register", json=user))
+        assert duplicate.status_code == 400 and calls == {("POST", "users"): 1}
+
+        login, calls = round_trips(repo, lambda: client.post(
+            "/auth/login", data={"username": user["email"], "password": user["password"]}))
+        assert login.status_code == 200 and calls == {("GET", "users"): 1}
+        headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+
+        feedback, calls = round_trips(repo, lambda: client.post(
+            "/feedback", json={"analysis_id": "a1", "rating": 4}, headers=headers))
+        assert feedback.status_code == 200 and calls == {("POST", "feedback"): 1}
+        assert repo.tables["feedback"][0]["rating"] == 4
+
+        missing, calls = round_trips(repo, lambda: client.post(
+            "/feedback", json={"analysis_id": "nope", "rating": 4}, headers=headers))
+        assert missing.status_code == 404 and calls == {("POST", "feedback"): 1}
+
+def test_feedback_on_a_fresh_prediction(repo):
+    with TestClient(app) as client:
+        user = {"name": "Bo", "email": "bo@example.com", "password": "Correct-Horse-9"}
+        token = client.post("/auth/register", json=user).json()["access_token"]
+        prediction = client.post("/predict", json={"text": "Scientists confirm the moon is made of cheese."})
+        # The analysis row is still in the write-behind buffer; /feedback flushes it first
+        feedback = client.post(
+            "/feedback",
+            json={"analysis_id": prediction.json()["predictionId"], "rating": 2},
+            headers={"Authorization": f"Bearer {token}"},
+        )
+        assert feedback.status_code == 200
+
+def test_persisted_prediction_is_stored_before_the_response(repo):
+    with TestClient(app) as client:
+        prediction = client.post("/predict", params={"persist": "true"},
+                                 json={"text": "The city council approved the new budget on Tuesday."})
+        assert prediction.status_code == 200
+        stored = [row["analysis_id"] for row in repo.tables.get("analysis", [])]
+        assert prediction.json()["predictionId"] in stored
+
+def test_cached_predictions_get_their_own_analysis(repo):
+    text = {"text": "Officials say the bridge will reopen next month."}
+    with TestClient(app) as client:
+        first = client.post("/predict", params={"persist": "true"}, json=text).json()
+        second = client.post("/predict", params={"persist": "true"}, json=text).json()
+    # The second verdict comes from the prediction cache, but is rated on its own row
+    assert first["prediction"] == second["prediction"]
+    assert first["predictionId"] != second["predictionId"]
+    assert len(repo.tables["analysis"]) == 2
+
+def test_rss_health_lists_configured_feeds():
+    with TestClient(app) as client:
+        health = client.get("/rss/health").json()
+    assert health["status"] in ("healthy", "degraded", "standby", "stopped")
+    assert all({"url", "interval_s", "next_run_in_s", "lag_s", "failures"} <= set(feed) for feed in health["feeds"])
+
+def test_news_pages_by_cursor_and_caches_pages(repo):
+    from backend.news_cache import news_page_cache
+    news_page_cache.invalidate()
+    repo.tables["news"] = [{"id": i, "title": f"Story {i}", "link": f"http://example.org/{i}", "description": "",
+                            "published_at": f"2024-06-{1 + i // 2:02d}T00:00:00+00:00", "canonical_link": None}
+                           for i in range(1, 8)]
+
+    first = client.get("/news", params={"limit": 3}).json()
+    assert [row["id"] for row in first["news"]] == [7, 6, 5]
+    second = client.get("/news", params={"limit": 3, "cursor": first["next_cursor"]}).json()
+    assert [row["id"] for row in second["news"]] == [4, 3, 2]
+    last = client.get("/news", params={"limit": 3, "cursor": second["next_cursor"]}).json()
+    assert [row["id"] for row in last["news"]] == [1] and last["next_cursor"] is None
+
+    _, calls = round_trips(repo, lambda: client.get("/news", params={"limit": 3}))
+    assert calls == {}  # served from the cache
+    news_page_cache.invalidate()
+    _, calls = round_trips(repo, lambda: client.get("/news", params={"limit": 3}))
+    assert calls == {("GET", "news"): 1}
+
+    assert client.get("/news", params={"cursor": "not-a-cursor"}).status_code == 400
+    assert client.get("/news", params={"limit": 1000}).status_code == 400
+
+def test_metrics_expose_route_latency_prediction_stages_and_model_version():
+    with TestClient(app) as lifespan_client:
+        response = lifespan_client.post("/predict", json={"text": "The senate passed a new metrics bill today."})
+        assert response.status_code == 200
+    # Shutdown flushed the analysis write, so every stage has been timed
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    text = response.text
+    assert 'http_request_duration_seconds_count{method="POST",route="/predict"}' in text
+    for stage in ("clean_text", "vectorize", "score", "store_analysis"):
+        assert f'predict_stage_duration_seconds_count{{stage="{stage}"}}' in text
+    version = client.get("/predict/stats").json()["model_version"]
+    assert f'model_info{{version="{version}"}} 1' in text
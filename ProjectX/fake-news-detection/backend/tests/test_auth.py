@@ -0,0 +1,70 @@
+import time
+from datetime import timedelta
+
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from jose import jwt
+
+import backend.auth
+from backend.auth import Principal, TokenCache, create_access_token, get_current_user, token_cache
+from backend.repository import InMemoryRepository, use_repository
+
+app = FastAPI()
+
+@app.get("/whoami")
+async def whoami(user: Principal = Depends(get_current_user)):
+    return user._asdict()
+
+client = TestClient(app)
+
+@pytest.fixture(autouse=True)
+def repo():
+    repo = InMemoryRepository({"users": [{"id": "u1", "email": "ada@example.com", "password": "x"}]})
+    previous = use_repository(repo)
+    token_cache.clear()
+    yield repo
+    use_repository(previous)
+
+def get(token):
+    return client.get("/whoami", headers={"Authorization": f"Bearer {token}"})
+
+def test_repeat_requests_skip_verification_and_lookup(repo, monkeypatch):
+    decodes = []
+    real_decode = backend.auth.jwt.decode
+    monkeypatch.setattr(backend.auth.jwt, "decode", lambda *a, **kw: decodes.append(1) or real_decode(*a, **kw))
+
+    # A token without the uid claim needs one user lookup, then none
+    token = create_access_token({"sub": "ada@example.com"})
+    hits_before = token_cache.hits
+    responses = [get(token) for _ in range(3)]
+    assert [r.json() for r in responses] == [{"user_id": "u1", "email": "ada@example.com"}] * 3
+    assert len(decodes) == 1
+    assert repo.calls[("GET", "users")] == 1
+    assert token_cache.hits - hits_before == 2
+
+def test_rejected_tokens():
+    assert client.get("/whoami").status_code == 401
+    assert get("not-a-jwt").json()["detail"] == "Invalid token"
+    expired = create_access_token({"sub": "ada@example.com", "uid": "u1"}, expires_delta=timedelta(seconds=-1))
+    assert get(expired).json()["detail"] == "Token expired"
+    reset = create_access_token({"sub": "ada@example.com", "scope": "password_reset"})
+    assert get(reset).status_code == 401
+    assert get(create_access_token({"sub": "nobody@example.com"})).json()["detail"] == "User not found"
+
+def test_token_cache_is_bounded_by_size_and_expiry():
+    cache = TokenCache(max_size=2)
+    principal = Principal("u1", "ada@example.com")
+    cache.put("a", principal, time.time() + 60)
+    cache.put("b", principal, time.time() + 60)
+    cache.get("a")
+    cache.put("c", principal, time.time() + 60)  # evicts b, the least recently used
+    assert cache.get("b") is None and cache.get("a") == principal
+    cache.put("d", principal, time.time() - 1)
+    assert cache.get("d") is None
+    assert cache.stats()["evictions"] == 2
+
+def test_access_tokens_last_the_configured_lifetime(monkeypatch):
+    monkeypatch.setattr(backend.auth, "ACCESS_TOKEN_EXPIRE_MINUTES", 45)
+    claims = jwt.get_unverified_claims(create_access_token({"sub": "ada@example.com"}))
+    assert abs(claims["exp"] - time.time() - 45 * 60) < 5
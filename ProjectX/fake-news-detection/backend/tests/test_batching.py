@@ -0,0 +1,55 @@
+import asyncio
+from backend.batching import PredictionBatcher
+
+def fake_predict_batch(texts):
+    return [{"prediction": "FAKE", "confidence": len(text)} for text in texts]
+
+def test_concurrent_predictions_share_a_batch():
+    batcher = PredictionBatcher(fake_predict_batch, max_batch_size=8, max_wait_ms=50)
+
+    async def run():
+        results = await asyncio.gather(*(batcher.predict("x" * n) for n in range(1, 6)))
+        await batcher.close()
+        return results
+
+    results = asyncio.run(run())
+    assert [r["confidence"] for r in results] == [1, 2, 3, 4, 5]
+    assert batcher.stats()["batch_size_distribution"] == {5: 1}
+
+def test_batches_are_capped_at_max_batch_size():
+    batcher = PredictionBatcher(fake_predict_batch, max_batch_size=2, max_wait_ms=50)
+
+    async def run():
+        await asyncio.gather(*(batcher.predict("text") for _ in range(5)))
+        await batcher.close()
+
+    asyncio.run(run())
+    stats = batcher.stats()
+    assert stats["items"] == 5
+    assert max(stats["batch_size_distribution"]) == 2
+
+def test_batch_errors_reach_every_caller():
+    def failing_batch(texts):
+        raise RuntimeError("model unavailable")
+
+    batcher = PredictionBatcher(failing_batch, max_wait_ms=10)
+
+    async def run():
+        results = await asyncio.gather(batcher.predict("a"), batcher.predict("b"), return_exceptions=True)
+        await batcher.close()
+        return results
+
+    assert all(isinstance(r, RuntimeError) for r in asyncio.run(run()))
+
+def test_close_scores_what_is_still_queued():
+    batcher = PredictionBatcher(fake_predict_batch, max_batch_size=2, max_wait_ms=50)
+
+    async def run():
+        pending = [asyncio.ensure_future(batcher.predict("x" * n)) for n in range(1, 6)]
+        await asyncio.sleep(0)  # queued, not yet scored
+        await batcher.close()
+        assert all(future.done() for future in pending)
+        return [future.result()["confidence"] for future in pending]
+
+    assert asyncio.run(run()) == [1, 2, 3, 4, 5]
+    assert batcher.stats()["items"] == 5
@@ -0,0 +1,30 @@
+import json
+
+from backend.config import Settings
+
+def test_environment_overrides_dotenv_which_overrides_config_file(tmp_path, monkeypatch):
+    config = tmp_path / "config.json"
+    config.write_text(json.dumps({"supabase": {"url": "https://file.example", "key": "file-key"},
+                                  "rss_feeds": ["http://a.test/rss", " http://a.test/rss "]}))
+    env_file = tmp_path / ".env"
+    env_file.write_text("SUPABASE_KEY=dotenv-key\nDB_TIMEOUT=2.5\nRSS_SCHEDULER_ENABLED=no\n")
+    for name in ("SUPABASE_URL", "SUPABASE_KEY", "DB_TIMEOUT", "RSS_FEEDS", "RSS_SCHEDULER_ENABLED"):
+        monkeypatch.delenv(name, raising=False)
+    settings = Settings(str(config), str(env_file))
+
+    assert settings.supabase_url == "https://file.example"
+    assert settings.supabase_key == "dotenv-key"
+    assert settings.get_float("DB_TIMEOUT", 5) == 2.5
+    assert settings.get_bool("RSS_SCHEDULER_ENABLED", True) is False
+    assert settings.rss_feeds == ["http://a.test/rss"]
+
+    monkeypatch.setenv("SUPABASE_KEY", "env-key")
+    assert settings.supabase_key == "env-key"
+
+def test_missing_files_are_empty(tmp_path, monkeypatch):
+    monkeypatch.delenv("MODEL_REGISTRY_DIR", raising=False)
+    monkeypatch.delenv("RSS_FEEDS", raising=False)
+    settings = Settings(str(tmp_path / "missing.json"), str(tmp_path / ".env"))
+    assert settings.rss_feeds == []
+    assert settings.model_registry == "models/registry"
+    assert settings.get_int("DB_MAX_CONNECTIONS", 20) == 20
@@ -0,0 +1,64 @@
+import pickle
+import importlib.util
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.base import clone
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from backend.benchmarks.common import load_liar_texts
+from backend.feature_cache import FeatureCache, CachedTfidfVectorizer
+from backend.text_normalization import clean_texts
+
+SOURCES = ["dataset/liar/valid.tsv"]
+
+@pytest.fixture(scope="module")
+def corpus(tmp_path_factory):
+    cache = FeatureCache(str(tmp_path_factory.mktemp("features")))
+    return cache.corpus("liar", lambda: pd.DataFrame({"text": clean_texts(load_liar_texts(["valid.tsv"]))}), SOURCES)
+
+@pytest.mark.parametrize("ngram_range,max_features", [((1, 1), None), ((1, 3), 500), ((1, 3), 50000)])
+def test_matches_tfidf_vectorizer(corpus, ngram_range, max_features):
+    rows = np.random.default_rng(0).permutation(len(corpus.frame))
+    fit_rows, new_rows = rows[:800], rows[800:]
+    texts = corpus.frame["text"]
+
+    cached = CachedTfidfVectorizer(corpus, ngram_range, max_features).fit(fit_rows)
+    reference = TfidfVectorizer(analyzer="char_wb", ngram_range=ngram_range, max_features=max_features)
+    reference.fit(texts.iloc[fit_rows])
+
+    assert cached.get_feature_names_out().tolist() == reference.get_feature_names_out().tolist()
+    diff = cached.transform(new_rows) - reference.transform(texts.iloc[new_rows])
+    assert abs(diff).max() < 1e-12
+
+def test_corpus_is_reused_across_runs(corpus):
+    corpus.counts((1, 2))
+    reopened = FeatureCache(corpus.path.rsplit("/", 1)[0]).corpus("liar", lambda: pytest.fail("corpus rebuilt"), SOURCES)
+    assert reopened.key == corpus.key
+    assert reopened.frame.equals(corpus.frame)
+    assert reopened.counts((1, 2)).counts.shape == corpus.counts((1, 2)).counts.shape
+
+def test_clone_and_pickle_share_the_cache(corpus):
+    vectorizer = CachedTfidfVectorizer(corpus, (1, 2))
+    assert clone(vectorizer).corpus is corpus
+    # Workers receive only the cache path and memory-map the counts themselves
+    assert len(pickle.dumps(corpus)) < 1000
+    assert pickle.loads(pickle.dumps(corpus)).counts((1, 2)).counts.shape[0] == len(corpus.frame)
+
+def load_module(path):
+    spec = importlib.util.spec_from_file_location(path.stem, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def test_key_covers_the_preparing_code_and_parameters(tmp_path):
+    prepare = tmp_path / "prepare.py"
+    prepare.write_text("MAPPING = {'false': 1, 'true': 0}\ndef build():\n    pass\n")
+    before = FeatureCache.fingerprint(load_module(prepare).build, SOURCES)
+    assert FeatureCache.fingerprint(load_module(prepare).build, SOURCES) == before
+
+    prepare.write_text("MAPPING = {'false': 1, 'half-true': 1, 'true': 0}\ndef build():\n    pass\n")
+    after = FeatureCache.fingerprint(load_module(prepare).build, SOURCES)
+    assert after != before
+    assert FeatureCache.fingerprint(load_module(prepare).build, SOURCES, {"min_length": 20}) != after
@@ -0,0 +1,130 @@
+import asyncio
+import time
+
+from backend.cron_job import FeedScheduler, FeedSchedule
+from backend.process_lock import ProcessLock
+from backend.repository import InMemoryRepository, use_repository
+
+class ScriptedIngestor:
+    """Answers each cycle with the outcome scripted per feed (new entry count or an error string)."""
+
+    def __init__(self, outcomes: dict):
+        self.outcomes = outcomes
+        self.cycles = []
+
+    async def run(self, repo, urls):
+        self.cycles.append(list(urls))
+        per_feed = {}
+        for url in urls:
+            outcome = self.outcomes[url]
+            if isinstance(outcome, str):
+                per_feed[url] = {"status": "error", "error": outcome}
+            else:
+                per_feed[url] = {"status": "ok", "new_entries": outcome}
+        return {"store_errors": [], "per_feed": per_feed}
+
+def make_scheduler(outcomes: dict, **kwargs) -> FeedScheduler:
+    options = dict(urls=list(outcomes), initial_interval=100, min_interval=10, max_interval=1000, jitter=0)
+    options.update(kwargs)
+    return FeedScheduler(ScriptedIngestor(outcomes), **options)
+
+def test_intervals_adapt_to_publishing_rate_and_back_off_on_errors():
+    busy, quiet, broken = "http://busy.test/rss", "http://quiet.test/rss", "http://broken.test/rss"
+    scheduler = make_scheduler({busy: 5, quiet: 0, broken: "ConnectTimeout()"})
+    feeds = [FeedSchedule(url, 100, 0) for url in (busy, quiet, broken)]
+    scheduler.feeds = {feed.url: feed for feed in feeds}
+
+    asyncio.run(scheduler.poll(feeds))
+    asyncio.run(scheduler.poll(feeds))
+
+    assert scheduler.ingestor.cycles == [[busy, quiet, broken]] * 2
+    assert scheduler.feeds[busy].interval == 25
+    assert scheduler.feeds[quiet].interval == 225
+    broken_feed = scheduler.feeds[broken]
+    assert broken_feed.interval == 100 and broken_feed.consecutive_failures == 2
+    assert broken_feed.next_run - time.monotonic() > 390  # 100 * 2**2
+
+    health = {feed["url"]: feed for feed in scheduler.health()["feeds"]}
+    assert health[broken]["failures"] == 2 and health[broken]["last_error"] == "ConnectTimeout()"
+    assert health[busy]["last_new_entries"] == 5 and health[busy]["last_success_at"]
+
+def test_intervals_stay_within_bounds():
+    url = "http://busy.test/rss"
+    scheduler = make_scheduler({url: 3})
+    feed = FeedSchedule(url, 100, 0)
+    scheduler.feeds = {url: feed}
+    for _ in range(5):
+        asyncio.run(scheduler.poll([feed]))
+    assert feed.interval == 10
+
+    scheduler.ingestor.outcomes[url] = "HTTPStatusError()"
+    for _ in range(8):
+        asyncio.run(scheduler.poll([feed]))
+    assert feed.next_run - time.monotonic() <= 1000
+
+def test_store_errors_fail_every_feed_of_the_cycle():
+    class FailingStore(ScriptedIngestor):
+        async def run(self, repo, urls):
+            summary = await super().run(repo, urls)
+            return {**summary, "store_errors": ["Failed to store news"]}
+
+    url = "http://busy.test/rss"
+    scheduler = FeedScheduler(FailingStore({url: 4}), urls=[url], min_interval=10, max_interval=1000, jitter=0)
+    feed = FeedSchedule(url, 100, 0)
+    asyncio.run(scheduler.poll([feed]))
+    assert feed.consecutive_failures == 1 and feed.last_error == "Failed to store news"
+
+def test_runs_in_the_background_and_stops_cleanly():
+    repo = InMemoryRepository()
+    previous = use_repository(repo)
+    urls = {"http://a.test/rss": 1, "http://b.test/rss": 0}
+    scheduler = make_scheduler(urls, initial_interval=0.05, min_interval=0.02, max_interval=0.1,
+                               jitter=0.2, initial_delay=0)
+
+    async def exercise():
+        scheduler.start()
+        assert scheduler.running
+        await asyncio.sleep(0.5)
+        health = scheduler.health()
+        await scheduler.stop()
+        return health
+
+    try:
+        health = asyncio.run(exercise())
+    finally:
+        use_repository(previous)
+
+    assert health["status"] == "healthy"
+    assert all(feed["polls"] >= 3 and feed["consecutive_failures"] == 0 for feed in health["feeds"])
+    assert not scheduler.running and scheduler.health()["status"] == "stopped"
+
+def test_only_the_process_holding_the_lock_polls(tmp_path):
+    repo = InMemoryRepository()
+    previous = use_repository(repo)
+    urls = {"http://a.test/rss": 1}
+    options = dict(initial_interval=0.05, min_interval=0.02, max_interval=0.1, initial_delay=0)
+    # Two worker processes, each with its own lock on the same file
+    first = make_scheduler(urls, lock=ProcessLock(str(tmp_path / "scheduler.lock")), **options)
+    second = make_scheduler(urls, lock=ProcessLock(str(tmp_path / "scheduler.lock")), **options)
+
+    async def exercise():
+        first.start()
+        await asyncio.sleep(0.01)
+        second.start()
+        await asyncio.sleep(0.3)
+        assert first.ingestor.cycles and not second.ingestor.cycles
+        assert first.health()["holds_lock"] and second.health()["status"] == "standby"
+        await first.stop()  # the polling worker exits
+        await asyncio.sleep(0.3)
+        await second.stop()
+
+    try:
+        asyncio.run(exercise())
+    finally:
+        use_repository(previous)
+    assert second.ingestor.cycles
+
+def test_disabled_scheduler_does_not_start():
+    scheduler = make_scheduler({"http://a.test/rss": 1}, enabled=False)
+    scheduler.start()  # returns before touching the event loop
+    assert not scheduler.running
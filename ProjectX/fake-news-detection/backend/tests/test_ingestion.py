@@ -0,0 +1,218 @@
+import asyncio
+import hashlib
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from pathlib import Path
+
+import pytest
+
+from backend.feed_state import FeedStateStore
+from backend.ingestion import FeedIngestor, load_feed_urls, parse_feed
+from backend.metrics import metrics
+from backend.near_duplicates import NearDuplicateIndex
+from backend.repository import InMemoryRepository, RepositoryError
+
+FEEDS = Path(__file__).parent / "data" / "feeds"
+
+class FeedServer(ThreadingHTTPServer):
+    """Serves the fixture feeds with ETags, counting how many requests run at once."""
+
+    daemon_threads = True
+    block_on_close = False
+    delay = 0.05
+    active = 0
+    max_active = 0
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), FeedHandler)
+        self.lock = threading.Lock()
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+class FeedHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.active += 1
+            server.max_active = max(server.max_active, server.active)
+        try:
+            path = self.path.split("?")[0]
+            time.sleep(2 if path == "/slow.xml" else server.delay)
+            feed = FEEDS / path.lstrip("/")
+            if not feed.is_file():
+                self.send_error(404)
+                return
+            body = feed.read_bytes()
+            etag = f'"{hashlib.sha1(body).hexdigest()}"'
+            if self.headers.get("If-None-Match") == etag:
+                self.send_response(304)
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Type", "application/rss+xml")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        finally:
+            with server.lock:
+                server.active -= 1
+
+    def log_message(self, format, *args):
+        pass
+
+@pytest.fixture
+def feed_server():
+    server = FeedServer()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+def test_parse_feed_skips_entries_without_title_or_link():
+    entries = parse_feed((FEEDS / "tech.xml").read_bytes())
+    assert [row["link"] for _, row in entries] == ["http://example.org/tech/chips", "http://example.org/wire/shared"]
+    assert entries[0][0] == "tech-chips-1"  # the GUID, when the feed has one
+    world = parse_feed((FEEDS / "world.xml").read_bytes())
+    entry_id, row = world[2]
+    assert entry_id == "http://example.org/wire/shared" and row["description"] == "No description available"
+    assert world[0][1]["published_at"] == "2024-06-04T08:30:00+00:00"
+    assert row["published_at"]  # no pubDate: the fetch time
+
+def test_load_feed_urls_strips_config_entries(tmp_path, monkeypatch):
+    monkeypatch.delenv("RSS_FEEDS", raising=False)
+    config = tmp_path / "config.json"
+    config.write_text('{"rss_feeds": ["http://a.test/rss", " http://b.test/rss ", "http://a.test/rss", ""]}')
+    assert load_feed_urls(str(config)) == ["http://a.test/rss", "http://b.test/rss"]
+
+    monkeypatch.setenv("RSS_FEEDS", "http://c.test/rss, http://d.test/rss")
+    assert load_feed_urls(str(config)) == ["http://c.test/rss", "http://d.test/rss"]
+
+def test_run_fetches_concurrently_and_upserts_in_bulk(feed_server):
+    repo = InMemoryRepository({"news": [{"id": 1, "title": "Old", "link": "http://example.org/world/summit"}]})
+    base = feed_server.base_url
+    urls = [f"{base}/world.xml?copy={i}" for i in range(6)] + [f"{base}/tech.xml", f"{base}/missing.xml"]
+    ingestor = FeedIngestor(max_concurrency=8, per_host_limit=3, timeout=1)
+
+    summary = asyncio.run(ingestor.run(repo, urls))
+
+    assert summary["feeds"] == 8
+    assert summary["failed_feeds"] == [f"{base}/missing.xml"]
+    assert summary["entries"] == 4  # duplicates across feeds collapsed before the insert
+    assert summary["rows_written"] == 3
+    assert summary["store_errors"] == []
+    assert 1 < feed_server.max_active <= 3
+    assert repo.calls[("POST", "news")] == 1
+    rendered = metrics.render()
+    assert f'rss_fetches_total{{feed="{base}/tech.xml",status="ok"}} 1' in rendered
+    assert f'rss_fetches_total{{feed="{base}/missing.xml",status="error"}} 1' in rendered
+    assert f'rss_fetch_bytes_total{{feed="{base}/tech.xml"}} {len((FEEDS / "tech.xml").read_bytes())}' in rendered
+    links = sorted(row["link"] for row in repo.tables["news"])
+    assert links == ["http://example.org/tech/chips", "http://example.org/wire/shared",
+                     "http://example.org/world/floods", "http://example.org/world/summit"]
+    # The existing row is left alone rather than overwritten
+    assert next(row for row in repo.tables["news"] if row["id"] == 1)["title"] == "Old"
+
+def test_slow_feed_times_out_without_blocking_others(feed_server):
+    repo = InMemoryRepository()
+    base = feed_server.base_url
+    ingestor = FeedIngestor(per_host_limit=4, timeout=0.5)
+
+    start = time.perf_counter()
+    summary = asyncio.run(ingestor.run(repo, [f"{base}/slow.xml", f"{base}/tech.xml", "not a url"]))
+
+    assert time.perf_counter() - start < 1.5
+    assert summary["failed_feeds"] == [f"{base}/slow.xml"]
+    assert summary["invalid_feeds"] == 1
+    assert len(repo.tables["news"]) == 2
+
+def test_conditional_polls_skip_unchanged_feeds_and_seen_entries(feed_server, tmp_path):
+    repo = InMemoryRepository()
+    base = feed_server.base_url
+    state_file = tmp_path / "feed_state.json"
+    urls = [f"{base}/world.xml", f"{base}/tech.xml"]
+
+    first = asyncio.run(FeedIngestor(state=FeedStateStore(str(state_file))).run(repo, urls))
+    assert first["rows_written"] == 4 and first["bytes_downloaded"] > 0
+
+    # A new instance picks the validators up from disk, so both feeds answer 304
+    second = asyncio.run(FeedIngestor(state=FeedStateStore(str(state_file))).run(repo, urls))
+    assert second["not_modified"] == 2
+    assert second["bytes_downloaded"] == 0 and second["entries"] == 0
+    assert repo.calls[("POST", "news")] == 1
+
+def test_seen_entries_are_not_resubmitted_when_a_feed_changes(feed_server):
+    repo = InMemoryRepository()
+    url = f"{feed_server.base_url}/world.xml"
+    state = FeedStateStore(path=None)
+    ingestor = FeedIngestor(state=state)
+    asyncio.run(ingestor.run(repo, [url]))
+
+    # Without validators the feed is downloaded again, but nothing in it is new
+    state.feeds[url]["etag"] = None
+    again = asyncio.run(ingestor.run(repo, [url]))
+    assert again["bytes_downloaded"] > 0
+    assert again["entries"] == 0 and again["rows_written"] == 0
+    assert repo.calls[("POST", "news")] == 1
+
+def test_state_is_saved_from_snapshots(tmp_path):
+    state = FeedStateStore(str(tmp_path / "feed_state.json"))
+    state.update("https://a.example/rss", etag='"1"', entry_ids=["a1"])
+    older = state.snapshot()
+    # A concurrent run updating the state does not change a snapshot being written
+    state.update("https://a.example/rss", etag='"2"', entry_ids=["a2"])
+    state.update("https://b.example/rss", entry_ids=["b1"])
+    assert older["feeds"]["https://a.example/rss"]["etag"] == '"1"'
+    assert older["feeds"]["https://a.example/rss"]["seen"] == ["a1"]
+
+    state.save(state.snapshot())
+    state.save(older)  # finished writing last, but must not replace the newer state
+    saved = FeedStateStore(str(tmp_path / "feed_state.json"))
+    assert saved.get("https://a.example/rss")["seen"] == ["a1", "a2"] and saved.get("https://b.example/rss")
+
+def test_processes_sharing_the_state_file_keep_each_others_feeds(tmp_path):
+    path = str(tmp_path / "feed_state.json")
+    polling, manual = FeedStateStore(path), FeedStateStore(path)
+    manual.feeds  # loaded at startup, before anything was polled
+    polling.update("https://a.example/rss", etag='"2"', entry_ids=["a1", "a2"])
+    polling.save()
+
+    # A stale copy does not overwrite the newer feed it never polled
+    manual.update("https://b.example/rss", entry_ids=["b1"])
+    manual.save()
+    saved = FeedStateStore(path)
+    assert saved.get("https://a.example/rss")["etag"] == '"2"' and saved.get("https://b.example/rss")["seen"] == ["b1"]
+
+    # ...and picks it up before its next cycle
+    manual.merge(manual.read())
+    assert manual.conditional_headers("https://a.example/rss") == {"If-None-Match": '"2"'}
+
+def test_failed_store_keeps_state_for_a_retry(feed_server):
+    class FailingRepository(InMemoryRepository):
+        async def insert(self, *args, **kwargs):
+            raise RepositoryError("database unavailable", status=503)
+
+    url = f"{feed_server.base_url}/tech.xml"
+    state = FeedStateStore(path=None)
+    summary = asyncio.run(FeedIngestor(state=state).run(FailingRepository(), [url]))
+    assert summary["store_errors"] and state.get(url) == {}
+
+    repo = InMemoryRepository()
+    assert asyncio.run(FeedIngestor(state=state).run(repo, [url]))["rows_written"] == 2
+
+def test_syndicated_copies_are_linked_to_their_canonical(feed_server):
+    repo = InMemoryRepository()
+    base = feed_server.base_url
+    ingestor = FeedIngestor(dedup=NearDuplicateIndex(":memory:"))
+    asyncio.run(ingestor.run(repo, [f"{base}/world.xml"]))
+    summary = asyncio.run(ingestor.run(repo, [f"{base}/syndicated.xml"]))
+
+    assert summary["near_duplicates"] == 1
+    copy = next(row for row in repo.tables["news"] if row["link"].startswith("http://example.net/"))
+    assert copy["canonical_link"] == "http://example.org/world/floods"
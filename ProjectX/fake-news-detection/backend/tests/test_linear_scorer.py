@@ -0,0 +1,49 @@
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import make_pipeline
+
+from backend.linear_model import LinearTextScorer, export_linear_model
+from backend.utils import clean_text
+
+LIAR_COLUMNS = [
+    'id', 'label', 'statement', 'subjects', 'speaker', 'speaker_job_title',
+    'state_info', 'party_affiliation', 'barely_true_counts', 'false_counts',
+    'half_true_counts', 'mostly_true_counts', 'pants_on_fire_counts', 'context'
+]
+FAKE_LABELS = {'pants-fire', 'false', 'barely-true'}
+
+def load_split(name):
+    df = pd.read_csv(f"dataset/liar/{name}", sep="\t", header=None, names=LIAR_COLUMNS)
+    return df["statement"].astype(str).apply(clean_text).tolist(), df["label"].isin(FAKE_LABELS).astype(int)
+
+def test_linear_scorer_matches_joblib_pipeline(tmp_path):
+    X_train, y_train = load_split("train.tsv")
+    pipeline = make_pipeline(
+        TfidfVectorizer(analyzer="char_wb", ngram_range=(1, 3), max_features=5000),
+        LogisticRegression(max_iter=1000, solver="liblinear")
+    )
+    pipeline.fit(X_train, y_train)
+    joblib.dump(pipeline, tmp_path / "model.pkl")
+    loaded = joblib.load(tmp_path / "model.pkl")
+
+    export_linear_model(loaded, str(tmp_path / "linear"))
+    scorer = LinearTextScorer.load(str(tmp_path / "linear"))
+    assert isinstance(scorer.coef, np.memmap)
+
+    for split in ("train.tsv", "valid.tsv", "test.tsv"):
+        texts, _ = load_split(split)
+        expected = loaded.predict_proba(texts)[:, 1]
+        np.testing.assert_allclose(scorer.predict_fake_proba(texts), expected, rtol=0, atol=1e-10)
+
+def test_char_wb_ngrams_match_sklearn():
+    vectorizer = TfidfVectorizer(analyzer="char_wb", ngram_range=(2, 4))
+    analyzer = vectorizer.build_analyzer()
+    scorer = LinearTextScorer(
+        terms=np.array(["ab"]), idf=np.ones(1), coef=np.ones(1),
+        intercept=0.0, classes=[0, 1], ngram_range=(2, 4)
+    )
+    text = "a bb  ccc Dddd\teeeee"
+    assert scorer.ngrams(text) == analyzer(text)
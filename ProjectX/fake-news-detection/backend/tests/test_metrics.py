@@ -0,0 +1,78 @@
+import asyncio
+
+import httpx
+import pytest
+
+from backend.metrics import MetricsRegistry, MetricsMiddleware, metrics
+from backend.repository import SupabaseRepository, RepositoryError
+
+def sample(text: str, line_prefix: str) -> float:
+    """The value of the exposition line starting with line_prefix (a metric name with its labels)."""
+    for line in text.splitlines():
+        if line.startswith(line_prefix + " "):
+            return float(line.rsplit(" ", 1)[1])
+    raise AssertionError(f"{line_prefix} not exposed")
+
+def test_histogram_buckets_are_cumulative_and_labels_escaped():
+    registry = MetricsRegistry()
+    latency = registry.histogram("stage_seconds", "Stage time.", ("stage",), buckets=(0.01, 0.1))
+    for value in (0.005, 0.01, 0.05, 3):
+        latency.labels('say "hi"').observe(value)
+    registry.counter("jobs_total", "Jobs.").inc(2)
+
+    text = registry.render()
+    assert "# TYPE stage_seconds histogram" in text
+    assert sample(text, 'stage_seconds_bucket{stage="say \\"hi\\"",le="0.01"}') == 2
+    assert sample(text, 'stage_seconds_bucket{stage="say \\"hi\\"",le="0.1"}') == 3
+    assert sample(text, 'stage_seconds_bucket{stage="say \\"hi\\"",le="+Inf"}') == 4
+    assert sample(text, 'stage_seconds_count{stage="say \\"hi\\""}') == 4
+    assert sample(text, 'stage_seconds_sum{stage="say \\"hi\\""}') == pytest.approx(3.065)
+    assert sample(text, "jobs_total") == 2
+
+    assert registry.counter("jobs_total", "Jobs.") is registry.counter("jobs_total", "Jobs.")
+    with pytest.raises(ValueError):
+        registry.gauge("jobs_total", "Jobs.")
+    with pytest.raises(ValueError):
+        latency.labels()
+
+def test_database_round_trips_are_counted_by_outcome():
+    def handler(request):
+        if request.url.path.endswith("/missing"):
+            return httpx.Response(404, json={"message": "relation does not exist"})
+        return httpx.Response(200, json=[])
+    repo = SupabaseRepository("https://db.example.test", "anon-key", transport=httpx.MockTransport(handler))
+    before = metrics.render()
+
+    async def exercise():
+        await repo.select("metrics_probe")
+        with pytest.raises(RepositoryError):
+            await repo.select("missing")
+        await repo.close()
+    asyncio.run(exercise())
+
+    text = metrics.render()
+    assert 'db_requests_total{method="GET",table="metrics_probe",outcome="ok"} 1' in text
+    assert 'db_requests_total{method="GET",table="missing",outcome="error"} 1' in text
+    assert 'db_request_duration_seconds_count{method="GET",table="metrics_probe"} 1' in text
+    assert "metrics_probe" not in before
+
+def test_middleware_labels_requests_by_route_template():
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware)
+
+    @app.get("/items/{item_id}")
+    def item(item_id: int):
+        return {"id": item_id}
+
+    client = TestClient(app)
+    for item_id in range(3):
+        assert client.get(f"/items/{item_id}").status_code == 200
+    assert client.get("/nowhere").status_code == 404
+
+    text = metrics.render()
+    assert sample(text, 'http_requests_total{method="GET",route="/items/{item_id}",status="200"}') >= 3
+    assert sample(text, 'http_requests_total{method="GET",route="unmatched",status="404"}') >= 1
+    assert '/items/1"' not in text
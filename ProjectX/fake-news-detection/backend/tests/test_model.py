@@ -1,6 +1,28 @@
-from backend.models import predict_fake_news
+import joblib
+from backend.models import predict_fake_news, predict_fake_news_batch
+from backend.model_registry import load_decision_threshold
 
 def test_fake_news_prediction():
     result = predict_fake_news("This is completely fake news!")
     assert result["prediction"] in ["FAKE", "REAL"]
-    assert 0.0 <= result["confidence"] <= 1.0
\ No newline at end of file
+    assert 0.0 <= result["confidence"] <= 1.0
+
+def test_fake_news_batch_prediction():
+    texts = ["This is completely fake news!", "   ", "The senate passed the budget bill on Tuesday."]
+    results = predict_fake_news_batch(texts)
+    assert len(results) == 3
+    assert results[1] == {"error": "No text provided"}
+    for result in (results[0], results[2]):
+        assert result["prediction"] in ["FAKE", "REAL"]
+        assert 0.0 <= result["confidence"] <= 1.0
+    single = predict_fake_news(texts[0])
+    assert (single["prediction"], single["confidence"]) == (results[0]["prediction"], results[0]["confidence"])
+
+
+def test_load_decision_threshold(tmp_path):
+    path = tmp_path / "threshold.pkl"
+    joblib.dump(0.42, path)
+    assert load_decision_threshold(str(path)) == 0.42
+    joblib.dump({"threshold": 0.6}, path)
+    assert load_decision_threshold(str(path)) == 0.6
+    assert load_decision_threshold(str(tmp_path / "missing.pkl")) == 0.5
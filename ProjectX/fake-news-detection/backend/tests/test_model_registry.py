@@ -0,0 +1,48 @@
+import pytest
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import make_pipeline
+
+from backend.model_registry import ModelRegistry
+from backend.models import ModelManager
+from backend.prediction_cache import PredictionCache
+
+TEXTS = ["the senate passed the bill", "aliens built the pyramids", "taxes rose last year", "vaccines contain microchips"]
+LABELS = [0, 1, 0, 1]
+
+def train(C=1.0):
+    pipeline = make_pipeline(TfidfVectorizer(analyzer="char_wb", ngram_range=(1, 3)), LogisticRegression(C=C))
+    return pipeline.fit(TEXTS, LABELS)
+
+def test_publish_and_load_versions(tmp_path):
+    registry = ModelRegistry(str(tmp_path))
+    v1 = registry.publish(train(), threshold=0.4, version="v1")
+    v2 = registry.publish(train(C=10), version="v2", activate=False)
+
+    assert registry.current_version() == v1
+    assert registry.versions() == ["v1", "v2"]
+    loaded = registry.load()
+    assert (loaded.version, loaded.threshold) == ("v1", 0.4)
+    assert loaded.scorer is not None  # served from the memory-mapped export
+    assert registry.load(v2).version == "v2"
+    with pytest.raises(KeyError):
+        registry.load("v3")
+
+def test_manager_swaps_to_activated_version(tmp_path):
+    registry = ModelRegistry(str(tmp_path))
+    registry.publish(train(), version="v1")
+    cache = PredictionCache("v1")
+    manager = ModelManager(registry, cache)
+    old_model = manager.current
+
+    registry.publish(train(C=10), version="v2")
+    assert manager.reload() is True
+    assert manager.current.version == "v2"
+    assert cache.model_version == "v2"
+    # In-flight requests holding the old model can still finish with it
+    assert old_model.predict_fake_proba(["the senate passed the bill"]).shape == (1,)
+
+    assert manager.reload() is False
+    registry.activate("v1")
+    assert manager.reload() is True
+    assert manager.current.version == "v1"
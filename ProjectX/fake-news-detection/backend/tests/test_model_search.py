@@ -0,0 +1,54 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import Pipeline
+
+from backend.benchmarks.common import load_liar_texts
+from backend.feature_cache import FeatureCache, CachedTfidfVectorizer
+from backend.model_search import run_search, write_search_report
+from backend.text_normalization import clean_texts
+
+PARAM_GRID = {
+    "tfidfvectorizer__ngram_range": [(1, 1), (1, 2)],
+    "tfidfvectorizer__max_features": [200, 1000],
+    "logisticregression__C": [0.1, 1, 10],
+}
+
+@pytest.fixture(scope="module")
+def search_inputs(tmp_path_factory):
+    cache = FeatureCache(str(tmp_path_factory.mktemp("features")))
+    corpus = cache.corpus("liar", lambda: pd.DataFrame({"text": clean_texts(load_liar_texts(["valid.tsv"]))}),
+                          ["dataset/liar/valid.tsv"])
+    pipeline = Pipeline([
+        ("tfidfvectorizer", CachedTfidfVectorizer(corpus)),
+        ("logisticregression", LogisticRegression(solver="liblinear")),
+    ])
+    rows = np.arange(len(corpus.frame))
+    # A label the features can actually predict, so the search has an optimum to find
+    y = corpus.frame["text"].str.contains("percent").astype(int).to_numpy()
+    return pipeline, rows, y
+
+def test_exhaustive_and_halving_reports(search_inputs, tmp_path):
+    pipeline, rows, y = search_inputs
+    _, exhaustive = run_search("exhaustive", pipeline, PARAM_GRID, rows, y, cv=3, n_jobs=1)
+    _, halving = run_search("halving", pipeline, PARAM_GRID, rows, y, cv=3, n_jobs=1)
+
+    assert exhaustive["n_candidates"] == halving["n_candidates"] == 12
+    assert exhaustive["n_fits"] == 36
+    assert halving["sample_fits"] < exhaustive["sample_fits"]
+    assert halving["n_resources"][-1] <= len(rows)
+    for report in (exhaustive, halving):
+        assert report["wall_clock_seconds"] > 0 and report["peak_rss_mb"] > 0
+        assert 0 <= report["best_score"] <= 1
+
+    path = write_search_report(halving, str(tmp_path / "report.json"))
+    with open(path) as f:
+        assert json.load(f)["mode"] == "halving"
+
+def test_unknown_mode_is_rejected(search_inputs):
+    pipeline, rows, y = search_inputs
+    with pytest.raises(ValueError):
+        run_search("random", pipeline, PARAM_GRID, rows, y)
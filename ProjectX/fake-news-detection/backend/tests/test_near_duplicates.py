@@ -0,0 +1,58 @@
+import sqlite3
+
+import pytest
+
+from backend.near_duplicates import NearDuplicateIndex, lsh_bands
+
+STORY = ("Leaders left the climate summit in Geneva without a joint statement on finance for poorer "
+         "countries, officials said on Friday, after talks ran through the night.")
+EDITED = ("Leaders left the climate summit in Geneva without a joint statement on finance for poorer "
+          "countries, officials said Friday after talks ran through the night.")
+OTHER = "Chipmaker posts a record quarter as demand for AI accelerators drove revenue up sharply."
+
+def test_band_layout_follows_the_threshold():
+    bands, rows = lsh_bands(0.8, 128)
+    assert bands * rows <= 128
+    # Probability of becoming a candidate is low well below the threshold and high above it
+    assert 1 - (1 - 0.5 ** rows) ** bands < 0.05
+    assert 1 - (1 - 0.95 ** rows) ** bands > 0.99
+    assert lsh_bands(0.5, 128)[1] < rows
+
+def test_syndicated_copies_link_to_the_first_copy(tmp_path):
+    index = NearDuplicateIndex(str(tmp_path / "index.sqlite"))
+    canonical = index.assign_many([("bbc/1", STORY), ("cnn/1", EDITED), ("tech/1", OTHER)])
+    assert canonical == {"bbc/1": "bbc/1", "cnn/1": "bbc/1", "tech/1": "tech/1"}
+
+    # A copy of a copy still points at the original
+    assert index.assign("ndtv/1", EDITED.upper()) == "bbc/1"
+    link, canonical_link, similarity = index.query(STORY + " ")
+    assert canonical_link == "bbc/1" and similarity >= 0.8
+
+def test_index_persists_and_is_rebuilt_when_parameters_change(tmp_path):
+    path = str(tmp_path / "index.sqlite")
+    index = NearDuplicateIndex(path)
+    index.assign("bbc/1", STORY)
+    index.close()
+
+    reopened = NearDuplicateIndex(path)
+    assert len(reopened) == 1
+    assert reopened.assign("cnn/1", EDITED) == "bbc/1"
+    # Re-assigning a known link keeps its canonical
+    assert reopened.assign("cnn/1", OTHER) == "bbc/1"
+    reopened.close()
+
+    strict = NearDuplicateIndex(path, threshold=0.99)
+    assert len(strict) == 0
+    assert strict.assign("cnn/1", EDITED) == "cnn/1"
+    strict.close()
+    with sqlite3.connect(path) as db:
+        assert dict(db.execute("SELECT key, value FROM meta"))["threshold"] == "0.99"
+
+def test_empty_text_is_its_own_canonical():
+    index = NearDuplicateIndex(":memory:")
+    assert index.signature("!!!") is None
+    assert index.assign("x", "!!!") == "x" and index.query("") is None
+
+def test_invalid_threshold():
+    with pytest.raises(ValueError):
+        NearDuplicateIndex(":memory:", threshold=0)
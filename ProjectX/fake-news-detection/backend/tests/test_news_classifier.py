@@ -0,0 +1,140 @@
+import asyncio
+
+import pytest
+
+from backend.news_classifier import NewsClassifier, news_text
+from backend.process_lock import ProcessLock
+from backend.repository import InMemoryRepository, RepositoryError, use_repository
+
+def fake_predict_batch(texts):
+    """Stand-in for predict_fake_news_batch: FAKE when the text mentions aliens."""
+    fake_predict_batch.calls.append(len(texts))
+    return [{"prediction": "FAKE" if "aliens" in text else "REAL", "confidence": 0.9, "model_version": "v-test"}
+            for text in texts]
+
+@pytest.fixture(autouse=True)
+def reset_calls():
+    fake_predict_batch.calls = []
+
+def news_rows(count: int, start: int = 1) -> list[dict]:
+    return [{"id": i, "title": f"Story {i}", "link": f"http://example.org/{i}",
+             "description": "aliens landed" if i % 2 else "markets closed"} for i in range(start, start + count)]
+
+def make_classifier(**kwargs) -> NewsClassifier:
+    return NewsClassifier(batch_size=4, predict_batch=fake_predict_batch, **kwargs)
+
+def test_classifies_news_in_bounded_batches_linked_to_the_news_row():
+    repo = InMemoryRepository({"news": news_rows(10)})
+    classifier = make_classifier()
+
+    assert asyncio.run(classifier.run_until_idle(repo)) == 10
+
+    assert fake_predict_batch.calls == [4, 4, 2]
+    assert repo.calls[("POST", "analysis")] == 3
+    analyses = {row["news_id"]: row for row in repo.tables["analysis"]}
+    assert sorted(analyses) == list(range(1, 11))
+    assert analyses[1]["prediction"] == "FAKE" and analyses[2]["prediction"] == "REAL"
+    assert analyses[1]["text"] == news_text(repo.tables["news"][0]) and analyses[1]["model_version"] == "v-test"
+
+def test_picks_up_rows_committed_late_with_a_smaller_id():
+    repo = InMemoryRepository({"news": news_rows(5)})
+    asyncio.run(make_classifier().run_until_idle(repo))
+
+    # A concurrent upsert took id 6 from the sequence but committed after 7 and 8 were classified
+    repo.tables["news"].extend(news_rows(2, start=7))
+    asyncio.run(make_classifier().run_until_idle(repo))
+    repo.tables["news"].extend(news_rows(1, start=6))
+    assert asyncio.run(make_classifier().run_until_idle(repo)) == 1
+    assert sorted(row["news_id"] for row in repo.tables["analysis"]) == list(range(1, 9))
+
+def test_rows_without_a_verdict_are_retried_on_the_next_pass():
+    def failing_predict_batch(texts):
+        return [{"error": "Input text is empty"} if "7" in text else fake_predict_batch([text])[0] for text in texts]
+
+    repo = InMemoryRepository({"news": news_rows(10)})
+    classifier = make_classifier()
+    classifier.predict_batch = failing_predict_batch
+    assert asyncio.run(classifier.run_until_idle(repo)) == 9  # one pass, not stuck on row 7
+    classifier.predict_batch = fake_predict_batch
+    assert asyncio.run(classifier.run_until_idle(repo)) == 1
+
+def test_only_the_process_holding_the_lock_classifies(tmp_path):
+    repo = InMemoryRepository({"news": news_rows(3)})
+    previous = use_repository(repo)
+    holder = ProcessLock(str(tmp_path / "classifier.lock"))
+    assert holder.acquire()
+    classifier = make_classifier(interval=60, lock=ProcessLock(str(tmp_path / "classifier.lock")))
+
+    async def exercise():
+        classifier.start()
+        await asyncio.sleep(0.05)
+        assert repo.tables.get("analysis", []) == [] and not classifier.stats()["holds_lock"]
+        holder.release()  # the classifying worker exits
+        classifier.notify()
+        await asyncio.sleep(0.05)
+        await classifier.stop()
+
+    try:
+        asyncio.run(exercise())
+    finally:
+        use_repository(previous)
+    assert len(repo.tables["analysis"]) == 3
+
+def test_failed_write_is_retried_on_the_next_pass():
+    class FlakyRepository(InMemoryRepository):
+        fail = True
+
+        async def insert(self, table, rows, **kwargs):
+            if self.fail:
+                raise RepositoryError("insert analysis failed", status=503)
+            return await super().insert(table, rows, **kwargs)
+
+    repo = FlakyRepository({"news": news_rows(6)})
+    classifier = make_classifier()
+    with pytest.raises(RuntimeError):
+        asyncio.run(classifier.run_until_idle(repo))
+    assert classifier.stats()["errors"] == 1
+
+    # Another process classified rows 1-4 meanwhile
+    repo.fail = False
+    asyncio.run(make_classifier().classify_batch(repo))
+    assert asyncio.run(classifier.run_until_idle(repo)) == 2
+    assert sorted(row["news_id"] for row in repo.tables["analysis"]) == [1, 2, 3, 4, 5, 6]
+
+def test_background_task_wakes_on_notify():
+    repo = InMemoryRepository({"news": news_rows(2)})
+    previous = use_repository(repo)
+    classifier = make_classifier(interval=60)
+
+    async def exercise():
+        classifier.start()
+        await asyncio.sleep(0.05)
+        repo.tables["news"].extend(news_rows(3, start=3))
+        classifier.notify(3)
+        await asyncio.sleep(0.05)
+        await classifier.stop()
+
+    try:
+        asyncio.run(exercise())
+    finally:
+        use_repository(previous)
+    assert len(repo.tables["analysis"]) == 5
+    assert not classifier.running
+
+def test_near_duplicates_reuse_the_canonical_verdict():
+    repo = InMemoryRepository({
+        "news": [
+            {"id": 1, "link": "bbc/1", "title": "Aliens", "description": "aliens landed", "canonical_link": None},
+            {"id": 2, "link": "cnn/1", "title": "Aliens!", "description": "aliens landed", "canonical_link": "bbc/1"},
+        ],
+    })
+    classifier = make_classifier()
+    asyncio.run(classifier.run_until_idle(repo))
+    assert fake_predict_batch.calls == [1]  # the copy in the same batch is not scored
+
+    repo.tables["news"].append({"id": 3, "link": "ndtv/1", "title": "Markets", "description": "aliens landed",
+                                "canonical_link": "bbc/1"})
+    asyncio.run(classifier.run_until_idle(repo))
+    assert fake_predict_batch.calls == [1]  # nor is a later copy: its verdict comes from analysis
+    assert [row["prediction"] for row in repo.tables["analysis"]] == ["FAKE"] * 3
+    assert classifier.stats()["reused"] == 2
@@ -0,0 +1,36 @@
+import asyncio
+
+import bcrypt
+import pytest
+
+from backend.password_hashing import PasswordHasher, PasswordHasherBusy
+
+def test_hash_and_verify_use_configured_cost():
+    hasher = PasswordHasher(workers=1, rounds=4)
+
+    async def run():
+        hashed = await hasher.hash("Correct-Horse-9")
+        return hashed, await hasher.verify("Correct-Horse-9", hashed), await hasher.verify("wrong", hashed)
+
+    hashed, ok, wrong = asyncio.run(run())
+    hasher.shutdown()
+    assert hashed.startswith("$2b$04$")
+    assert bcrypt.checkpw(b"Correct-Horse-9", hashed.encode())
+    assert ok and not wrong
+    assert hasher.stats()["completed"] == 3
+
+def test_calls_beyond_max_pending_are_rejected():
+    hasher = PasswordHasher(workers=1, max_pending=2, rounds=10)
+
+    async def run():
+        return await asyncio.gather(*(hasher.hash("pw") for _ in range(5)), return_exceptions=True)
+
+    results = asyncio.run(run())
+    hasher.shutdown()
+    assert sum(isinstance(r, PasswordHasherBusy) for r in results) == 3
+    assert sum(isinstance(r, str) for r in results) == 2
+    assert hasher.stats()["rejected"] == 3 and hasher.stats()["pending"] == 0
+
+def test_invalid_pool_size():
+    with pytest.raises(ValueError):
+        PasswordHasher(workers=0)
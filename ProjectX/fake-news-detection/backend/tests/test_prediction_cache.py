@@ -0,0 +1,47 @@
+import time
+from backend.prediction_cache import PredictionCache, SQLiteCacheBackend
+
+RESULT = {"prediction": "FAKE", "confidence": 0.91}
+
+def test_hit_and_miss_counters():
+    cache = PredictionCache("v1")
+    key = cache.key("some cleaned text")
+    assert cache.get(key) is None
+    cache.set(key, RESULT)
+    assert cache.get(key) == RESULT
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"]) == (1, 1)
+
+def test_keys_depend_on_model_version():
+    cache = PredictionCache("v1")
+    key = cache.key("same text")
+    cache.set(key, RESULT)
+    cache.set_model_version("v2")
+    assert cache.key("same text") != key
+    assert cache.stats()["entries"] == 0
+
+def test_lru_eviction_respects_memory_budget():
+    cache = PredictionCache("v1", max_bytes=1200)
+    keys = [cache.key(f"text {i}") for i in range(5)]
+    for key in keys:
+        cache.set(key, RESULT)
+    assert cache.stats()["bytes"] <= 1200
+    assert cache.stats()["evictions"] > 0
+    assert cache.get(keys[0]) is None
+    assert cache.get(keys[-1]) == RESULT
+
+def test_entries_expire_after_ttl():
+    cache = PredictionCache("v1", ttl=0.01)
+    key = cache.key("short lived")
+    cache.set(key, RESULT)
+    time.sleep(0.02)
+    assert cache.get(key) is None
+
+def test_shared_backend_is_visible_to_other_workers(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    worker_a = PredictionCache("v1", backend=SQLiteCacheBackend(path))
+    worker_b = PredictionCache("v1", backend=SQLiteCacheBackend(path))
+    key = worker_a.key("shared text")
+    worker_a.set(key, RESULT)
+    assert worker_b.get(key) == RESULT
+    assert worker_b.stats()["shared_hits"] == 1
@@ -0,0 +1,93 @@
+import sys
+import json
+import cProfile
+import threading
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+from backend.main import app
+from backend.profiling import RequestProfile, request_profiler, load_traces, slowest_frames, main as summarize_profiles
+from backend.repository import InMemoryRepository, SupabaseRepository, use_repository
+
+client = TestClient(app)
+
+@pytest.fixture(autouse=True)
+def profiler(tmp_path, monkeypatch):
+    """Profile into tmp_path with the token "secret" and no sampling, against an in-memory database."""
+    monkeypatch.setattr(request_profiler, "directory", str(tmp_path))
+    monkeypatch.setattr(request_profiler, "token", "secret")
+    monkeypatch.setattr(request_profiler, "sample_rate", 0.0)
+    previous = use_repository(InMemoryRepository())
+    yield request_profiler
+    use_repository(previous)
+
+def test_header_profiles_the_request_its_prediction_and_database_calls(tmp_path):
+    response = client.post("/predict", json={"text": "The senate passed the budget bill on Tuesday."},
+                           headers={"X-Profile": "secret", "X-Request-ID": "predict-1"})
+    assert response.status_code == 200
+    assert response.headers["x-profile-id"] == "predict-1"
+    # The batcher scored the text on a worker thread; that thread's profile is part of the trace
+    frames = [frame["frame"] for frame in slowest_frames(load_traces(str(tmp_path)), top=None)]
+    assert any(frame.startswith("predict_fake_news_batch ") for frame in frames)
+
+    supabase = SupabaseRepository("https://db.example.test", "anon-key",
+                                  transport=httpx.MockTransport(lambda request: httpx.Response(200, json=[])))
+    use_repository(supabase)
+    response = client.get("/news?limit=7", headers={"X-Profile": "secret"})
+    assert response.status_code == 200
+    with open(tmp_path / f"{response.headers['x-profile-id']}.json") as f:
+        trace = json.load(f)
+    assert trace["path"] == "/news" and trace["status"] == 200
+    assert [span["name"] for span in trace["spans"]] == ["GET news"]
+
+def test_requests_without_the_token_are_not_profiled(tmp_path):
+    for headers in ({}, {"X-Profile": "guess"}):
+        response = client.get("/", headers=headers)
+        assert response.status_code == 200 and "x-profile-id" not in response.headers
+    assert list(tmp_path.iterdir()) == []
+
+def test_admin_toggle_samples_requests(profiler, tmp_path):
+    assert client.post("/admin/profiling", json={"sample_rate": 1.0}).status_code == 403
+    assert client.post("/admin/profiling", json={"sample_rate": 2.0}, headers={"X-Profile": "secret"}).status_code == 400
+
+    response = client.post("/admin/profiling", json={"sample_rate": 1.0}, headers={"X-Profile": "secret"})
+    assert response.status_code == 200 and response.json()["sample_rate"] == 1.0
+    assert "x-profile-id" in client.get("/").headers
+    assert profiler.stats()["profiled"] >= 1
+
+def test_cli_summarizes_the_slowest_frames(tmp_path, capsys):
+    for _ in range(2):
+        client.post("/predict/batch", json={"texts": ["Markets rallied after the announcement."] * 3},
+                    headers={"X-Profile": "secret"})
+
+    summarize_profiles(["--dir", str(tmp_path), "--path", "/predict/batch", "--sort", "cumtime", "--top", "200"])
+    output = capsys.readouterr().out
+    assert output.startswith("2 profiled requests")
+    assert "predict_fake_news_batch" in output
+
+def sum_squares():
+    return sum(i * i for i in range(10_000))
+
+def test_work_on_another_thread_is_part_of_the_profile():
+    profile = RequestProfile("r1", "POST", "/predict")
+    on_loop = profile.enable()
+    # As the micro-batcher does: run() on a worker thread while the loop thread is profiled
+    worker = threading.Thread(target=profile.run, args=(sum_squares,))
+    worker.start()
+    worker.join()
+    profile.disable(on_loop)
+    assert any(function == "sum_squares" for _, _, function in profile.stats().stats)
+
+@pytest.mark.skipif(sys.version_info < (3, 12), reason="cProfile is per thread before Python 3.12")
+def test_an_active_profiler_leaves_the_request_unprofiled():
+    other = cProfile.Profile()
+    other.enable()
+    try:
+        profile = RequestProfile("r2", "POST", "/predict")
+        assert profile.enable() is None
+        assert profile.run(sum_squares) == sum_squares()
+    finally:
+        other.disable()
+    assert profile.stats() is None
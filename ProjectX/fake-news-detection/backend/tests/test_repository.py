@@ -0,0 +1,94 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from backend.repository import InMemoryRepository, RepositoryError, SupabaseRepository, get_repository, use_repository
+
+def make_repository(handler):
+    return SupabaseRepository("https://db.example.test", "anon-key", transport=httpx.MockTransport(handler))
+
+def test_select_builds_postgrest_query():
+    seen = {}
+
+    def handler(request):
+        seen["request"] = request
+        return httpx.Response(200, json=[{"id": "1", "email": "a@example.com"}])
+
+    repo = make_repository(handler)
+
+    async def run():
+        rows = await repo.select("users", {"email": "a@example.com"}, columns="id, email", limit=1)
+        await repo.close()
+        return rows
+
+    assert asyncio.run(run()) == [{"id": "1", "email": "a@example.com"}]
+    request = seen["request"]
+    assert request.url.path == "/rest/v1/users"
+    assert dict(request.url.params) == {"select": "id, email", "email": "eq.a@example.com", "limit": "1"}
+    assert request.headers["apikey"] == "anon-key"
+    assert repo.calls[("GET", "users")] == 1
+
+def test_insert_and_errors():
+    def handler(request):
+        if request.url.path.endswith("/news"):
+            return httpx.Response(409, json={"message": "duplicate key value"})
+        assert request.headers["Prefer"] == "return=representation"
+        return httpx.Response(201, json=json.loads(request.content))
+
+    repo = make_repository(handler)
+
+    async def run():
+        rows = await repo.insert("feedback", {"rating": 5})
+        with pytest.raises(RepositoryError) as error:
+            await repo.insert("news", {"link": "https://example.com"})
+        await repo.close()
+        return rows, error.value
+
+    rows, error = asyncio.run(run())
+    assert rows == {"rating": 5}
+    assert error.is_conflict
+
+def test_in_memory_repository_enforces_unique_columns():
+    repo = InMemoryRepository()
+
+    async def run():
+        user = (await repo.insert("users", {"email": "a@example.com", "password": "x"}))[0]
+        with pytest.raises(RepositoryError):
+            await repo.insert("users", {"email": "a@example.com", "password": "y"})
+        await repo.update("users", {"password": "z"}, {"email": "a@example.com"})
+        return user, await repo.select("users", {"id": user["id"]}, columns="email, password")
+
+    user, rows = asyncio.run(run())
+    assert user["id"] and rows == [{"email": "a@example.com", "password": "z"}]
+    assert repo.calls[("POST", "users")] == 2
+
+def test_comparison_filters():
+    params = SupabaseRepository._filter_params({"id": ("gt", 10), "link": ("in", ["http://a.test/x,y", 'say "hi"'])})
+    assert params == {"id": "gt.10", "link": 'in.("http://a.test/x,y","say \\"hi\\"")'}
+
+    repo = InMemoryRepository({"news": [{"id": i, "link": f"l{i}"} for i in range(1, 6)]})
+    rows = asyncio.run(repo.select("news", {"id": ("gt", 2), "link": ("in", ["l1", "l3", "l4"])}))
+    assert [row["id"] for row in rows] == [3, 4]
+
+def test_keyset_pagination():
+    order = "published_at.desc,id.desc"
+    assert SupabaseRepository._keyset_filter(order, ("2024-06-04T08:30:00+00:00", 7)) == (
+        '(published_at.lt."2024-06-04T08:30:00+00:00",'
+        'and(published_at.eq."2024-06-04T08:30:00+00:00",id.lt."7"))')
+
+    repo = InMemoryRepository({"news": [{"id": i, "published_at": f"2024-06-0{1 + i // 3}"} for i in range(9)]})
+    rows = asyncio.run(repo.select("news", order=order, limit=3, after=("2024-06-02", 4)))
+    assert [(row["published_at"], row["id"]) for row in rows] == [("2024-06-02", 3), ("2024-06-01", 2), ("2024-06-01", 1)]
+
+def test_supabase_repository_is_built_on_first_use(monkeypatch):
+    monkeypatch.setenv("SUPABASE_URL", "https://db.example")
+    monkeypatch.setenv("SUPABASE_KEY", "key")
+    previous = use_repository(None)
+    try:
+        repo = get_repository()
+        assert isinstance(repo, SupabaseRepository) and repo.url == "https://db.example"
+        assert get_repository() is repo
+    finally:
+        use_repository(previous)
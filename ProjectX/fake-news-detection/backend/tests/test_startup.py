@@ -0,0 +1,31 @@
+import os
+import sys
+import subprocess
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Budget for `import backend.main` in a fresh interpreter; about 0.7 s on one core today
+IMPORT_BUDGET_MS = 1500
+# Pulled in only by unpickling the model or sending mail, never by importing the API
+HEAVY_PACKAGES = {"sklearn", "scipy", "pandas", "fastapi_mail"}
+
+def import_times(module: str, cwd) -> dict:
+    """Run `python -X importtime -c 'import module'` and return {module: cumulative microseconds}."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=cwd, env={**os.environ, "PYTHONPATH": PROJECT_DIR}, capture_output=True, text=True, timeout=120,
+    )
+    assert result.returncode == 0, result.stderr[-2000:]
+    times = {}
+    for line in result.stderr.splitlines():
+        if line.startswith("import time:") and "cumulative" not in line:
+            _, cumulative, name = line.split("|")
+            times[name.strip()] = int(cumulative)
+    return times
+
+def test_importing_the_api_is_side_effect_free_and_within_budget(tmp_path):
+    # An empty working directory: no config.json, .env, model or registry to find
+    times = import_times("backend.main", tmp_path)
+
+    assert not HEAVY_PACKAGES & {name.split(".")[0] for name in times}
+    assert times["backend.main"] / 1000 < IMPORT_BUDGET_MS
+    assert os.listdir(tmp_path) == []
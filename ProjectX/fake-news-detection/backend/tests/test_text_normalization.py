@@ -0,0 +1,40 @@
+import json
+import re
+
+import pandas as pd
+
+from backend.benchmarks.common import load_liar_texts
+from backend.text_normalization import clean_text, clean_texts
+
+GOLDEN_PATH = "backend/tests/data/clean_text_golden.json"
+
+def reference_clean_text(text: str) -> str:
+    """The original four-pass implementation the fast path must match byte for byte."""
+    text = text.lower()
+    text = re.sub(r"http\S+|www.\S+", "", text)
+    text = re.sub(r"<.*?>", "", text)
+    text = re.sub(r"[^a-z0-9\s]", "", text)
+    return re.sub(r"\s+", " ", text).strip()
+
+def test_clean_text_matches_golden_outputs():
+    with open(GOLDEN_PATH, encoding="utf-8") as f:
+        golden = json.load(f)
+    for case in golden:
+        assert clean_text(case["input"]) == case["output"], case["input"]
+
+def test_clean_text_matches_reference_on_liar_corpus():
+    texts = load_liar_texts()
+    assert clean_texts(texts) == [reference_clean_text(t) for t in texts]
+
+def test_clean_texts_keeps_series_index():
+    series = pd.Series(["Hello <b>World</b>!", "www.example.com Bye"], index=[10, 20], name="text")
+    cleaned = clean_texts(series)
+    assert isinstance(cleaned, pd.Series)
+    assert cleaned.index.tolist() == [10, 20] and cleaned.name == "text"
+    assert cleaned.tolist() == ["hello world", "bye"]
+
+def test_clean_texts_process_pool_matches_serial(monkeypatch):
+    monkeypatch.setattr("backend.text_normalization.PARALLEL_MIN_ITEMS", 10)
+    monkeypatch.setattr("backend.text_normalization.PARALLEL_CHUNK_SIZE", 7)
+    texts = load_liar_texts(["valid.tsv"])[:50]
+    assert clean_texts(texts, workers=2) == clean_texts(texts)
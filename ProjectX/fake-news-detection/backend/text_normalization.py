@@ -0,0 +1,65 @@
+import re
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+# Precompiled patterns, identical to the ones clean_text has always used
+_URL_RE = re.compile(r"http\S+|www.\S+")
+_HTML_RE = re.compile(r"<.*?>")
+# Deleting whole runs at once is equivalent to deleting one character at a time
+_NON_ALNUM_RE = re.compile(r"[^a-z0-9\s]+")
+# Same deletion for pure-ASCII text as a bytes.translate table: every ASCII byte
+# that is not a-z, 0-9 or whitespace (str.isspace, which is what \s matches)
+_ASCII_DELETE = bytes(
+    c for c in range(128)
+    if not ("a" <= chr(c) <= "z" or "0" <= chr(c) <= "9" or chr(c).isspace())
+)
+
+# Lists shorter than this are cleaned in-process even when workers are requested
+PARALLEL_MIN_ITEMS = 20_000
+PARALLEL_CHUNK_SIZE = 2_000
+
+def clean_text(text: str) -> str:
+    """Clean text by removing URLs, special characters, and excessive spaces."""
+    text = text.lower()
+    # Skip the URL and HTML passes when they cannot match
+    if "http" in text or "www" in text:
+        text = _URL_RE.sub("", text) # Remove URLs
+    if "<" in text and ">" in text:
+        text = _HTML_RE.sub("", text) # Remove HTML tags
+    # Remove non-alphanumeric characters except spaces
+    if text.isascii():
+        text = text.encode("ascii").translate(None, _ASCII_DELETE).decode("ascii")
+    else:
+        text = _NON_ALNUM_RE.sub("", text)
+
+    # Collapse whitespace runs to single spaces and strip the ends in one pass
+    return " ".join(text.split())
+
+def _clean_chunk(texts: list[str]) -> list[str]:
+    return [clean_text(text) for text in texts]
+
+def clean_texts(texts, workers: int = None):
+    """Clean a pandas Series or a list of texts.
+
+    A Series comes back as a Series with the same index and name; anything
+    else comes back as a list. With workers > 1, large inputs are cleaned in
+    chunks on a process pool (workers=-1 uses every CPU).
+    """
+    # Only look for pandas if it is already loaded; the API never needs it
+    pd = sys.modules.get("pandas")
+    is_series = pd is not None and isinstance(texts, pd.Series)
+    values = texts.tolist() if is_series else list(texts)
+
+    if workers == -1:
+        workers = os.cpu_count() or 1
+    if workers and workers > 1 and len(values) >= PARALLEL_MIN_ITEMS:
+        chunks = [values[i:i + PARALLEL_CHUNK_SIZE] for i in range(0, len(values), PARALLEL_CHUNK_SIZE)]
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            cleaned = [text for chunk in pool.map(_clean_chunk, chunks) for text in chunk]
+    else:
+        cleaned = _clean_chunk(values)
+
+    if is_series:
+        return pd.Series(cleaned, index=texts.index, name=texts.name, dtype=object)
+    return cleaned